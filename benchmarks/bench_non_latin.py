@@ -0,0 +1,63 @@
+"""
+Obscure throughput on a large non-Latin corpus, and the cost of building non-ASCII padding
+one character at a time with string concatenation (the old random_utf8_string) against
+a single batched block
+
+Usage: python benchmarks/bench_non_latin.py [num_chars]
+"""
+import sys
+import time
+
+import standard_logger
+
+from prolix import rand
+from prolix import steno
+
+
+def make_corpus(num_chars):
+    # Cyrillic and CJK words separated by spaces
+    cyrillic = rand.code_point_table(0x0430, 0x044F)
+    cjk = rand.code_point_table(0x4E00, 0x9FFF)
+    words = []
+    total = 0
+    while total < num_chars:
+        table = cyrillic if len(words) % 2 else cjk
+        words.append(table.random_string(6))
+        total += 7
+    return " ".join(words)[0:num_chars]
+
+
+def concatenated_padding(rs, num_chars, lower, upper):
+    padding = ""
+    for i in range(0, num_chars):
+        padding = padding + rs.random_utf8_char(lower=lower, upper=upper)
+    return padding
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    num_chars = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    logger = standard_logger.get_logger('bench_non_latin', level_str='ERROR')
+    rs = rand.RandomString(logger=logger)
+    stn = steno.Steno(logger=logger)
+    corpus = make_corpus(num_chars)
+    min_ord, max_ord = stn.get_ord_range(corpus)
+    padding_len = num_chars * 36
+
+    concatenated = timed(lambda: concatenated_padding(rs, padding_len, min_ord, max_ord))
+    batched = timed(lambda: rs.random_utf8_string(len=padding_len, lower=min_ord, upper=max_ord))
+    obscure = timed(lambda: stn.obscure_text(corpus))
+
+    print("corpus chars:             {0}  padding chars: {1}".format(num_chars, padding_len))
+    print("concatenated padding:     {0:8.1f} ns/char".format(concatenated / padding_len * 1e9))
+    print("batched padding:          {0:8.1f} ns/char".format(batched / padding_len * 1e9))
+    print("obscure_text:             {0:8.0f} chars/s".format(num_chars / obscure))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Throughput of Steno.obscure_text against the process pool variant in prolix.parallel
+
+Usage: python benchmarks/bench_parallel.py [num_chars] [max_workers]
+"""
+import sys
+import time
+
+import standard_logger
+
+from prolix import parallel
+from prolix import steno
+from pyxutils import paths
+
+
+def chars_per_sec(func, num_chars, repeat=3):
+    best = None
+    for i in range(0, repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return num_chars / best
+
+
+def main():
+    num_chars = int(sys.argv[1]) if len(sys.argv) > 1 else 4000000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    logger = standard_logger.get_logger('bench_parallel', level_str='ERROR')
+    stn = steno.Steno(store_backend='memory', logger=logger)
+
+    with open(paths.get_data_path(file_name='gettysburg.txt', package_name='prolix')) as f:
+        sample = f.read()
+    text = (sample * (num_chars // len(sample) + 1))[0:num_chars]
+
+    # Start the workers before timing
+    parallel.obscure_text(stn, sample, max_workers=max_workers)
+
+    serial = chars_per_sec(lambda: stn.obscure_text(text), num_chars)
+    pooled = chars_per_sec(lambda: parallel.obscure_text(stn, text, max_workers=max_workers), num_chars)
+    parallel.shutdown()
+
+    print("text chars:               {0}".format(num_chars))
+    print("serial:                   {0:12.0f} chars/s".format(serial))
+    print("process pool:             {0:12.0f} chars/s".format(pooled))
+    print("speedup:                  {0:12.1f}x".format(pooled / serial))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Per-character cost of padding generation: random.SystemRandom (one os.urandom call per draw)
+against the buffered SecureRandomSource
+
+Usage: python benchmarks/bench_rand.py [num_chars]
+"""
+import random
+import sys
+import timeit
+
+import standard_logger
+
+from prolix import rand
+
+
+def system_random_padding(secure_rng, letter_sampler, num_chars):
+    return "".join([letter_sampler.item_for(secure_rng.randrange(letter_sampler.num_outcomes))
+                    for i in range(0, num_chars)])
+
+
+def buffered_padding(rasbf, num_chars):
+    return rasbf.random_ascii_string_by_freq(len=num_chars)
+
+
+def time_per_char(func, num_chars, repeat=5):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return best / num_chars * 1e9
+
+
+def main():
+    num_chars = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    logger = standard_logger.get_logger('bench_rand', level_str='ERROR')
+    rasbf = rand.RandomAsciiStringByFrequency(logger=logger).dispatch()
+    system_rng = random.SystemRandom()
+
+    before = time_per_char(lambda: system_random_padding(system_rng, rasbf.letter_sampler, num_chars), num_chars)
+    after = time_per_char(lambda: buffered_padding(rasbf, num_chars), num_chars)
+
+    print("padding chars:            {0}".format(num_chars))
+    print("random.SystemRandom:      {0:8.1f} ns/char".format(before))
+    print("SecureRandomSource:       {0:8.1f} ns/char".format(after))
+    print("speedup:                  {0:8.1f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Store round trip latency against a local Redis: EXISTS+GET and EXISTS+DEL (the old
+RedisStore behaviour) against single commands, and GET+DEL against get_and_delete
+
+Usage: python benchmarks/bench_store_latency.py [iterations]
+"""
+import sys
+import time
+
+import standard_logger
+
+from prolix import store
+
+
+def time_op(setup, op, iterations):
+    total = 0.0
+    for i in range(0, iterations):
+        key = "bench_store_latency:{0}".format(i)
+        setup(key)
+        start = time.perf_counter()
+        op(key)
+        total += time.perf_counter() - start
+    return total / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logger = standard_logger.get_logger('bench_store_latency', level_str='ERROR')
+    redis_store = store.RedisStore(logger=logger)
+    client = redis_store.redis
+    value = b"x" * 4096
+
+    def setup(key):
+        client.set(key, value, ex=60)
+
+    def old_get(key):
+        if client.exists(key):
+            client.get(key)
+
+    def old_delete(key):
+        if client.exists(key):
+            client.delete(key)
+
+    def get_then_delete(key):
+        redis_store.get(key=key, decode=False)
+        redis_store.delete(key=key)
+
+    timings = [
+        ("EXISTS+GET", time_op(setup, old_get, iterations)),
+        ("get", time_op(setup, lambda key: redis_store.get(key=key, decode=False), iterations)),
+        ("EXISTS+DEL", time_op(setup, old_delete, iterations)),
+        ("delete", time_op(setup, lambda key: redis_store.delete(key=key), iterations)),
+        ("get then delete", time_op(setup, get_then_delete, iterations)),
+        ("get_and_delete", time_op(setup, lambda key: redis_store.get_and_delete(key=key, decode=False), iterations)),
+    ]
+
+    print("iterations: {0}".format(iterations))
+    for label, timing in timings:
+        print("{0:<16} {1:9.1f} us".format(label, timing))
+
+
+if __name__ == "__main__":
+    main()
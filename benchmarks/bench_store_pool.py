@@ -0,0 +1,75 @@
+"""
+Per-request store latency at high concurrency with a new Redis client per request (the old
+behaviour of prolix.api() per request) against the shared connection pool
+
+Usage: python benchmarks/bench_store_pool.py [num_threads] [requests_per_thread]
+"""
+import statistics
+import sys
+import threading
+import time
+
+import redis
+import standard_logger
+
+from prolix import store
+
+
+def run_requests(make_client, num_threads, requests_per_thread):
+    latencies = []
+    latencies_lock = threading.Lock()
+    value = "x" * 1024
+
+    def worker(thread_num):
+        thread_latencies = []
+        for i in range(0, requests_per_thread):
+            key = "bench_store_pool:{0}:{1}".format(thread_num, i)
+            start = time.perf_counter()
+            client = make_client()
+            client.setex(key, 60, value)
+            client.get(key)
+            client.delete(key)
+            thread_latencies.append(time.perf_counter() - start)
+        with latencies_lock:
+            latencies.extend(thread_latencies)
+
+    threads = [threading.Thread(target=worker, args=(thread_num,)) for thread_num in range(0, num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return latencies, elapsed
+
+
+def report(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    print("{0:<16} mean {1:7.3f} ms  p50 {2:7.3f} ms  p99 {3:7.3f} ms  {4:8.0f} req/s".format(
+        label,
+        statistics.mean(latencies) * 1000,
+        latencies[len(latencies) // 2] * 1000,
+        latencies[int(len(latencies) * 0.99)] * 1000,
+        len(latencies) / elapsed))
+
+
+def main():
+    num_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    requests_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    logger = standard_logger.get_logger('bench_store_pool', level_str='ERROR')
+    redis_store = store.RedisStore(logger=logger)
+
+    def unpooled_client():
+        return redis.StrictRedis(host=redis_store.host, port=redis_store.port, password=redis_store.password)
+
+    def pooled_client():
+        return store.RedisStore(logger=logger).redis
+
+    print("threads: {0}  requests/thread: {1}".format(num_threads, requests_per_thread))
+    report("client/request", *run_requests(unpooled_client, num_threads, requests_per_thread))
+    report("shared pool", *run_requests(pooled_client, num_threads, requests_per_thread))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Cold-start and per-request cost of prolix.api() + obscure, with the data set cache
+cleared before every request (the old behaviour) and with a warm cache after prolix.warmup()
+
+Usage: python benchmarks/bench_warmup.py [num_requests]
+"""
+import sys
+import time
+
+import standard_logger
+
+import prolix
+from prolix import datasets
+
+
+CLEAR_TEXT = "Mary had a little lamb whose fleece was white as snow"
+
+
+def request(logger):
+    papi = prolix.api(logger=logger)
+    results = papi.obscure(text=CLEAR_TEXT, expiration_secs=10)
+    papi.steno.store.delete(key=results['key'])
+
+
+def time_requests(logger, num_requests, clear_cache):
+    timings = []
+    for i in range(0, num_requests):
+        if clear_cache:
+            datasets.clear()
+        start = time.perf_counter()
+        request(logger)
+        timings.append(time.perf_counter() - start)
+    return sum(timings) / len(timings) * 1000
+
+
+def main():
+    num_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    logger = standard_logger.get_logger('bench_warmup', level_str='ERROR')
+
+    datasets.clear()
+    start = time.perf_counter()
+    prolix.warmup(logger=logger)
+    cold_start = (time.perf_counter() - start) * 1000
+
+    print("cold start (warmup):         {0:8.3f} ms".format(cold_start))
+    print("per request, cache cleared:  {0:8.3f} ms".format(time_requests(logger, num_requests, True)))
+    print("per request, warm cache:     {0:8.3f} ms".format(time_requests(logger, num_requests, False)))
+
+
+if __name__ == "__main__":
+    main()
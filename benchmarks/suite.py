@@ -0,0 +1,217 @@
+"""
+Benchmark suite for the obscure/clarify/store hot paths
+
+Each case is timed (best of several runs) and then run once more under tracemalloc for its
+peak traced memory and the number of memory blocks it leaves allocated. Python does not expose
+a total allocation count, so retained blocks stand in for it.
+
+Results can be saved as a baseline and later runs compared against it. Baselines are only
+comparable on the same machine.
+
+Usage: python benchmarks/suite.py [--engine python|numpy] [--max-size CHARS] [--filter TEXT]
+                                  [--save PATH] [--compare PATH] [--threshold PCT]
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import standard_logger
+
+from prolix import index
+from prolix import rand
+from prolix import steno
+from prolix import store
+from pyxutils import paths
+
+
+SIZES = [1000, 10000, 100000, 1000000, 10000000]
+
+# Code point ranges of the non-ASCII scripts. Words of these are separated by spaces
+SCRIPTS = {
+    'latin1': (0x00C0, 0x00FF),
+    'cjk': (0x4E00, 0x9FFF),
+    'emoji': (0x1F600, 0x1F64F),
+}
+
+
+def make_corpus(script, num_chars):
+    if script == 'ascii':
+        with open(paths.get_data_path(file_name='gettysburg.txt', package_name='prolix')) as f:
+            sample = f.read().replace("—", "-")
+        return (sample * (num_chars // len(sample) + 1))[0:num_chars]
+
+    table = rand.code_point_table(*SCRIPTS[script])
+    words = [table.random_string(6) for i in range(0, num_chars // 7 + 1)]
+    return " ".join(words)[0:num_chars]
+
+
+def best_time(func, repeat):
+    best = None
+    for i in range(0, repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def memory_use(func):
+    tracemalloc.start()
+    try:
+        blocks_before = sys.getallocatedblocks()
+        result = func()
+        retained_blocks = sys.getallocatedblocks() - blocks_before
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, retained_blocks
+
+
+def run_case(name, func, units, repeat):
+    """
+    Time a case and measure its memory use
+
+    :param str name: Case name
+    :param func: Callable to benchmark
+    :param int units: Characters (or operations) processed by one call
+    :param int repeat: Number of timed runs
+    :return: {seconds, units_per_sec, peak_bytes, retained_blocks}
+    :rtype: dict
+    """
+    seconds = best_time(func, repeat)
+    peak_bytes, retained_blocks = memory_use(func)
+    result = {
+        'seconds': seconds,
+        'units_per_sec': units / seconds,
+        'peak_bytes': peak_bytes,
+        'retained_blocks': retained_blocks,
+    }
+    print("{0:<36} {1:>14.0f}/s {2:>12.1f} KiB {3:>10d} blocks".format(
+        name, result['units_per_sec'], peak_bytes / 1024, retained_blocks))
+    sys.stdout.flush()
+    return name, result
+
+
+def steno_cases(stn, max_size):
+    for size in [size for size in SIZES if size <= max_size]:
+        repeat = 5 if size <= 100000 else 1
+        for script in ['ascii'] + sorted(SCRIPTS):
+            text = make_corpus(script, size)
+            obscured_text, interpolation_counts = stn.obscure_text(text)
+            yield "obscure_text {0} {1}".format(script, size), lambda: stn.obscure_text(text), size, repeat
+            yield "clarify_text {0} {1}".format(script, size), \
+                lambda: stn.clarify_text(interpolation_counts, obscured_text), size, repeat
+
+
+def rand_cases(stn, max_size):
+    size = min(max_size, 1000000)
+    rs = rand.RandomString()
+    yield "random_ascii_string_by_freq {0}".format(size), \
+        lambda: stn.rasbf.random_ascii_string_by_freq(len=size), size, 5
+    for script in sorted(SCRIPTS):
+        lower, upper = SCRIPTS[script]
+        yield "random_utf8_string {0} {1}".format(script, size), \
+            lambda: rs.random_utf8_string(len=size, lower=lower, upper=upper), size, 5
+
+
+def index_cases(max_size):
+    size = min(max_size, 1000000)
+    ide = index.IndexEntry()
+    ide.steno_seq = rand.RandomInts().random_ints(len=size, lower=1, upper=64)
+    ide.add_checkpoints()
+    v2_data = ide.to_bytes()
+    v1_data = ide.to_json_str()
+    yield "IndexEntry.to_bytes {0}".format(size), lambda: ide.to_bytes(), size, 5
+    yield "IndexEntry.from_bytes {0}".format(size), lambda: index.IndexEntry.from_bytes(v2_data), size, 5
+    yield "IndexEntry.to_json_str {0}".format(size), lambda: ide.to_json_str(), size, 5
+    yield "IndexEntry.from_json_str {0}".format(size), lambda: index.IndexEntry.from_json_str(v1_data), size, 5
+
+
+def store_cases(logger):
+    iterations = 1000
+    item = index.IndexEntry().to_bytes()
+    for backend in store.STORE_BACKENDS:
+        item_store = store.create_store(backend=backend, logger=logger)
+        if not item_store.store_with_expiration(key="bench_suite:check", item=item, exp_seconds=60)['success']:
+            print("{0:<36} skipped - store not available".format("store round trip " + backend))
+            continue
+
+        def round_trips(item_store=item_store):
+            for i in range(0, iterations):
+                key = "bench_suite:{0}".format(i)
+                item_store.store_with_expiration(key=key, item=item, exp_seconds=60)
+                item_store.get(key=key, decode=False)
+                item_store.delete(key=key)
+
+        yield "store round trip {0}".format(backend), round_trips, iterations, 3
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of each case against a baseline
+
+    :return: Names of cases more than threshold percent slower than the baseline
+    :rtype: list(str)
+    """
+    regressions = []
+    print("\nagainst baseline of {0}".format(baseline['meta']['date']))
+    for name, result in results.items():
+        if name not in baseline['results']:
+            continue
+        change = (result['units_per_sec'] / baseline['results'][name]['units_per_sec'] - 1) * 100
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print("{0:<36} {1:>+8.1f}%{2}".format(name, change, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark obscure/clarify/store hot paths")
+    parser.add_argument('--engine', default='python', choices=steno.ENGINES)
+    parser.add_argument('--max-size', type=int, default=1000000, help="Largest text size in characters")
+    parser.add_argument('--filter', default=None, help="Only run cases whose name contains this")
+    parser.add_argument('--save', default=None, help="Save results as JSON to this path")
+    parser.add_argument('--compare', default=None, help="Compare results with a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Regression threshold, percent")
+    args = parser.parse_args()
+
+    logger = standard_logger.get_logger('bench_suite', level_str='ERROR')
+    stn = steno.create_steno(engine=args.engine, store_backend='memory', logger=logger)
+
+    print("{0:<36} {1:>16} {2:>16} {3:>17}".format("case", "chars or ops", "peak", "retained"))
+    cases = [steno_cases(stn, args.max_size), rand_cases(stn, args.max_size),
+             index_cases(args.max_size), store_cases(logger)]
+    results = {}
+    for case_group in cases:
+        for name, func, units, repeat in case_group:
+            if args.filter and args.filter not in name:
+                continue
+            name, result = run_case(name, func, units, repeat)
+            results[name] = result
+
+    if args.save:
+        meta = {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'engine': args.engine,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        }
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
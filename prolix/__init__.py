@@ -1,5 +1,26 @@
 from prolix import api_impl
+from prolix import async_api_impl
+from prolix import rand
 
 
 def api(**kwargs):
     return api_impl.ApiImpl(**kwargs)
+
+
+def async_api(**kwargs):
+    return async_api_impl.AsyncApiImpl(**kwargs)
+
+
+def warmup(**kwargs):
+    """
+    Load configuration, frequency tables and the word list up front, so that
+    subsequent obscure/clarify calls do no file I/O. Call once at process start,
+    before forking workers so the data is shared.
+
+    :param kwargs: Passed through to api()
+    :return: An ApiImpl instance
+    :rtype: api_impl.ApiImpl
+    """
+    papi = api(**kwargs)
+    rand.RandValues(logger=papi.logger)
+    return papi
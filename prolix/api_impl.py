@@ -1,7 +1,8 @@
 import standard_logger
 
+from prolix import datasets
+from prolix import metrics
 from prolix import steno
-from json_config import JsonConfig
 
 
 class ApiImpl:
@@ -9,11 +10,12 @@ class ApiImpl:
 
     def __init__(self, **kwargs):
         self.logger = kwargs['logger'] if 'logger' in kwargs else standard_logger.get_logger('prolix_api')
-        self.conf = JsonConfig.conf(logger=self.logger, package_name='prolix')
-        self.conf.config_name = 'prolix_conf.json'
-        self.conf_data = self.conf.get_data()
+        self.conf_data = datasets.get_conf_data(logger=self.logger)
         self.default_store_expiration_secs = self.conf_data['default_store_expiration_secs']
-        self.steno = steno.Steno(logger=self.logger)
+        self.engine = kwargs['engine'] if 'engine' in kwargs else self.conf_data.get('steno_engine', 'python')
+        self.store_backend = kwargs['store_backend'] if 'store_backend' in kwargs else None
+        self.steno = steno.create_steno(engine=self.engine, store_backend=self.store_backend, logger=self.logger)
+        metrics.configure_from_conf(self.conf_data)
 
     def add_error(self, errors, status={}):
         """
@@ -28,12 +30,13 @@ class ApiImpl:
         status["errors"] = all_errors
         return
 
-    def obscure(self, text=None, expiration_secs=None):
+    def obscure(self, text=None, expiration_secs=None, parallel=False):
         """
         Obscure text
 
         :param str text: Text to obscured
         :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :param bool parallel: (optional) Obscure large texts across a process pool - see Steno.obscure
         :return: {key, expiration_secs, obscured text, errors}
         :rtype: dict
         """
@@ -45,21 +48,27 @@ class ApiImpl:
         if not expiration_secs:
             expiration_secs = self.default_store_expiration_secs
 
-        results = self.steno.obscure(text=text, expiration_secs=expiration_secs)
+        stats = metrics.METRICS
+        stats.incr('api.obscure.calls')
+        with stats.timer('api.obscure'):
+            results = self.steno.obscure(text=text, expiration_secs=expiration_secs, parallel=parallel)
 
         if 'errors' in results:
+            stats.incr('api.obscure.errors')
             self.add_error(results['errors'], status=status)
             del results['errors']
 
         status.update(results)
         return status
 
-    def clarify(self, key=None, text=None):
+    def clarify(self, key=None, text=None, delete_key=False, parallel=False):
         """
         Clarify text previously obscured
 
         :param str key: Key returned from obscure process
         :param str text: Text returned from  obscure process
+        :param bool delete_key: If True, burn the key so the text cannot be clarified again
+        :param bool parallel: (optional) Clarify large texts across a process pool - see Steno.clarify_index
         :return: {clarified text, error}
         :rtype: dict
         """
@@ -71,7 +80,278 @@ class ApiImpl:
         if status:
             return status
 
-        results = self.steno.clarify(key=key, text=text)
+        stats = metrics.METRICS
+        stats.incr('api.clarify.calls')
+        with stats.timer('api.clarify'):
+            results = self.steno.clarify(key=key, text=text, delete_key=delete_key, parallel=parallel)
+        if 'errors' in results:
+            stats.incr('api.clarify.errors')
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def clarify_range(self, key=None, text=None, start=0, end=None):
+        """
+        Clarify a range of characters of a text previously obscured, without clarifying the rest
+
+        :param str key: Key returned from obscure process
+        :param text: Obscured text as a str, a path (os.PathLike) to a UTF8 file of it,
+            or a bytes-like object such as mmap.mmap holding it UTF8 encoded
+        :param int start: Position of the first clear text character to return
+        :param int end: (optional) Position after the last clear text character to return - default end of text
+        :return: {clarified text, error}
+        :rtype: dict
+        """
+        status = {}
+        if not key:
+            self.add_error(["ApiImpl.clarify_range no key specified"], status=status)
+        if text is None:
+            self.add_error(["ApiImpl.clarify_range no obscured text specified"], status=status)
+        if start < 0 or (end is not None and end < start):
+            self.add_error(["ApiImpl.clarify_range invalid range {0}:{1}".format(start, end)], status=status)
+        if status:
+            return status
+
+        results = self.steno.clarify_range(key=key, text=text, start=start, end=end)
+        if 'errors' in results:
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def obscure_many(self, texts=None, expiration_secs=None):
+        """
+        Obscure several texts. Index entries are written to the store in a single batch
+
+        :param list(str) texts: Texts to obscure
+        :param int expiration_secs: How long texts should be valid for - default 300 secs (5 mins)
+        :return: One {key, expiration_secs, obscured text, errors} dict per text, in order
+        :rtype: list(dict)
+        """
+        texts = texts if texts else []
+        if not expiration_secs:
+            expiration_secs = self.default_store_expiration_secs
+
+        all_status = [{} for text in texts]
+        valid_positions = []
+        for pos, text in enumerate(texts):
+            if text:
+                valid_positions.append(pos)
+            else:
+                self.add_error(["ApiImpl.obscure_many no text specified for item {0}".format(pos)],
+                               status=all_status[pos])
+
+        if valid_positions:
+            all_results = self.steno.obscure_many(texts=[texts[pos] for pos in valid_positions],
+                                                  expiration_secs=expiration_secs)
+            for pos, results in zip(valid_positions, all_results):
+                if 'errors' in results:
+                    self.add_error(results['errors'], status=all_status[pos])
+                    del results['errors']
+                all_status[pos].update(results)
+
+        return all_status
+
+    def clarify_many(self, pairs=None):
+        """
+        Clarify several texts previously obscured. Index entries are read from the store in a single batch
+
+        :param list(tuple(str, str)) pairs: (key, obscured text) pairs
+        :return: One {clarified text, error} dict per pair, in order
+        :rtype: list(dict)
+        """
+        pairs = pairs if pairs else []
+
+        all_status = [{} for pair in pairs]
+        valid_positions = []
+        for pos, (key, text) in enumerate(pairs):
+            if not key:
+                self.add_error(["ApiImpl.clarify_many no key specified for item {0}".format(pos)],
+                               status=all_status[pos])
+            if not text:
+                self.add_error(["ApiImpl.clarify_many no obscured text specified for item {0}".format(pos)],
+                               status=all_status[pos])
+            if not all_status[pos]:
+                valid_positions.append(pos)
+
+        if valid_positions:
+            all_results = self.steno.clarify_many(pairs=[pairs[pos] for pos in valid_positions])
+            for pos, results in zip(valid_positions, all_results):
+                if 'errors' in results:
+                    self.add_error(results['errors'], status=all_status[pos])
+                    del results['errors']
+                all_status[pos].update(results)
+
+        return all_status
+
+    def obscure_stream(self, reader=None, writer=None, expiration_secs=None, chunk_size=None):
+        """
+        Obscure text read from a file-like object, writing the obscured text to another.
+        The whole text and its obscured form are never held in memory at once.
+
+        :param reader: File-like object opened in text mode to read clear text from
+        :param writer: File-like object opened in text mode to write obscured text to
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {key, expiration_secs, errors}
+        :rtype: dict
+        """
+        status = {}
+        if reader is None:
+            self.add_error(["ApiImpl.obscure_stream no reader specified"], status=status)
+        if writer is None:
+            self.add_error(["ApiImpl.obscure_stream no writer specified"], status=status)
+        if status:
+            return status
+
+        if not expiration_secs:
+            expiration_secs = self.default_store_expiration_secs
+
+        results = self.steno.obscure_stream(reader=reader, writer=writer,
+                                            expiration_secs=expiration_secs, chunk_size=chunk_size)
+        if 'errors' in results:
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def clarify_stream(self, key=None, reader=None, writer=None, chunk_size=None):
+        """
+        Clarify obscured text read from a file-like object, writing the clarified text to another
+
+        :param str key: Key returned from obscure process
+        :param reader: File-like object opened in text mode to read obscured text from
+        :param writer: File-like object opened in text mode to write clarified text to
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {success, errors}
+        :rtype: dict
+        """
+        status = {}
+        if not key:
+            self.add_error(["ApiImpl.clarify_stream no key specified"], status=status)
+        if reader is None:
+            self.add_error(["ApiImpl.clarify_stream no reader specified"], status=status)
+        if writer is None:
+            self.add_error(["ApiImpl.clarify_stream no writer specified"], status=status)
+        if status:
+            return status
+
+        results = self.steno.clarify_stream(key=key, reader=reader, writer=writer, chunk_size=chunk_size)
+        if 'errors' in results:
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def obscure_iter(self, reader=None, expiration_secs=None, chunk_size=None):
+        """
+        Obscure text read from a file-like object as the obscured text is consumed - see Steno.obscure_iter.
+        The index is stored, and the key becomes valid, once obscured_chunks has been exhausted.
+
+        :param reader: File-like object opened in text mode to read clear text from
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {success, key, expiration_seconds, obscured_chunks, errors}
+        :rtype: dict
+        """
+        status = {}
+        if reader is None:
+            self.add_error(["ApiImpl.obscure_iter no reader specified"], status=status)
+            return status
+
+        if not expiration_secs:
+            expiration_secs = self.default_store_expiration_secs
+
+        results = self.steno.obscure_iter(reader=reader, expiration_secs=expiration_secs, chunk_size=chunk_size)
+        if 'errors' in results:
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def clarify_iter(self, key=None, reader=None, chunk_size=None):
+        """
+        Clarify obscured text read from a file-like object as the clarified text is consumed - see Steno.clarify_iter
+
+        :param str key: Key returned from obscure process
+        :param reader: File-like object opened in text mode to read obscured text from
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {success, clarified_chunks, errors}
+        :rtype: dict
+        """
+        status = {}
+        if not key:
+            self.add_error(["ApiImpl.clarify_iter no key specified"], status=status)
+        if reader is None:
+            self.add_error(["ApiImpl.clarify_iter no reader specified"], status=status)
+        if status:
+            return status
+
+        results = self.steno.clarify_iter(key=key, reader=reader, chunk_size=chunk_size)
+        if 'errors' in results:
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def obscure_file(self, in_path=None, out_path=None, expiration_secs=None):
+        """
+        Obscure a UTF8 text file, writing the obscured text to another UTF8 file.
+        The input is memory mapped and never decoded in one piece.
+
+        :param in_path: Path of the file to read clear text from
+        :param out_path: Path of the file to write obscured text to
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :return: {key, expiration_secs, errors}
+        :rtype: dict
+        """
+        status = {}
+        if not in_path:
+            self.add_error(["ApiImpl.obscure_file no input path specified"], status=status)
+        if not out_path:
+            self.add_error(["ApiImpl.obscure_file no output path specified"], status=status)
+        if status:
+            return status
+
+        if not expiration_secs:
+            expiration_secs = self.default_store_expiration_secs
+
+        results = self.steno.obscure_file(in_path=in_path, out_path=out_path, expiration_secs=expiration_secs)
+        if 'errors' in results:
+            self.add_error(results['errors'], status=status)
+            del results['errors']
+
+        status.update(results)
+        return status
+
+    def clarify_file(self, key=None, in_path=None, out_path=None):
+        """
+        Clarify a UTF8 file of obscured text, writing the clarified text to another UTF8 file
+
+        :param str key: Key returned from obscure process
+        :param in_path: Path of the file to read obscured text from
+        :param out_path: Path of the file to write clarified text to
+        :return: {success, errors}
+        :rtype: dict
+        """
+        status = {}
+        if not key:
+            self.add_error(["ApiImpl.clarify_file no key specified"], status=status)
+        if not in_path:
+            self.add_error(["ApiImpl.clarify_file no input path specified"], status=status)
+        if not out_path:
+            self.add_error(["ApiImpl.clarify_file no output path specified"], status=status)
+        if status:
+            return status
+
+        results = self.steno.clarify_file(key=key, in_path=in_path, out_path=out_path)
         if 'errors' in results:
             self.add_error(results['errors'], status=status)
             del results['errors']
@@ -0,0 +1,162 @@
+import asyncio
+import functools
+
+import standard_logger
+
+from prolix import api_impl
+from prolix import datasets
+from prolix import index
+from prolix import steno
+from prolix import store
+
+
+class AsyncApiImpl:
+    """AsyncApiImpl implements the public-facing API methods for use from asyncio code"""
+
+    def __init__(self, **kwargs):
+        """
+        :param logger: (optional) Logger instance
+        :param str engine: (optional) Steno engine - see steno.create_steno
+        :param str store_backend: (optional) 'redis' or 'memory' - see store.create_async_store
+        :param store: (optional) store.AsyncRedisStore or store.AsyncMemoryStore instance
+        :param executor: (optional) concurrent.futures.Executor for padding generation.
+            Defaults to the event loop's default executor
+        """
+        self.logger = kwargs['logger'] if 'logger' in kwargs else standard_logger.get_logger('prolix_api')
+        self.conf_data = datasets.get_conf_data(logger=self.logger)
+        self.default_store_expiration_secs = self.conf_data['default_store_expiration_secs']
+        self.engine = kwargs['engine'] if 'engine' in kwargs else self.conf_data.get('steno_engine', 'python')
+        self.store_backend = kwargs['store_backend'] if 'store_backend' in kwargs else None
+        self.steno = steno.create_steno(engine=self.engine, store_backend=self.store_backend, logger=self.logger)
+        self.store = kwargs['store'] if 'store' in kwargs \
+            else store.create_async_store(backend=self.store_backend, logger=self.logger)
+        self.executor = kwargs['executor'] if 'executor' in kwargs else None
+
+    add_error = api_impl.ApiImpl.add_error
+
+    def obscure_and_build_index(self, text, expiration_secs):
+        """
+        Obscure text and serialize its index, chunked if it is large - see Steno.build_index_items.
+        CPU bound - runs in the executor
+
+        :param str text: Text to obscure
+        :param int expiration_secs: How long the index should be kept
+        :return: (obscured text, key, [(store key, serialized data), ...]) - the manifest or whole index first
+        :rtype: tuple(str, str, list(tuple(str, bytes)))
+        """
+        obscured_text, interpolation_counts = self.steno.obscure_text(text)
+        key, items = self.steno.build_index_items(interpolation_counts, expiration_secs, obscured_text=obscured_text)
+        return obscured_text, key, items
+
+    async def store_chunks(self, chunk_items, expiration_secs):
+        """
+        Save the steno_seq chunks of a chunked index in this store, index_chunk_batch chunks per
+        pipelined store operation - see Steno.store_chunks
+
+        :param list(tuple(str, bytes)) chunk_items: (chunk key, data) pairs - see IndexEntry.to_items
+        :param int expiration_secs: How long the chunks should be kept
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        batch_size = self.steno.index_chunk_batch
+        result = {'success': True, 'expiration_secs': expiration_secs}
+        for pos in range(0, len(chunk_items), batch_size):
+            result = await self.store.store_many_with_expiration(
+                items=chunk_items[pos:pos + batch_size], exp_seconds=expiration_secs, transaction=False)
+            if not result['success']:
+                break
+
+        return result
+
+    async def load_index(self, idx_data):
+        """
+        Deserialize an Index instance in the executor. The chunks of a chunked index are fetched from
+        this store, the one the manifest was read from - see Steno.load_index
+
+        :param bytes idx_data: Serialized Index instance, or its manifest
+        :return: {success, index, errors}
+        :rtype: dict
+        """
+        loop = asyncio.get_running_loop()
+        idx = await loop.run_in_executor(
+            self.executor, functools.partial(index.IndexEntry.from_bytes, idx_data, logger=self.logger))
+
+        for first_chunk, chunk_keys in self.steno.chunk_batches(idx):
+            store_results = await self.store.get_many(keys=chunk_keys, decode=False)
+            errors = []
+            for result in store_results:
+                if not result['success']:
+                    errors.extend(result['errors'])
+            if errors:
+                return {'success': False, 'errors': errors}
+            await loop.run_in_executor(
+                self.executor, idx.add_chunks, first_chunk, [result['item'] for result in store_results])
+
+        return {'success': True, 'index': idx}
+
+    async def obscure(self, text=None, expiration_secs=None):
+        """
+        Obscure text
+
+        :param str text: Text to obscured
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :return: {key, expiration_secs, obscured text, errors}
+        :rtype: dict
+        """
+        status = {}
+        if not text:
+            self.add_error(["AsyncApiImpl.obscure no text specified"], status=status)
+            return status
+
+        if not expiration_secs:
+            expiration_secs = self.default_store_expiration_secs
+
+        loop = asyncio.get_running_loop()
+        obscured_text, key, items = await loop.run_in_executor(
+            self.executor, self.obscure_and_build_index, text, expiration_secs)
+
+        # The manifest is written last, so it is never visible without its chunks
+        result = await self.store_chunks(items[1:], expiration_secs)
+        if result['success']:
+            result = await self.store.store_with_expiration(key=key, item=items[0][1], exp_seconds=expiration_secs)
+        if result['success']:
+            status['success'] = True
+            status['key'] = key
+            status['expiration_seconds'] = result['expiration_secs']
+            status['obscured_text'] = obscured_text
+        else:
+            status['success'] = False
+            self.add_error(result['errors'], status=status)
+
+        return status
+
+    async def clarify(self, key=None, text=None):
+        """
+        Clarify text previously obscured
+
+        :param str key: Key returned from obscure process
+        :param str text: Text returned from  obscure process
+        :return: {clarified text, error}
+        :rtype: dict
+        """
+        status = {}
+        if not key:
+            self.add_error(["AsyncApiImpl.clarify no key specified"], status=status)
+        if not text:
+            self.add_error(["AsyncApiImpl.clarify no obscured text specified"], status=status)
+        if status:
+            return status
+
+        result = await self.store.get(key=key, decode=False)
+        if result['success']:
+            result = await self.load_index(result['item'])
+        if result['success']:
+            loop = asyncio.get_running_loop()
+            status['success'] = True
+            status['clarified_text'] = await loop.run_in_executor(
+                self.executor, self.steno.clarify_entry, result['index'], text)
+        else:
+            status['success'] = False
+            self.add_error(result['errors'], status=status)
+
+        return status
@@ -1,17 +1,116 @@
-
+import argparse
 import os
 import sys
 
 from flask import cli as flask_cli
 
+from prolix import datasets
 
-def main(as_module=False):
+
+COMMANDS = ['run', 'serve']
+
+
+def run(args):
+    """
+    Run the demo server with the Flask development server
+    """
     # Cheat
     os.environ['FLASK_APP'] = "prolix.server.prolix_server.py"
     sys.argv = ['flask', 'run']
     flask_cli.main()
 
-if __name__ == "__main__":
-    main(as_module=True)
 
+def gunicorn_options(args, conf_data):
+    """
+    Get gunicorn settings from the command line, falling back to prolix_conf.json
+
+    :param argparse.Namespace args: Parsed command line
+    :param dict conf_data: Configuration
+    :return: gunicorn settings
+    :rtype: dict
+    """
+    def option(name):
+        value = getattr(args, name)
+        return value if value is not None else conf_data.get('server_' + name)
+
+    workers = option('workers')
+    return {
+        'bind': option('bind') or '127.0.0.1:8000',
+        'workers': workers if workers else 2 * (os.cpu_count() or 1) + 1,
+        'threads': option('threads') or 1,
+        # The sync worker, gunicorn's default with one thread, ignores keepalive
+        'worker_class': 'gthread',
+        'keepalive': option('keepalive') or 5,
+        'timeout': option('timeout') or 30,
+        'graceful_timeout': option('graceful_timeout') or 30,
+        # Load the app, and warm up, in the master so workers share the data copy-on-write
+        'preload_app': True,
+        'worker_exit': worker_exit,
+    }
+
+
+def worker_exit(server, worker):
+    """
+    gunicorn hook - stop any process pool used by parallel obscure/clarify when a worker exits
+    """
+    from prolix import parallel
+    parallel.shutdown()
+
+
+def serve(args):
+    """
+    Run the demo server with gunicorn
+    """
+    try:
+        from gunicorn.app import base as gunicorn_base
+    except ImportError:
+        print("prolix serve requires gunicorn: pip3 install prolix[server]", file=sys.stderr)
+        sys.exit(1)
 
+    class ProlixApplication(gunicorn_base.BaseApplication):
+        """gunicorn application that warms up prolix before loading the Flask app"""
+
+        def __init__(self, options):
+            self.options = options
+            super(ProlixApplication, self).__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import prolix
+            # Frequency tables, word list and Redis connection pool. Each worker's random
+            # source refills its own buffer after the fork
+            prolix.warmup()
+            from prolix.server import prolix_server
+            return prolix_server.app
+
+    conf_data = datasets.get_conf_data()
+    ProlixApplication(gunicorn_options(args, conf_data)).run()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='prolix', description="Prolix demo server")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('run', help="Run with the Flask development server (default)")
+    serve_parser = subparsers.add_parser('serve', help="Run with gunicorn. Settings default to server_* in prolix_conf.json")
+    serve_parser.add_argument('--bind', help="Address to listen on, e.g. 127.0.0.1:8000")
+    serve_parser.add_argument('--workers', type=int, help="Worker processes - default 2 * CPUs + 1")
+    serve_parser.add_argument('--threads', type=int, help="Threads per worker")
+    serve_parser.add_argument('--keepalive', type=int, help="Seconds to keep idle connections open")
+    serve_parser.add_argument('--timeout', type=int, help="Seconds before a silent worker is restarted")
+    serve_parser.add_argument('--graceful-timeout', type=int, dest='graceful_timeout',
+                              help="Seconds workers have to finish requests on shutdown")
+    return parser.parse_args(argv)
+
+
+def main(as_module=False):
+    args = parse_args(sys.argv[1:])
+    if args.command == 'serve':
+        serve(args)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main(as_module=True)
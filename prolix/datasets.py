@@ -0,0 +1,65 @@
+import threading
+
+from json_config import JsonConfig
+
+# Immutable data shared by every instance in the process - loaded once, on first use
+DATASETS = {}
+DATASETS_LOCK = threading.Lock()
+
+CONF_DATASET = 'prolix_conf'
+
+
+def get_dataset(name, loader):
+    """
+    Get a cached data set, loading it on first use. Safe to call from multiple threads
+
+    :param str name: Data set name
+    :param loader: Callable that returns the data set. Called at most once per name
+    :return: The data set
+    """
+    dataset = DATASETS.get(name)
+    if dataset is None:
+        with DATASETS_LOCK:
+            dataset = DATASETS.get(name)
+            if dataset is None:
+                dataset = loader()
+                DATASETS[name] = dataset
+
+    return dataset
+
+
+def is_loaded(name):
+    """
+    Check whether a data set has been loaded
+
+    :param str name: Data set name
+    :return: True if loaded, False otherwise
+    :rtype: bool
+    """
+    return name in DATASETS
+
+
+def clear():
+    """
+    Discard all cached data sets so that they are reloaded on next use
+
+    :return: No value returned
+    """
+    with DATASETS_LOCK:
+        DATASETS.clear()
+
+
+def get_conf_data(logger=None):
+    """
+    Get the contents of prolix_conf.json
+
+    :param logger: Logger instance
+    :return: Configuration data. Must not be modified
+    :rtype: dict
+    """
+    def load_conf_data():
+        conf = JsonConfig.conf(logger=logger, package_name='prolix')
+        conf.config_name = 'prolix_conf.json'
+        return conf.get_data()
+
+    return get_dataset(CONF_DATASET, load_conf_data)
@@ -1,5 +1,9 @@
+import array
 import copy
 import json
+import struct
+import zlib
+
 import standard_logger
 
 
@@ -8,6 +12,15 @@ class IndexEntry:
 
     DEFAULT_TTL_MINS = 5
 
+    # V2 binary layout: MAGIC_V2, header length (4 bytes big-endian), JSON header,
+    # then steno_seq as one byte per count, zlib compressed if the header says so
+    MAGIC_V2 = b"PLX2"
+    HEADER_LENGTH_FORMAT = ">I"
+    COMPRESSION_ZLIB = "zlib"
+
+    # Clear text characters between checkpoints - see add_checkpoints
+    DEFAULT_CHECKPOINT_INTERVAL = 64 * 1024
+
     def __init__(self, logger=None):
         self.logger = logger if logger else standard_logger.get_logger("Index")
         self.object_type = "IndexType"
@@ -15,6 +28,17 @@ class IndexEntry:
         self.storage_key = ""
         self.steno_seq = []
         self.ttl_seconds = 60 * IndexEntry.DEFAULT_TTL_MINS
+        # Optional checkpoint table: obscured text offset of every checkpoint_interval'th character
+        self.checkpoint_interval = None
+        self.checkpoints = []
+        # Optional UTF8 byte offset of each checkpoint in the obscured text
+        self.byte_checkpoints = []
+        # True if the obscured text is all ASCII, so character and UTF8 byte offsets are the same
+        self.ascii_only = False
+        # Set when steno_seq is stored in chunks under separate keys - see to_items
+        self.chunk_size = None
+        self.chunk_compression = None
+        self.steno_seq_length = None
 
     def remove_from_dict(self, dict_to_clean, keys_to_remove):
         """
@@ -39,9 +63,205 @@ class IndexEntry:
         :rtype: str
         """
         dict_to_serialize = self.remove_from_dict(self.__dict__, ['logger'])
+        if isinstance(self.steno_seq, array.array):
+            dict_to_serialize['steno_seq'] = self.steno_seq.tolist()
         # print("to_json_str dict_to_serialize {0}".format(dict_to_serialize))
         return json.dumps(dict_to_serialize)
 
+    def to_bytes(self, compress=True):
+        """
+        Convert this object to the compact V2 binary format.
+        Every steno_seq value must fit in a byte.
+
+        :param bool compress: Whether to zlib compress steno_seq
+        :return: V2 encoded bytes
+        :rtype: bytes
+        """
+        steno_seq = self.steno_seq if isinstance(self.steno_seq, array.array) \
+            and self.steno_seq.typecode == 'B' else array.array('B', self.steno_seq)
+        steno_seq_bytes = steno_seq.tobytes()
+
+        header = self.remove_from_dict(self.__dict__, ['logger', 'steno_seq'])
+        header['object_type_version'] = "V2"
+        header['compression'] = IndexEntry.COMPRESSION_ZLIB if compress else None
+        if compress:
+            steno_seq_bytes = zlib.compress(steno_seq_bytes)
+
+        header_bytes = json.dumps(header).encode('UTF8')
+        return (IndexEntry.MAGIC_V2
+                + struct.pack(IndexEntry.HEADER_LENGTH_FORMAT, len(header_bytes))
+                + header_bytes
+                + steno_seq_bytes)
+
+    @staticmethod
+    def chunk_key(storage_key, chunk):
+        """
+        Get the store key of a steno_seq chunk
+
+        :param str storage_key: Storage key of the Index instance
+        :param int chunk: Chunk number
+        :return: Store key
+        :rtype: str
+        """
+        return "{0}:{1}".format(storage_key, chunk)
+
+    def to_items(self, chunk_size, compress=True):
+        """
+        Split this object into a V2 manifest, which has everything but steno_seq,
+        and steno_seq chunks of chunk_size counts each
+
+        :param int chunk_size: Counts per chunk
+        :param bool compress: Whether to zlib compress each chunk
+        :return: (key, data) to store for the manifest, then for each chunk in order
+        :rtype: list(tuple(str, bytes))
+        """
+        steno_seq = self.steno_seq if isinstance(self.steno_seq, array.array) \
+            and self.steno_seq.typecode == 'B' else array.array('B', self.steno_seq)
+
+        chunks = []
+        for pos in range(0, len(steno_seq), chunk_size):
+            chunk_bytes = steno_seq[pos:pos + chunk_size].tobytes()
+            chunks.append(zlib.compress(chunk_bytes) if compress else chunk_bytes)
+
+        manifest = copy.copy(self)
+        manifest.steno_seq = array.array('B')
+        manifest.chunk_size = chunk_size
+        manifest.chunk_compression = IndexEntry.COMPRESSION_ZLIB if compress else None
+        manifest.steno_seq_length = len(steno_seq)
+
+        items = [(self.storage_key, manifest.to_bytes(compress=False))]
+        for chunk, chunk_bytes in enumerate(chunks):
+            items.append((IndexEntry.chunk_key(self.storage_key, chunk), chunk_bytes))
+        return items
+
+    def text_length(self):
+        """
+        Get the number of clear text characters, whether or not steno_seq chunks have been added
+
+        :return: Number of clear text characters
+        :rtype: int
+        """
+        return self.steno_seq_length if self.chunk_size else len(self.steno_seq)
+
+    def chunk_range(self, start=0, end=None):
+        """
+        Get the steno_seq chunks that cover part of the clear text
+
+        :param int start: Position of the first clear text character
+        :param int end: (optional) Position after the last clear text character - default end of text
+        :return: Chunk numbers
+        :rtype: range
+        """
+        end = self.steno_seq_length if end is None else min(end, self.steno_seq_length)
+        return range(start // self.chunk_size, -(-end // self.chunk_size))
+
+    def add_chunks(self, first_chunk, chunks_data):
+        """
+        Add steno_seq chunks fetched from the store. Counts in chunks not yet added are 0
+
+        :param int first_chunk: Chunk number of the first chunk
+        :param list(bytes) chunks_data: Consecutive chunks as produced by to_items
+        :return: No return. steno_seq is updated in place
+        """
+        if len(self.steno_seq) != self.steno_seq_length:
+            self.steno_seq = array.array('B', bytes(self.steno_seq_length))
+
+        for chunk, chunk_bytes in enumerate(chunks_data, first_chunk):
+            if self.chunk_compression == IndexEntry.COMPRESSION_ZLIB:
+                chunk_bytes = zlib.decompress(chunk_bytes)
+            elif self.chunk_compression:
+                raise ValueError("IndexEntry.add_chunks unknown compression {0}".format(self.chunk_compression))
+            pos = chunk * self.chunk_size
+            self.steno_seq[pos:pos + len(chunk_bytes)] = array.array('B', chunk_bytes)
+
+    def add_checkpoints(self, interval=None):
+        """
+        Build the checkpoint table from steno_seq.
+        checkpoints[i] is the offset in the obscured text of clear text character i * interval
+
+        :param int interval: (optional) Clear text characters between checkpoints
+        :return: No return. Checkpoints are updated in place
+        """
+        interval = interval if interval else IndexEntry.DEFAULT_CHECKPOINT_INTERVAL
+        checkpoints = []
+        obscured_pos = 0
+        for char_pos in range(0, len(self.steno_seq), interval):
+            checkpoints.append(obscured_pos)
+            # Each character is followed by its padding
+            obscured_pos += interval + sum(self.steno_seq[char_pos:char_pos + interval])
+
+        self.checkpoint_interval = interval
+        self.checkpoints = checkpoints
+
+    def add_byte_checkpoints(self, obscured_text):
+        """
+        Build the UTF8 byte offset of each checkpoint from the obscured text, so that
+        an encoded copy of the obscured text can be read from a checkpoint
+
+        :param str obscured_text: Obscured text the checkpoints refer to
+        :return: No return. Byte checkpoints are updated in place
+        """
+        byte_checkpoints = []
+        byte_pos = 0
+        prev_checkpoint = 0
+        for checkpoint in self.checkpoints:
+            byte_pos += len(obscured_text[prev_checkpoint:checkpoint].encode('UTF8', 'surrogatepass'))
+            byte_checkpoints.append(byte_pos)
+            prev_checkpoint = checkpoint
+
+        self.byte_checkpoints = byte_checkpoints
+
+    def checkpoint_for(self, char_pos):
+        """
+        Get the nearest checkpoint at or before a clear text character
+
+        :param int char_pos: Clear text character position
+        :return: (clear text position, obscured text offset) of the checkpoint
+        :rtype: tuple(int, int)
+        """
+        if not self.checkpoints:
+            return (0, 0)
+        checkpoint = min(char_pos // self.checkpoint_interval, len(self.checkpoints) - 1)
+        return (checkpoint * self.checkpoint_interval, self.checkpoints[checkpoint])
+
+    def byte_checkpoint_for(self, char_pos):
+        """
+        Get the nearest checkpoint with a byte offset at or before a clear text character
+
+        :param int char_pos: Clear text character position
+        :return: (clear text position, obscured text offset, obscured UTF8 byte offset) of the checkpoint
+        :rtype: tuple(int, int, int)
+        """
+        if not self.byte_checkpoints:
+            return (0, 0, 0)
+        checkpoint = min(char_pos // self.checkpoint_interval, len(self.byte_checkpoints) - 1)
+        return (checkpoint * self.checkpoint_interval, self.checkpoints[checkpoint], self.byte_checkpoints[checkpoint])
+
+    def checkpoint_ranges(self, num_ranges):
+        """
+        Split the text into contiguous ranges that start and end on checkpoints
+
+        :param int num_ranges: Maximum number of ranges
+        :return: ((clear text start, end), (obscured text start, end)) per range, in order.
+            The last range ends at None, i.e. the end of the text
+        :rtype: list(tuple(tuple(int, int), tuple(int, int)))
+        """
+        if not self.checkpoints:
+            return [((0, None), (0, None))]
+
+        num_checkpoints = len(self.checkpoints)
+        checkpoints_per_range = -(-num_checkpoints // num_ranges)
+        ranges = []
+        for first in range(0, num_checkpoints, checkpoints_per_range):
+            last = first + checkpoints_per_range
+            if last < num_checkpoints:
+                ranges.append(((first * self.checkpoint_interval, last * self.checkpoint_interval),
+                               (self.checkpoints[first], self.checkpoints[last])))
+            else:
+                ranges.append(((first * self.checkpoint_interval, None), (self.checkpoints[first], None)))
+
+        return ranges
+
     def __eq__(self, other):
         clean_self = self.remove_from_dict(self.__dict__, ['logger'])
         clean_other = self.remove_from_dict(other.__dict__, ['logger'])
@@ -63,13 +283,47 @@ class IndexEntry:
     @classmethod
     def from_json_str(cls, json_str, logger=None):
         """
-        Create an IndexEntry instance from the supplied JSON string
+        Create an IndexEntry instance from the supplied JSON string. V2 bytes are accepted too
 
         :param str json_str: JSON string containing IndexEntry data fields
         :param logger: Logger instance
         :return: An initialized IndexEntry instance
         :rtype: IndexEntry
         """
+        if isinstance(json_str, (bytes, bytearray, memoryview)):
+            return cls.from_bytes(json_str, logger=logger)
+
+        index_entry = IndexEntry(logger=logger)
+        index_entry.__dict__.update(json.loads(json_str))
+        return index_entry
+
+    @classmethod
+    def from_bytes(cls, data, logger=None):
+        """
+        Create an IndexEntry instance from V2 bytes or a UTF8 encoded V1 JSON string
+
+        :param bytes data: Data previously produced by to_bytes or to_json_str
+        :param logger: Logger instance
+        :return: An initialized IndexEntry instance
+        :rtype: IndexEntry
+        """
+        data = bytes(data)
+        if not data.startswith(IndexEntry.MAGIC_V2):
+            return cls.from_json_str(data.decode("UTF8"), logger=logger)
+
+        header_start = len(IndexEntry.MAGIC_V2) + struct.calcsize(IndexEntry.HEADER_LENGTH_FORMAT)
+        (header_length,) = struct.unpack(IndexEntry.HEADER_LENGTH_FORMAT,
+                                         data[len(IndexEntry.MAGIC_V2):header_start])
+        header = json.loads(data[header_start:header_start + header_length].decode("UTF8"))
+
+        steno_seq_bytes = data[header_start + header_length:]
+        compression = header.pop('compression', None)
+        if compression == IndexEntry.COMPRESSION_ZLIB:
+            steno_seq_bytes = zlib.decompress(steno_seq_bytes)
+        elif compression:
+            raise ValueError("IndexEntry.from_bytes unknown compression {0}".format(compression))
+
         index_entry = IndexEntry(logger=logger)
-        index_entry.__dict__ = json.loads(json_str)
+        index_entry.__dict__.update(header)
+        index_entry.steno_seq = array.array('B', steno_seq_bytes)
         return index_entry
@@ -0,0 +1,275 @@
+import bisect
+import socket
+import threading
+import time
+
+
+# Histogram bucket upper bounds for timers, in seconds, and for sizes
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+SINKS = ['memory', 'statsd', 'prometheus']
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket, plus one for values above the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MemorySink:
+    """Sink that keeps counters and histograms in memory"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+        self.histograms = {}
+
+    def incr(self, name, value):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timing(self, name, seconds):
+        with self.lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram(TIME_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe(self, name, value):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(SIZE_BUCKETS)
+            histogram.observe(value)
+
+    def snapshot(self):
+        """
+        Get the current values
+
+        :return: {counters: {name: value}, timings: {name: {count, sum}}, histograms: {name: {count, sum}}}
+        :rtype: dict
+        """
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': {name: {'count': h.count, 'sum': h.sum} for name, h in self.timings.items()},
+                'histograms': {name: {'count': h.count, 'sum': h.sum} for name, h in self.histograms.items()},
+            }
+
+
+class PrometheusSink(MemorySink):
+    """In-memory sink that renders the Prometheus text exposition format"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, prefix='prolix'):
+        super(PrometheusSink, self).__init__()
+        self.prefix = prefix
+
+    def metric_name(self, name):
+        return "{0}_{1}".format(self.prefix, name).replace('.', '_')
+
+    def render_histogram(self, lines, metric_name, histogram):
+        lines.append("# TYPE {0} histogram".format(metric_name))
+        cumulative_count = 0
+        for bucket, count in zip(histogram.buckets, histogram.counts):
+            cumulative_count += count
+            lines.append('{0}_bucket{{le="{1}"}} {2}'.format(metric_name, bucket, cumulative_count))
+        lines.append('{0}_bucket{{le="+Inf"}} {1}'.format(metric_name, histogram.count))
+        lines.append("{0}_sum {1}".format(metric_name, histogram.sum))
+        lines.append("{0}_count {1}".format(metric_name, histogram.count))
+
+    def render(self):
+        """
+        Render all metrics
+
+        :return: Metrics in the Prometheus text format
+        :rtype: str
+        """
+        lines = []
+        with self.lock:
+            for name in sorted(self.counters):
+                metric_name = self.metric_name(name) + "_total"
+                lines.append("# TYPE {0} counter".format(metric_name))
+                lines.append("{0} {1}".format(metric_name, self.counters[name]))
+            for name in sorted(self.timings):
+                self.render_histogram(lines, self.metric_name(name) + "_seconds", self.timings[name])
+            for name in sorted(self.histograms):
+                self.render_histogram(lines, self.metric_name(name), self.histograms[name])
+        return "\n".join(lines) + "\n"
+
+
+class StatsdSink:
+    """Sink that sends each value to a statsd server over UDP. Send errors are ignored"""
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='prolix'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def send(self, name, value, metric_type):
+        try:
+            self.socket.sendto("{0}.{1}:{2}|{3}".format(self.prefix, name, value, metric_type).encode('UTF8'),
+                               self.address)
+        except OSError:
+            pass
+
+    def incr(self, name, value):
+        self.send(name, value, 'c')
+
+    def timing(self, name, seconds):
+        self.send(name, round(seconds * 1000, 3), 'ms')
+
+    def observe(self, name, value):
+        self.send(name, value, 'h')
+
+
+class Timer:
+    """Context manager that reports the time spent in its block to a sink"""
+
+    def __init__(self, sink, name):
+        self.sink = sink
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.sink.timing(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class NullTimer:
+    """Timer that does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Metrics:
+    """Records timers, counters and histograms to a sink"""
+
+    enabled = True
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def timer(self, name):
+        """
+        Time a block
+
+        :param str name: Metric name
+        :return: Context manager
+        :rtype: Timer
+        """
+        return Timer(self.sink, name)
+
+    def incr(self, name, value=1):
+        """
+        Add to a counter
+
+        :param str name: Metric name
+        :param int value: Amount to add
+        """
+        self.sink.incr(name, value)
+
+    def observe(self, name, value):
+        """
+        Add a value to a histogram
+
+        :param str name: Metric name
+        :param value: Value to add
+        """
+        self.sink.observe(name, value)
+
+
+class NullMetrics:
+    """Metrics that records nothing - used when metrics are disabled"""
+
+    enabled = False
+    sink = None
+
+    def timer(self, name):
+        return NULL_TIMER
+
+    def incr(self, name, value=1):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+# Metrics used by the instrumented code. Read at each use, so configure takes effect immediately
+METRICS = NULL_METRICS
+
+
+def create_sink(name, conf_data=None):
+    """
+    Create a sink
+
+    :param str name: 'memory', 'statsd' or 'prometheus'
+    :param dict conf_data: (optional) Configuration - metrics_prefix, metrics_statsd_host, metrics_statsd_port
+    :return: Sink instance
+    """
+    conf_data = conf_data if conf_data else {}
+    prefix = conf_data.get('metrics_prefix') or 'prolix'
+    if name == 'memory':
+        return MemorySink()
+    elif name == 'statsd':
+        return StatsdSink(host=conf_data.get('metrics_statsd_host') or '127.0.0.1',
+                          port=conf_data.get('metrics_statsd_port') or 8125,
+                          prefix=prefix)
+    elif name == 'prometheus':
+        return PrometheusSink(prefix=prefix)
+    else:
+        raise ValueError("Unknown metrics sink {0}. Must be one of {1}".format(name, SINKS))
+
+
+def configure(sink=None):
+    """
+    Enable metrics with a sink, or disable them
+
+    :param sink: Sink instance, or None to disable metrics
+    :return: Metrics in use
+    :rtype: Metrics
+    """
+    global METRICS
+    METRICS = Metrics(sink) if sink is not None else NULL_METRICS
+    return METRICS
+
+
+def configure_from_conf(conf_data):
+    """
+    Enable metrics with the sink named by "metrics_sink" in the configuration,
+    unless metrics are already enabled
+
+    :param dict conf_data: Configuration
+    :return: Metrics in use
+    :rtype: Metrics
+    """
+    if not METRICS.enabled and conf_data.get('metrics_sink'):
+        configure(create_sink(conf_data['metrics_sink'], conf_data))
+    return METRICS
@@ -0,0 +1,172 @@
+import array
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+
+import standard_logger
+
+from prolix import steno
+
+
+# Process pools by number of workers. Pools are expensive to start so they are shared and reused
+EXECUTORS = {}
+EXECUTORS_LOCK = threading.Lock()
+
+# Steno instance of each worker process, by engine
+WORKER_STENOS = {}
+
+
+def get_mp_context():
+    """
+    Get the multiprocessing context for process pools. Pools may be started from a threaded server,
+    and a forked worker would inherit any lock another thread holds, e.g. rand.SECURE_SOURCE.lock.
+    forkserver workers are forked from a single threaded server process instead
+
+    :return: multiprocessing context
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+
+def get_executor(max_workers=None):
+    """
+    Get the shared process pool for a number of workers, creating it if needed
+
+    :param int max_workers: (optional) Number of worker processes - default os.cpu_count()
+    :return: Process pool
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    max_workers = max_workers if max_workers else (os.cpu_count() or 1)
+    with EXECUTORS_LOCK:
+        executor = EXECUTORS.get(max_workers)
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=get_mp_context())
+            EXECUTORS[max_workers] = executor
+    return executor
+
+
+def shutdown():
+    """
+    Shut down all shared process pools
+    """
+    with EXECUTORS_LOCK:
+        for executor in EXECUTORS.values():
+            executor.shutdown(wait=True)
+        EXECUTORS.clear()
+
+
+def worker_steno(engine):
+    """
+    Get the Steno instance of the current worker process, creating it if needed
+
+    Workers only generate padding, so they use the memory store rather than opening Redis connections.
+
+    :param str engine: Steno engine - see steno.create_steno
+    :return: Steno instance
+    :rtype: steno.Steno
+    """
+    stn = WORKER_STENOS.get(engine)
+    if stn is None:
+        logger = standard_logger.get_logger('prolix_worker')
+        stn = steno.create_steno(engine=engine, store_backend='memory', logger=logger)
+        WORKER_STENOS[engine] = stn
+    return stn
+
+
+def obscure_chunk(engine, text, ord_range):
+    """
+    Obscure one chunk of text. Runs in a worker process
+
+    Each worker draws padding from its own rand.SECURE_SOURCE, whose buffer is discarded after a fork.
+
+    :param str engine: Steno engine - see steno.create_steno
+    :param str text: Chunk of text to obscure
+    :param tuple(int, int) ord_range: (min ord, max ord) of the whole text
+    :return: (obscured text, interpolation counts)
+    :rtype: tuple(str, array.array)
+    """
+    obscured_text, interpolation_counts = worker_steno(engine).obscure_text(text, ord_range=ord_range)
+    # One byte per character - cheaper to send back to the parent than a list
+    return obscured_text, array.array('B', interpolation_counts)
+
+
+def split_text(text, num_chunks):
+    """
+    Split text into contiguous chunks of roughly equal length
+
+    :param str text: Text to split
+    :param int num_chunks: Number of chunks
+    :return: Chunks, in order
+    :rtype: list(str)
+    """
+    chunk_size = -(-len(text) // num_chunks)
+    return [text[pos:pos + chunk_size] for pos in range(0, len(text), chunk_size)]
+
+
+def obscure_text(stn, text, max_workers=None):
+    """
+    Interpolate random padding into text, one chunk per worker process
+
+    The result has the same format as stn.obscure_text(text).
+
+    :param steno.Steno stn: Steno instance - workers use the same engine
+    :param str text: Text to obscure
+    :param int max_workers: (optional) Number of worker processes - default os.cpu_count()
+    :return: (obscured text, interpolation counts)
+    :rtype: tuple(str, array.array)
+    """
+    max_workers = max_workers if max_workers else (os.cpu_count() or 1)
+    executor = get_executor(max_workers)
+    # Padding must be drawn from the range of the whole text, not of each chunk
+    ord_range = stn.get_ord_range(text)
+    chunks = split_text(text, max_workers)
+    futures = [executor.submit(obscure_chunk, stn.ENGINE, chunk, ord_range) for chunk in chunks]
+
+    obscured_fragments = []
+    interpolation_counts = array.array('B')
+    for future in futures:
+        obscured_text, chunk_interpolation_counts = future.result()
+        obscured_fragments.append(obscured_text)
+        interpolation_counts.extend(chunk_interpolation_counts)
+
+    return "".join(obscured_fragments), interpolation_counts
+
+
+def clarify_chunk(engine, interpolation_counts, text):
+    """
+    Clarify one range of obscured text. Runs in a worker process
+
+    :param str engine: Steno engine - see steno.create_steno
+    :param array.array interpolation_counts: Interpolation counts of the range
+    :param str text: Obscured text of the range
+    :return: Clarified text
+    :rtype: str
+    """
+    return worker_steno(engine).clarify_text(interpolation_counts, text)
+
+
+def clarify_text(stn, idx, text, max_workers=None):
+    """
+    Recover the original text from obscured text, one range of checkpoints per worker process
+
+    The result is the same as stn.clarify_text(idx.steno_seq, text).
+
+    :param steno.Steno stn: Steno instance - workers use the same engine
+    :param index.IndexEntry idx: Index instance with checkpoints - see IndexEntry.add_checkpoints
+    :param str text: Obscured text
+    :param int max_workers: (optional) Number of worker processes - default os.cpu_count()
+    :return: Clarified text
+    :rtype: str
+    """
+    max_workers = max_workers if max_workers else (os.cpu_count() or 1)
+    executor = get_executor(max_workers)
+    steno_seq = idx.steno_seq if isinstance(idx.steno_seq, array.array) else array.array('B', idx.steno_seq)
+
+    futures = []
+    for (char_start, char_end), (obscured_start, obscured_end) in idx.checkpoint_ranges(max_workers):
+        futures.append(executor.submit(clarify_chunk, stn.ENGINE, steno_seq[char_start:char_end],
+                                       text[obscured_start:obscured_end]))
+
+    return "".join([future.result() for future in futures])
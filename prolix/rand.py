@@ -1,7 +1,10 @@
 import sys
 import os
 from os import path
-import random
+import bisect
+import functools
+import secrets
+import threading
 from collections import deque
 import json
 
@@ -10,6 +13,130 @@ import words
 
 from pyxutils import paths
 
+from prolix import datasets
+
+
+class SecureRandomSource:
+    """
+    Buffered source of cryptographically secure random integers
+
+    Random bytes are pulled from os.urandom in large blocks and turned into unbiased
+    bounded integers in bulk by rejection sampling, so one system call serves many draws.
+    """
+
+    DEFAULT_BLOCK_SIZE = 64 * 1024
+    # memoryview formats by sample width in bytes
+    WIDTH_FORMATS = [(1, 'B'), (2, 'H'), (4, 'I'), (8, 'Q')]
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size if block_size else SecureRandomSource.DEFAULT_BLOCK_SIZE
+        self.lock = threading.Lock()
+        self.buffer = b""
+        self.buffer_pos = 0
+        self.pid = os.getpid()
+
+    def random_bytes(self, num_bytes):
+        """
+        Get secure random bytes from the buffer, refilling it from os.urandom as needed
+
+        :param int num_bytes: Number of bytes
+        :return: Random bytes
+        :rtype: bytes
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                # Never hand the same buffered bytes to a forked child and its parent
+                self.buffer = b""
+                self.buffer_pos = 0
+                self.pid = os.getpid()
+
+            available = len(self.buffer) - self.buffer_pos
+            if num_bytes > available:
+                self.buffer = self.buffer[self.buffer_pos:] + os.urandom(max(self.block_size, num_bytes - available))
+                self.buffer_pos = 0
+
+            data = self.buffer[self.buffer_pos:self.buffer_pos + num_bytes]
+            self.buffer_pos += num_bytes
+            return data
+
+    def randbelow_many(self, bound, count):
+        """
+        Get a list of random ints in the range [0, bound)
+
+        :param int bound: Exclusive upper bound
+        :param int count: Number of ints
+        :return: List of random ints
+        :rtype: [int]
+        """
+        if bound <= 0:
+            raise ValueError("SecureRandomSource.randbelow_many bound must be positive")
+        if bound == 1:
+            return [0] * count
+
+        width_format = None
+        for width, fmt in SecureRandomSource.WIDTH_FORMATS:
+            if 256 ** width >= bound:
+                width_format = (width, fmt)
+                break
+
+        if not width_format:
+            return [secrets.randbelow(bound) for i in range(0, count)]
+
+        width, fmt = width_format
+        span = 256 ** width
+        # Sample values at or above limit are rejected so that 'value % bound' is unbiased
+        limit = (span // bound) * bound
+
+        results = []
+        while len(results) < count:
+            needed = count - len(results)
+            # Over-draw by the expected rejection rate so that one pass is usually enough
+            num_samples = needed + (needed * (span - limit)) // limit + 8
+            samples = memoryview(self.random_bytes(num_samples * width)).cast(fmt)
+            accepted = [sample % bound for sample in samples if sample < limit]
+            results.extend(accepted[0:needed])
+
+        return results
+
+    def randbelow(self, bound):
+        """
+        Get a random int in the range [0, bound)
+
+        :param int bound: Exclusive upper bound
+        :return: random int
+        :rtype: int
+        """
+        return self.randbelow_many(bound, 1)[0]
+
+    def randints(self, count, lower, upper):
+        """
+        Get a list of random ints in the range [lower, upper]
+
+        :param int count: Number of ints
+        :param int lower: Range lower bound
+        :param int upper: Range upper bound
+        :return: List of random ints
+        :rtype: [int]
+        """
+        if lower > upper:
+            raise ValueError("SecureRandomSource.randints empty range ({0}, {1})".format(lower, upper))
+        return [lower + offset for offset in self.randbelow_many(upper - lower + 1, count)]
+
+    def randint(self, lower, upper):
+        """
+        Get a random int in the range [lower, upper]. Same contract as random.randint
+
+        :param int lower: Range lower bound
+        :param int upper: Range upper bound
+        :return: random int
+        :rtype: int
+        """
+        return self.randints(1, lower, upper)[0]
+
+
+# Process-wide buffered CSPRNG shared by all the random generators below
+SECURE_SOURCE = SecureRandomSource()
+
 
 class CodePointRanges:
     """Legal code point ranges according to Unicode spec"""
@@ -68,13 +195,98 @@ class CodePointRanges:
         return False
 
 
+class CodePointTable:
+    """
+    The legal code points within a range, numbered consecutively.
+
+    Prefix sums over the legal sub-ranges let a uniform random int be mapped straight to a
+    legal code point by bisection, with no rejection of illegal draws.
+    """
+
+    def __init__(self, lower, upper):
+        """
+        :param int lower: Lowest code point
+        :param int upper: Highest code point
+        """
+        self.lower = lower
+        self.upper = upper
+        # First code point of each legal sub-range, and the number of legal code points before it
+        self.range_starts = []
+        self.prefix_counts = []
+        self.size = 0
+        for lower_limit, upper_limit in CodePointRanges.ALL_RANGES:
+            lower_limit = max(lower_limit, lower)
+            upper_limit = min(upper_limit, upper)
+            if lower_limit <= upper_limit:
+                self.range_starts.append(lower_limit)
+                self.prefix_counts.append(self.size)
+                self.size += upper_limit - lower_limit + 1
+
+    def code_point_for(self, rand_int):
+        """
+        Map a uniform random int to a legal code point
+
+        :param int rand_int: Random int in the range [0, size)
+        :return: Code point
+        :rtype: int
+        """
+        range_pos = bisect.bisect_right(self.prefix_counts, rand_int) - 1
+        return self.range_starts[range_pos] + rand_int - self.prefix_counts[range_pos]
+
+    def random_code_points(self, count, source=None):
+        """
+        Get legal code points from a single buffered batch of random ints
+
+        :param int count: Number of code points
+        :param SecureRandomSource source: (optional) Random source. Defaults to SECURE_SOURCE
+        :return: List of code points
+        :rtype: [int]
+        """
+        source = source if source else SECURE_SOURCE
+        rand_ints = source.randbelow_many(self.size, count)
+        if len(self.range_starts) == 1:
+            range_start = self.range_starts[0]
+            return [range_start + rand_int for rand_int in rand_ints]
+
+        prefix_counts = self.prefix_counts
+        range_starts = self.range_starts
+        bisect_right = bisect.bisect_right
+        return [range_starts[range_pos] + rand_int - prefix_counts[range_pos]
+                for rand_int in rand_ints
+                for range_pos in (bisect_right(prefix_counts, rand_int) - 1,)]
+
+    def random_string(self, count, source=None):
+        """
+        Get a string of random legal characters
+
+        :param int count: Number of characters
+        :param SecureRandomSource source: (optional) Random source. Defaults to SECURE_SOURCE
+        :return: Random string
+        :rtype: str
+        """
+        return "".join(map(chr, self.random_code_points(count, source=source)))
+
+
+@functools.lru_cache(maxsize=256)
+def code_point_table(lower, upper):
+    """
+    Get the (cached) table of legal code points in [lower, upper]
+
+    :param int lower: Lowest code point
+    :param int upper: Highest code point
+    :return: Code point table
+    :rtype: CodePointTable
+    """
+    return CodePointTable(lower, upper)
+
+
 class RandomString:
     """Utility class for generating various random string values"""
 
     MIN_UTF8_CHAR_VALUE = 32
     # Limit to BMP + SMP - so max is '0x1FFFF'
     MAX_UTF8_CHAR_VALUE: int = 131071
-    SECURE_RNG = random.SystemRandom()
+    SECURE_RNG = SECURE_SOURCE
 
     def __init__(self, logger=None):
         self.logger = logger if logger else standard_logger.get_logger("RandomString")
@@ -83,7 +295,7 @@ class RandomString:
         """
         Get a secure RNG
         :return: Secure RNG instance
-        :rtype: random.SystemRandom
+        :rtype: SecureRandomSource
         """
         return RandomString.SECURE_RNG
 
@@ -97,27 +309,29 @@ class RandomString:
         :rtype: str
         """
         try:
-            lower = max(lower, self.MIN_UTF8_CHAR_VALUE) if lower else self.MIN_UTF8_CHAR_VALUE
-            upper = min(upper, self.MAX_UTF8_CHAR_VALUE) if upper else self.MAX_UTF8_CHAR_VALUE
-            while True:
-                while True:
-                    rand_int = self.secure_rng().randint(lower, upper)
-                    if CodePointRanges.legal_code_point(rand_int):
-                        break
-
-                try:
-                    rand_char = chr(rand_int)
-                    rand_char.encode('UTF8')
-                    break
-                except UnicodeEncodeError:
-                    self.logger.debug("random_utf8_char invalid code point {0} {1}".format(rand_int,hex(rand_int).upper()))
-                    pass
-
-            return rand_char
-
+            table = self.code_point_table(lower=lower, upper=upper)
+            return chr(table.code_point_for(self.secure_rng().randbelow(table.size)))
         except ValueError:
             return None
 
+    @classmethod
+    def code_point_table(cls, lower=None, upper=None):
+        """
+        Get the table of legal code points for random UTF8 characters between the specified limits
+
+        :param int lower: (optional) lower limit for UTF8 character
+        :param int upper: (optional) upper limit for UTF8 character
+        :return: Code point table
+        :rtype: CodePointTable
+        :raises ValueError: if there are no legal code points between the limits
+        """
+        lower = max(lower, cls.MIN_UTF8_CHAR_VALUE) if lower else cls.MIN_UTF8_CHAR_VALUE
+        upper = min(upper, cls.MAX_UTF8_CHAR_VALUE) if upper else cls.MAX_UTF8_CHAR_VALUE
+        table = code_point_table(lower, upper)
+        if not table.size:
+            raise ValueError("No legal code points between {0} and {1}".format(lower, upper))
+        return table
+
     def random_ascii_char(self):
         """
         Get a random ASCII char
@@ -136,13 +350,12 @@ class RandomString:
         :return: Random UTF8 string
         :rtype: str
         """
-        rs = ""
-        for i in range(1, len + 1):
-            rc = self.random_utf8_char(lower=lower, upper=upper)
-            if rc:
-                rs = rs + rc
+        try:
+            table = self.code_point_table(lower=lower, upper=upper)
+        except ValueError:
+            return ""
 
-        return rs
+        return table.random_string(len, source=self.secure_rng())
 
     def random_ascii_string(self, len=10):
         """
@@ -184,7 +397,7 @@ class RandomInts:
 
     MAX_INT = sys.maxsize - 1
     MIN_INT = - MAX_INT
-    SECURE_RNG = random.SystemRandom()
+    SECURE_RNG = SECURE_SOURCE
 
     def __init__(self, logger=None):
         self.logger = logger if logger else standard_logger.get_logger("RandomInts")
@@ -193,7 +406,7 @@ class RandomInts:
         """
         Get a secure RNG
         :return: Secure RNG instance
-        :rtype: random.SystemRandom
+        :rtype: SecureRandomSource
         """
         return RandomInts.SECURE_RNG
 
@@ -223,20 +436,24 @@ class RandomInts:
         :return: Array of random ints
         :rtype: [int]
         """
-        rints = []
-        for i in range(1, len + 1):
-            rint = self.random_int(lower=lower, upper=upper)
-            if rint:
-                rints.append(rint)
+        try:
+            lower = max(lower, RandomInts.MIN_INT) if lower else RandomInts.MIN_INT
+            upper = min(upper, RandomInts.MAX_INT) if upper else RandomInts.MAX_INT
+            rints = self.secure_rng().randints(len, lower, upper)
+        except Exception:
+            return []
 
-        return rints
+        return [rint for rint in rints if rint]
 
 
 class RandValues:
 
+    WORDS_DATASET = '5000words'
+
     def __init__(self,logger=None):
         self.logger = logger if logger else standard_logger.get_logger("RandValues")
-        self.word_dict = words.load_data(dataset='5000words', logger=self.logger)
+        self.word_dict = datasets.get_dataset(
+            RandValues.WORDS_DATASET, lambda: words.load_data(dataset=RandValues.WORDS_DATASET, logger=self.logger))
         self.word_count = len(self.word_dict)
         self.rng = RandomInts(self.logger)
 
@@ -266,6 +483,98 @@ class RandValues:
         return password
 
 
+class AliasSampler:
+    """
+    Walker/Vose alias table for weighted sampling in O(1) per draw.
+
+    Weights are scaled to integers and the table is built with integer arithmetic, so each item
+    is drawn with exactly its (scaled) weight. A single uniform int in [0, num_outcomes) picks
+    both the table column and the biased coin.
+    """
+
+    DEFAULT_WEIGHT_SCALE = 10 ** 6
+
+    def __init__(self, items, weights, weight_scale=None):
+        """
+        :param list items: Items to sample
+        :param list(float) weights: Relative weight of each item
+        :param int weight_scale: (optional) Weights are rounded to multiples of 1/weight_scale
+        """
+        weight_scale = weight_scale if weight_scale else AliasSampler.DEFAULT_WEIGHT_SCALE
+        int_weights = [int(round(weight * weight_scale)) for weight in weights]
+        if not items or len(items) != len(weights) or min(int_weights) < 0 or sum(int_weights) <= 0:
+            raise ValueError("AliasSampler needs one non-negative weight per item and a positive total")
+
+        num_items = len(items)
+        total_weight = sum(int_weights)
+
+        self.items = list(items)
+        self.weights = int_weights
+        self.column_size = total_weight
+        self.num_outcomes = num_items * total_weight
+        # Draws in column i below prob[i] give item i, the rest give alias[i]
+        self.prob = [total_weight] * num_items
+        self.alias = list(range(0, num_items))
+
+        scaled_weights = [weight * num_items for weight in int_weights]
+        small = [i for i in range(0, num_items) if scaled_weights[i] < total_weight]
+        large = [i for i in range(0, num_items) if scaled_weights[i] >= total_weight]
+        while small and large:
+            small_item = small.pop()
+            large_item = large.pop()
+            self.prob[small_item] = scaled_weights[small_item]
+            self.alias[small_item] = large_item
+            scaled_weights[large_item] -= total_weight - scaled_weights[small_item]
+            if scaled_weights[large_item] < total_weight:
+                small.append(large_item)
+            else:
+                large.append(large_item)
+
+        # Flattened form of the table for sample(): column i gives item i for draws below thresholds[i]
+        self.thresholds = [i * total_weight + self.prob[i] for i in range(0, num_items)]
+        self.alias_items = [self.items[self.alias[i]] for i in range(0, num_items)]
+
+    def item_for(self, rand_int):
+        """
+        Map a uniform random int to an item
+
+        :param int rand_int: Random int in the range [0, num_outcomes)
+        :return: Item
+        """
+        column, coin = divmod(rand_int, self.column_size)
+        return self.items[column] if coin < self.prob[column] else self.items[self.alias[column]]
+
+    def sample(self, count, source=None):
+        """
+        Draw items from a single buffered batch of random ints
+
+        :param int count: Number of items
+        :param SecureRandomSource source: (optional) Random source. Defaults to SECURE_SOURCE
+        :return: List of items
+        :rtype: list
+        """
+        source = source if source else SECURE_SOURCE
+        items = self.items
+        alias_items = self.alias_items
+        thresholds = self.thresholds
+        column_size = self.column_size
+        return [items[column] if rand_int < thresholds[column] else alias_items[column]
+                for rand_int in source.randbelow_many(self.num_outcomes, count)
+                for column in (rand_int // column_size,)]
+
+    @classmethod
+    def from_frequency_data(cls, frequency_data):
+        """
+        Create a sampler from letter frequency data as held in frequencies-1.json
+
+        :param dict frequency_data: Frequency data with a 'by_frequency' list of [letter, frequency]
+        :return: Sampler of letters
+        :rtype: AliasSampler
+        """
+        letters_by_frequency = frequency_data["by_frequency"]
+        return cls([item[0] for item in letters_by_frequency], [float(item[1]) for item in letters_by_frequency])
+
+
 class RandomAsciiStringByFrequency:
     """Transform text using letter frequency data"""
 
@@ -279,7 +588,6 @@ class RandomAsciiStringByFrequency:
         # Should be from config file
         self.frequency_file_name = 'frequencies-1.json'
         self.minimum_input_text_length = 4
-        self.letter_randomizer_file_name = "letter_randomizer_ascii.json"
         self.min_padding_size = 8
         self.max_padding_size = 64
 
@@ -292,10 +600,8 @@ class RandomAsciiStringByFrequency:
         self.input_data_length = None
         self.frequency_data = None
         self.letters_by_frequency = None
-        self.normalized_frequency_data = None
-        self.lookup_letter_data = None
-        self.lookup_letter_data_len = None
-        self.secure_rng = random.SystemRandom()
+        self.letter_sampler = None
+        self.secure_rng = SECURE_SOURCE
 
     def dispatch(self):
 
@@ -303,17 +609,11 @@ class RandomAsciiStringByFrequency:
         if not result['success']:
             return {"success": False, "error": result['error']}
 
-        if not self.lookup_data_present():
-
-            result = self.load_letter_frequencies()
-            if not result['success']:
-                return {"success": False, "error": result['error']}
-
-            result = self.generate_lookup_data()
-            if not result['success']:
-                return {"success": False, "error": result['error']}
+        result = self.load_letter_frequencies()
+        if not result['success']:
+            return {"success": False, "error": result['error']}
 
-        result = self.load_lookup_data()
+        result = self.load_letter_sampler()
         if not result['success']:
             return {"success": False, "error": result['error']}
 
@@ -341,9 +641,12 @@ class RandomAsciiStringByFrequency:
             return {"success": True}
 
     def load_letter_frequencies(self):
-        file_path = paths.get_data_path(file_name=self.frequency_file_name, package_name='prolix')
-        with open(file_path, 'r') as f:
-            self.frequency_data = json.loads(f.read().strip())
+        def load_frequency_data():
+            file_path = paths.get_data_path(file_name=self.frequency_file_name, package_name='prolix')
+            with open(file_path, 'r') as f:
+                return json.loads(f.read().strip())
+
+        self.frequency_data = datasets.get_dataset(self.frequency_file_name, load_frequency_data)
 
         self.letters_by_frequency = self.frequency_data["by_frequency"]
         return {"success": True}
@@ -367,61 +670,16 @@ class RandomAsciiStringByFrequency:
 
         return {"success": True}
 
-    def lookup_data_present(self):
-        file_path = paths.get_data_path(file_name=self.letter_randomizer_file_name, package_name='prolix')
-        return path.exists(file_path)
-
-    def load_lookup_data(self):
-        file_path = paths.get_data_path(file_name=self.letter_randomizer_file_name, package_name='prolix')
-        with open(file_path, 'r') as f:
-            json_str = f.read()
-        json_data = json.loads(json_str)
-        self.lookup_letter_data = json_data['data']
-        self.lookup_letter_data_len = len(self.lookup_letter_data)
+    def load_letter_sampler(self):
+        self.letter_sampler = datasets.get_dataset(
+            "alias:" + self.frequency_file_name, lambda: AliasSampler.from_frequency_data(self.frequency_data))
         return {'success': True}
 
-    def generate_lookup_data(self):
-        # Generate modified frequency table
-        normalized_frequency_data = []
-        total_normalized_frequencies = 0
-        for item in self.frequency_data["by_frequency"]:
-            letter = item[0]
-            original_frequency = item[1]
-            normalized_frequency = round(float(original_frequency),3) * 1000
-            if normalized_frequency < 1:
-                normalized_frequency = 1
-            normalized_frequency = int(normalized_frequency)
-            total_normalized_frequencies += normalized_frequency
-            normalized_frequency_data.append([letter,normalized_frequency])
-
-        self.normalized_frequency_data = normalized_frequency_data
-
-        letter_strings = deque()
-        for item in normalized_frequency_data:
-            letter = item[0]
-            frequency = item[1]
-            letter_string = letter * frequency
-            letter_strings.append(letter_string)
-
-        self.lookup_letter_data = "".join(letter_strings)
-        lookup_letter_data_json = {
-            'data': self.lookup_letter_data
-        }
-        with open(self.letter_randomizer_file_name,'w') as f:
-            f.write(json.dumps(lookup_letter_data_json))
-
-        return {"success": True}
-
     def random_char_by_freq(self):
-        rand_offset = self.secure_rng.randint(0, self.lookup_letter_data_len - 1)
-        return self.lookup_letter_data[rand_offset]
+        return self.letter_sampler.item_for(self.secure_rng.randbelow(self.letter_sampler.num_outcomes))
 
     def random_ascii_string_by_freq(self, len=20):
-        random_string_q = deque()
-        for i in range(0,len):
-            random_string_q.append(self.random_char_by_freq())
-        random_string = "".join(random_string_q)
-        return random_string
+        return "".join(self.letter_sampler.sample(len, source=self.secure_rng))
 
     def obscure(self):
         obscured_text_q = deque()
@@ -0,0 +1,226 @@
+import codecs
+import gzip
+import json
+import threading
+
+from flask import Blueprint, Response, request, stream_with_context
+
+import prolix
+from prolix import datasets
+
+
+blueprint = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+# One ApiImpl for the life of the process, shared by all requests
+API = None
+API_LOCK = threading.Lock()
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+def get_api():
+    """
+    Get the ApiImpl shared by all requests, creating it if needed
+
+    :return: ApiImpl instance
+    :rtype: api_impl.ApiImpl
+    """
+    global API
+    if API is None:
+        with API_LOCK:
+            if API is None:
+                API = prolix.api()
+    return API
+
+
+def json_response(data, status=200):
+    # Obscured text is mostly non-ASCII - escaping it would double its size
+    return Response(json.dumps(data, ensure_ascii=False), status=status, mimetype='application/json')
+
+
+def error_response(error_text, status=400):
+    return json_response({'success': False, 'errors': [error_text]}, status=status)
+
+
+def result_response(results):
+    results.setdefault('success', False)
+    return json_response(results, status=200 if results['success'] else 400)
+
+
+def request_reader():
+    """
+    Get a text reader over the raw UTF8 request body, so it can be read a chunk at a time
+    instead of being loaded whole
+
+    :return: File-like object opened in text mode
+    """
+    # Not io.TextIOWrapper - WSGI servers' input streams need only provide read()
+    return codecs.getreader('UTF8')(request.stream)
+
+
+def stream_response(chunks, headers=None):
+    return Response(stream_with_context(chunks), mimetype='text/plain', headers=headers)
+
+
+def valid_expiration_secs(expiration_secs):
+    """
+    Check an expiration given in a JSON body before it reaches the store
+
+    :param expiration_secs: Value of expiration_secs, None if it was left out
+    :return: True if left out or a positive integer
+    :rtype: bool
+    """
+    if expiration_secs is None:
+        return True
+    # bool is a subclass of int, but true is not an expiration
+    return isinstance(expiration_secs, int) and not isinstance(expiration_secs, bool) and expiration_secs > 0
+
+
+def request_json():
+    """
+    Get the JSON body of the request
+
+    :return: Parsed JSON body, or None if missing or invalid
+    """
+    return request.get_json(force=True, silent=True)
+
+
+@blueprint.after_request
+def compress_response(response):
+    """
+    gzip JSON responses when the client accepts it
+    """
+    if 'gzip' not in request.headers.get('Accept-Encoding', '').lower() \
+            or response.direct_passthrough \
+            or response.is_streamed \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    data = response.get_data()
+    if len(data) < GZIP_MIN_BYTES:
+        return response
+
+    level = datasets.get_conf_data().get('server_gzip_level', 6)
+    response.set_data(gzip.compress(data, compresslevel=level))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+@blueprint.route("/obscure", methods=['POST'])
+def obscure():
+    """
+    Obscure text
+
+    Body: {"text": str, "expiration_secs": int (optional)}
+    Returns: {success, key, expiration_seconds, obscured_text, errors}
+    """
+    body = request_json()
+    if not isinstance(body, dict) or not isinstance(body.get('text'), str):
+        return error_response("Body must be a JSON object with a text string")
+    if not valid_expiration_secs(body.get('expiration_secs')):
+        return error_response("expiration_secs must be a positive integer")
+
+    return result_response(get_api().obscure(text=body['text'], expiration_secs=body.get('expiration_secs')))
+
+
+@blueprint.route("/clarify", methods=['POST'])
+def clarify():
+    """
+    Clarify text previously obscured
+
+    Body: {"key": str, "text": str, "delete_key": bool (optional)}
+    Returns: {success, clarified_text, errors}
+    """
+    body = request_json()
+    if not isinstance(body, dict) or not isinstance(body.get('key'), str) or not isinstance(body.get('text'), str):
+        return error_response("Body must be a JSON object with key and text strings")
+
+    return result_response(get_api().clarify(key=body['key'], text=body['text'],
+                                             delete_key=bool(body.get('delete_key'))))
+
+
+@blueprint.route("/obscure/batch", methods=['POST'])
+def obscure_batch():
+    """
+    Obscure several texts. Index entries are written to the store in one batch
+
+    Body: [str, ...] or {"texts": [str, ...], "expiration_secs": int (optional)}
+    Returns: [{success, key, expiration_seconds, obscured_text, errors}, ...] in order
+    """
+    body = request_json()
+    expiration_secs = None
+    if isinstance(body, dict):
+        expiration_secs = body.get('expiration_secs')
+        body = body.get('texts')
+    if not isinstance(body, list) or not all(isinstance(text, str) for text in body):
+        return error_response("Body must be a JSON array of text strings")
+    if not valid_expiration_secs(expiration_secs):
+        return error_response("expiration_secs must be a positive integer")
+
+    all_results = get_api().obscure_many(texts=body, expiration_secs=expiration_secs)
+    for results in all_results:
+        results.setdefault('success', False)
+    return json_response(all_results)
+
+
+@blueprint.route("/clarify/batch", methods=['POST'])
+def clarify_batch():
+    """
+    Clarify several texts. Index entries are read from the store in one batch
+
+    Body: [{"key": str, "text": str}, ...]
+    Returns: [{success, clarified_text, errors}, ...] in order
+    """
+    body = request_json()
+    if not isinstance(body, list) or not all(isinstance(item, dict) and isinstance(item.get('key'), str)
+                                             and isinstance(item.get('text'), str) for item in body):
+        return error_response("Body must be a JSON array of objects with key and text strings")
+
+    all_results = get_api().clarify_many(pairs=[(item.get('key'), item.get('text')) for item in body])
+    for results in all_results:
+        results.setdefault('success', False)
+    return json_response(all_results)
+
+
+@blueprint.route("/obscure/stream", methods=['POST'])
+def obscure_stream():
+    """
+    Obscure text, streaming the obscured text back as it is generated
+
+    Body: UTF8 text
+    Query: expiration_secs=int (optional)
+    Returns: Obscured UTF8 text. The key is in the X-Prolix-Key header. It is only valid once the
+        whole response has been received - if the index cannot be stored the response is cut short.
+        {success, errors} with status 400 if the body is empty or does not start with valid UTF8
+    """
+    results = get_api().obscure_iter(reader=request_reader(),
+                                     expiration_secs=request.args.get('expiration_secs', type=int))
+    if not results.get('success'):
+        return result_response(results)
+
+    return stream_response(results['obscured_chunks'], headers={
+        'X-Prolix-Key': results['key'],
+        'X-Prolix-Expiration-Seconds': str(results['expiration_seconds']),
+    })
+
+
+@blueprint.route("/clarify/stream", methods=['POST'])
+def clarify_stream():
+    """
+    Clarify text previously obscured, streaming the clarified text back as it is generated
+
+    Body: Obscured UTF8 text
+    Query: key=str, or the X-Prolix-Key header
+    Returns: Clarified UTF8 text, or {success, errors} if the key is missing or expired
+    """
+    key = request.headers.get('X-Prolix-Key', request.args.get('key'))
+    if not key:
+        return error_response("Key must be given in the X-Prolix-Key header or the key parameter")
+
+    results = get_api().clarify_iter(key=key, reader=request_reader())
+    if not results.get('success'):
+        return result_response(results)
+
+    return stream_response(results['clarified_chunks'])
@@ -1,20 +1,24 @@
 import sys
-import os
 from os import path
 
-import tempfile
-
 import standard_logger
 LOGGER = standard_logger.get_logger('prolix_server', level_str='ERROR', console=True)
 
 from pyxutils import paths as pxpaths
 TEMPLATES_DIR = path.normpath(path.join(pxpaths.get_package_path('prolix'),'server','templates'))
 
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request
 
 app=Flask("prolix_server", template_folder=TEMPLATES_DIR)
 
-import prolix
+from prolix import metrics
+from prolix.server import api_v1
+from prolix.server import session_cache
+
+app.register_blueprint(api_v1.blueprint)
+
+# Clear and obscured text between the obscure and clarify requests
+SESSIONS = session_cache.SessionCache(logger=LOGGER)
 
 
 @app.route("/", methods=['GET'])
@@ -29,26 +33,25 @@ def display_form():
 def obscure_data():
     if request.method == 'POST':
         clear_text = request.form['clearText']
-        clear_text_file = tempfile.NamedTemporaryFile(delete=False)
-        with open(clear_text_file.name,'w') as f:
-            f.write(clear_text)
-        papi = prolix.api(logger=LOGGER)
+        # Not streamed - the page shows the whole text and the session keeps it for clarify.
+        # Large texts should use /api/v1/obscure/stream
+        papi = api_v1.get_api()
         results = papi.obscure(text=clear_text,expiration_secs=60)
         if results['success']:
             key = results['key']
             obscured_text = results['obscured_text']
-            obscured_text_file = tempfile.NamedTemporaryFile(delete=False)
-            with open(obscured_text_file.name, 'w') as f:
-                f.write(obscured_text)
+            session = SESSIONS.create({'clear_text': clear_text, 'obscured_text': obscured_text, 'key': key})
+            if not session['success']:
+                LOGGER.error("Server error session error {0}".format(session['errors']))
+                return "Error in server. Session error {0}".format(session['errors'])
             return render_template('main_form.html',
                                    clear_text=clear_text,
                                    obscured_text=obscured_text,
                                    key=key,
-                                   clear_text_file_name=clear_text_file.name,
-                                   obscured_text_file_name=obscured_text_file.name
+                                   session_token=session['token']
                                   )
         else:
-            LOGGER.error("Server error API Error {0)".format(results['errors']))
+            LOGGER.error("Server error API Error {0}".format(results['errors']))
             return "Error in server"
     else:
         return "Error in server"
@@ -58,29 +61,16 @@ def obscure_data():
 def clarify_data():
     if request.method == 'POST':
         try:
-            original_clear_text_file_name = request.form['hiddenClearTextFileName']
-            if path.exists(original_clear_text_file_name):
-                with open(original_clear_text_file_name,'r') as f:
-                    original_clear_text = f.read()
-                os.remove(original_clear_text_file_name)
-            else:
-                msg = "original_clear_text_file_name {0} does not exist".format(original_clear_text_file_name)
-                LOGGER.error(msg)
-                return "Error in server " + msg
-
-            key = request.form['hiddenObscureKey']
-
-            obscured_text_file_name = request.form['hiddenObscureTextFileName']
-            if path.exists(obscured_text_file_name):
-                with open(obscured_text_file_name,'r') as f:
-                    obscured_text = f.read()
-                os.remove(obscured_text_file_name)
-            else:
-                msg = "obscured_text_file_name {0} does not exist".format(obscured_text_file_name)
-                LOGGER.error(msg)
-                return "Error in server " + msg
-
-            papi = prolix.api(logger=LOGGER)
+            session_token = request.form['hiddenSessionToken']
+            session = SESSIONS.get(session_token)
+            if not session['success']:
+                LOGGER.error("Server error session error {0}".format(session['errors']))
+                return "Error in server. Session error {0}".format(session['errors'])
+            original_clear_text = session['data']['clear_text']
+            obscured_text = session['data']['obscured_text']
+            key = session['data']['key']
+
+            papi = api_v1.get_api()
             results = papi.clarify(text=obscured_text,key=key)
             if results['success']:
                 clarified_text = results['clarified_text']
@@ -89,11 +79,10 @@ def clarify_data():
                                        obscured_text=obscured_text,
                                        key=key,
                                        clarified_text=clarified_text,
-                                       clear_text_file_name=original_clear_text_file_name,
-                                       obscured_text_file_name=obscured_text_file_name
+                                       session_token=session_token
                                       )
             else:
-                LOGGER.error("Server error API Error {0)".format(results['errors']))
+                LOGGER.error("Server error API Error {0}".format(results['errors']))
                 return "Error in server. API error {0}".format(results['errors'])
 
         except Exception as e:
@@ -102,3 +91,11 @@ def clarify_data():
 
     else:
         return "Unsupported method"
+
+
+@app.route("/metrics", methods=['GET'])
+def metrics_data():
+    sink = metrics.METRICS.sink
+    if not hasattr(sink, 'render'):
+        return Response("Prometheus metrics not enabled\n", status=404, mimetype='text/plain')
+    return Response(sink.render(), content_type=sink.CONTENT_TYPE)
@@ -0,0 +1,90 @@
+import json
+import secrets
+
+import standard_logger
+
+from prolix import datasets
+from prolix import store
+
+
+class SessionCache:
+    """
+    Server-side session data keyed by an opaque token, held in a store with expiry.
+    Memory use is bounded by max_entries * max_bytes with the memory backend,
+    and by max_bytes per session with Redis.
+    """
+
+    KEY_PREFIX = "prolix_session:"
+
+    def __init__(self, backend=None, max_entries=None, max_bytes=None, expiration_secs=None, logger=None):
+        """
+        :param str backend: (optional) 'redis' or 'memory'. Defaults to server_session_backend,
+            then store_backend in prolix_conf.json
+        :param int max_entries: (optional) Maximum number of sessions held by the memory backend
+        :param int max_bytes: (optional) Maximum size of the data of one session
+        :param int expiration_secs: (optional) How long sessions are kept
+        :param logger: Logger instance
+        """
+        self.logger = logger if logger else standard_logger.get_logger("SessionCache")
+        self.conf_data = datasets.get_conf_data(logger=self.logger)
+        backend = backend if backend else self.conf_data.get('server_session_backend')
+        backend = backend if backend else self.conf_data.get('store_backend', 'redis')
+        self.max_entries = max_entries if max_entries else self.conf_data.get('server_session_max_entries', 1000)
+        self.max_bytes = max_bytes if max_bytes else self.conf_data.get('server_session_max_bytes', 1048576)
+        self.expiration_secs = expiration_secs if expiration_secs \
+            else self.conf_data.get('server_session_expiration_secs', 300)
+        if backend == 'memory':
+            # Not the shared memory store - sessions must not evict index entries
+            self.store = store.MemoryStore(max_entries=self.max_entries, logger=self.logger)
+        else:
+            self.store = store.create_store(backend=backend, logger=self.logger)
+
+    def create(self, data):
+        """
+        Save session data under a new token
+
+        :param dict data: Session data. Must be JSON serializable
+        :return: {success, token, errors}
+        :rtype: dict
+        """
+        item = json.dumps(data).encode('UTF8')
+        if len(item) > self.max_bytes:
+            error_text = "SessionCache:create session of {0} bytes is larger than {1} bytes".format(
+                len(item), self.max_bytes)
+            self.logger.error(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        token = secrets.token_urlsafe(32)
+        result = self.store.store_with_expiration(key=SessionCache.KEY_PREFIX + token, item=item,
+                                                  exp_seconds=self.expiration_secs)
+        if not result['success']:
+            return {'success': False, 'errors': result['errors']}
+
+        return {'success': True, 'token': token}
+
+    def get(self, token):
+        """
+        Get session data
+
+        :param str token: Token returned by create
+        :return: {success, data, errors}
+        :rtype: dict
+        """
+        if not token:
+            return {'success': False, 'errors': ["SessionCache:get no token specified"]}
+
+        result = self.store.get(key=SessionCache.KEY_PREFIX + token, decode=False)
+        if not result['success']:
+            return {'success': False, 'errors': ["SessionCache:get session expired or does not exist"]}
+
+        return {'success': True, 'data': json.loads(result['item'].decode('UTF8'))}
+
+    def delete(self, token):
+        """
+        Delete session data
+
+        :param str token: Token returned by create
+        :return: {success, errors}
+        :rtype: dict
+        """
+        return self.store.delete(key=SessionCache.KEY_PREFIX + token)
@@ -1,23 +1,159 @@
+import array
+import codecs
+import contextlib
+import mmap
+import os
 import random
 import standard_logger
-from json_config import JsonConfig
+from prolix import datasets
 from prolix import index
+from prolix import metrics
 from prolix import rand
 from prolix import store
 
 from collections import deque
 
 
+ENGINES = ['python', 'numpy']
+
+# Bytes decoded at a time when reading obscured text from a file or buffer
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def create_steno(engine=None, store_backend=None, logger=None):
+    """
+    Create a Steno instance for the specified engine
+
+    :param str engine: (optional) 'python' (default) or 'numpy'
+    :param str store_backend: (optional) Store backend - see store.create_store
+    :param logger: Logger instance
+    :return: Steno instance
+    :rtype: Steno
+    """
+    engine = engine if engine else 'python'
+    if engine == 'python':
+        return Steno(store_backend=store_backend, logger=logger)
+    elif engine == 'numpy':
+        from prolix import steno_numpy
+        return steno_numpy.NumpySteno(store_backend=store_backend, logger=logger)
+    else:
+        raise ValueError("Unknown steno engine {0}. Must be one of {1}".format(engine, ENGINES))
+
+
+@contextlib.contextmanager
+def map_file(path):
+    """
+    Memory map a file for reading
+
+    :param path: Path of the file
+    :return: Context manager for the mapped file - empty bytes for an empty file, which cannot be mapped
+    :rtype: mmap.mmap
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                yield buf
+
+
+def iter_utf8_chunks(buf, chunk_size):
+    """
+    Generator that decodes UTF8 encoded text a block at a time
+
+    :param buf: Bytes-like object, e.g. mmap.mmap, holding UTF8 encoded text
+    :param int chunk_size: Number of characters in each chunk
+    :return: Chunks of chunk_size characters, in order. The last chunk may be shorter
+    :rtype: generator(str)
+    :raises UnicodeDecodeError: if the text is not valid UTF8
+    """
+    decoder = codecs.getincrementaldecoder('UTF8')()
+    buf_len = len(buf)
+    pending = ""
+    for byte_pos in range(0, buf_len, READ_BLOCK_SIZE):
+        pending += decoder.decode(buf[byte_pos:byte_pos + READ_BLOCK_SIZE],
+                                  final=(byte_pos + READ_BLOCK_SIZE >= buf_len))
+        while len(pending) >= chunk_size:
+            yield pending[0:chunk_size]
+            pending = pending[chunk_size:]
+
+    if pending:
+        yield pending
+
+
+def read_utf8_chars(buf, byte_pos, skip_chars, num_chars):
+    """
+    Decode characters from UTF8 encoded text a block at a time
+
+    :param buf: Bytes-like object, e.g. mmap.mmap, holding UTF8 encoded text
+    :param int byte_pos: Offset of the first byte to decode
+    :param int skip_chars: Number of characters to skip before the ones returned
+    :param int num_chars: Number of characters to return
+    :return: Decoded characters - fewer than num_chars if the text ends first
+    :rtype: str
+    """
+    decoder = codecs.getincrementaldecoder('UTF8')('surrogatepass')
+    chars = deque()
+    buf_len = len(buf)
+    while num_chars > 0 and byte_pos < buf_len:
+        block = buf[byte_pos:byte_pos + READ_BLOCK_SIZE]
+        byte_pos += len(block)
+        decoded = decoder.decode(block, final=(byte_pos >= buf_len))
+        if skip_chars:
+            skipped = min(skip_chars, len(decoded))
+            decoded = decoded[skipped:]
+            skip_chars -= skipped
+        decoded = decoded[0:num_chars]
+        num_chars -= len(decoded)
+        chars.append(decoded)
+
+    return "".join(chars)
+
+
+def read_text_chars(reader, num_chars):
+    """
+    Read characters from a file-like object opened in text mode, which may return fewer than asked for
+
+    :param reader: File-like object opened in text mode
+    :param int num_chars: Number of characters to read
+    :return: Characters read - fewer than num_chars if the text ends first
+    :rtype: str
+    """
+    chars = deque()
+    while num_chars > 0:
+        text = reader.read(num_chars)
+        if not text:
+            break
+        num_chars -= len(text)
+        chars.append(text)
+
+    return "".join(chars)
+
+
 class Steno:
     """Class that provides stenography support"""
 
-    def __init__(self, logger=None):
+    # Engine name - see create_steno
+    ENGINE = 'python'
+
+    # Characters of text read per chunk by the streaming variants
+    DEFAULT_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, store_backend=None, logger=None):
         self.logger = logger if logger else standard_logger.get_logger("Store")
-        self.conf = JsonConfig.conf(logger=self.logger, package_name='prolix')
-        self.conf.config_name = 'prolix_conf.json'
-        self.conf_data = self.conf.get_data()
+        self.conf_data = datasets.get_conf_data(logger=self.logger)
         self.default_expiration_seconds = self.conf_data['default_store_expiration_secs']
-        self.redis_store = store.RedisStore(logger=self.logger)
+        self.index_format = self.conf_data.get('index_format', 'V2')
+        self.index_compression = self.conf_data.get('index_compression', True)
+        self.checkpoint_interval = self.conf_data.get('index_checkpoint_interval',
+                                                      index.IndexEntry.DEFAULT_CHECKPOINT_INTERVAL)
+        # Larger V2 indexes are stored in chunks - see build_index_items and fetch_chunks
+        self.index_chunk_size = self.conf_data.get('index_chunk_size')
+        self.index_chunk_batch = self.conf_data.get('index_chunk_batch', 4)
+        # Parallel obscure and clarify - see obscure and clarify_index
+        self.parallel_workers = self.conf_data.get('parallel_workers')
+        self.parallel_min_chars = self.conf_data.get('parallel_min_chars', 1000000)
+        self.store = store.create_store(backend=store_backend, logger=self.logger)
         # Initialize RandomAsciiStringByFrequency because of file loads needed
         self.rasbf = rand.RandomAsciiStringByFrequency(logger=self.logger).dispatch()
 
@@ -69,93 +205,566 @@ class Steno:
 
         return padding_size, padding, current_char
 
-    def obscure(self, text=None, expiration_secs=None):
+    def obscure(self, text=None, expiration_secs=None, parallel=False):
         """
         Obscure text
 
+        With parallel set, texts of at least parallel_min_chars characters are split into chunks
+        that are obscured in a pool of parallel_workers processes - see prolix.parallel.
+
         :param str text: Text to obscured
         :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :param bool parallel: (optional) Obscure large texts across a process pool
         :return: {key, expiration_secs, obscured text, errors}
         :rtype: dict
         """
+        expiration_secs = expiration_secs if expiration_secs else self.default_expiration_seconds
+        stats = metrics.METRICS
+        stats.incr('steno.obscure.chars', len(text))
+        stats.observe('steno.obscure.text_chars', len(text))
+
+        with stats.timer('steno.obscure.padding'):
+            if parallel and len(text) >= self.parallel_min_chars:
+                from prolix import parallel as parallel_obscure
+                obscured_text, interpolation_counts = parallel_obscure.obscure_text(
+                    self, text, max_workers=self.parallel_workers)
+            else:
+                obscured_text, interpolation_counts = self.obscure_text(text)
+
+        with stats.timer('steno.obscure.store_index'):
+            result = self.store_index(interpolation_counts, expiration_secs, obscured_text=obscured_text)
+
+        results = {}
+        if result['success']:
+            results['success'] = True
+            results['key'] = result['key']
+            results['expiration_seconds'] = result['expiration_secs']
+            results['obscured_text'] = obscured_text
+        else:
+            results['success'] = False
+            results['errors'] = result['errors']
+
+        return results
+
+    def obscure_text(self, text, ord_range=None):
+        """
+        Interpolate random padding into text
+
+        :param str text: Text to obscure
+        :param tuple(int, int) ord_range: (optional) (min ord, max ord) for padding - default from text
+        :return: (obscured text, interpolation counts)
+        :rtype: tuple(str, list(int))
+        """
 
         # Initialize various things
-        idx = index.IndexEntry(logger=self.logger)
         rs = rand.RandomString(logger=self.logger)
         random_ints = rand.RandomInts(logger=self.logger)
-        expiration_secs = expiration_secs if expiration_secs else self.default_expiration_seconds
+        stats = metrics.METRICS
 
         # Generate limits for random characters
-        min_ord, max_ord = self.get_ord_range(text)
+        min_ord, max_ord = ord_range if ord_range else self.get_ord_range(text)
         # Generate list of interpolation counts
         text_len = len(text)
-        interpolation_counts = random_ints.random_ints(len=text_len, lower=8, upper=64)
+        with stats.timer('steno.obscure.rng_counts'):
+            interpolation_counts = random_ints.random_ints(len=text_len, lower=8, upper=64)
         #interpolation_counts = []
 
-        # Obscure the text
-        obscured_text_dq = deque()
+        # Deal with a couple of special characters, and total up the padding
+        # of each kind so that it can be generated in a single batch
+        special_paddings = []
+        freq_padding_len = 0
+        utf8_padding_len = 0
         for i in range(0, text_len):
-            # Get the current character
-            current_char = text[i]
+            special_padding = self.obscure_special_characters(text[i])
+            special_paddings.append(special_padding)
+            if special_padding[1]:
+                interpolation_counts[i] = special_padding[0]
+            elif rand.RandomString.is_alpha_char_ascii(text[i]):
+                freq_padding_len += interpolation_counts[i]
+            else:
+                utf8_padding_len += interpolation_counts[i]
 
-            # Get the number of random characters to add
-            interpolation_count = interpolation_counts[i]
+        with stats.timer('steno.obscure.rng_padding'):
+            # Frequency based padding for ASCII alpha chars
+            freq_padding = self.rasbf.random_ascii_string_by_freq(len=freq_padding_len)
+            # Random padding with characters in the correct range for everything else
+            utf8_padding = rs.random_utf8_string(len=utf8_padding_len, lower=min_ord, upper=max_ord)
+        stats.incr('steno.obscure.padding_chars', freq_padding_len + utf8_padding_len)
 
-            # Deal with a couple of special characters
-            padding_size, padding, replacement_char = \
-                self.obscure_special_characters(current_char)
+        # Obscure the text
+        with stats.timer('steno.obscure.assembly'):
+            obscured_text_dq = deque()
+            freq_padding_pos = 0
+            utf8_padding_pos = 0
+            for i in range(0, text_len):
+                # Get the current character
+                current_char = text[i]
 
-            if padding:
-                interpolation_counts[i] = padding_size
-                interpolation_chars = padding
-                current_char = replacement_char
-            elif rand.RandomString.is_alpha_char_ascii(current_char):
-                # If ASCII alpha char use frequency based string
-                interpolation_chars = \
-                    self.rasbf.random_ascii_string_by_freq(len=interpolation_count)
+                # Get the number of random characters to add
+                interpolation_count = interpolation_counts[i]
+
+                padding_size, padding, replacement_char = special_paddings[i]
+
+                if padding:
+                    interpolation_chars = padding
+                    current_char = replacement_char
+                elif rand.RandomString.is_alpha_char_ascii(current_char):
+                    interpolation_chars = freq_padding[freq_padding_pos:freq_padding_pos + interpolation_count]
+                    freq_padding_pos += interpolation_count
+                else:
+                    interpolation_chars = utf8_padding[utf8_padding_pos:utf8_padding_pos + interpolation_count]
+                    utf8_padding_pos += interpolation_count
+
+                # Save the current character, then the interpolated characters
+                obscured_text_dq.append(current_char)
+                obscured_text_dq.append(interpolation_chars)
+
+            obscured_text = "".join(obscured_text_dq)
+
+        return obscured_text, interpolation_counts
+
+    def obscure_many(self, texts=None, expiration_secs=None):
+        """
+        Obscure several texts, saving all of their index entries in one store operation.
+        The chunks of chunked indexes are written first - see store_chunks
+
+        :param list(str) texts: Texts to obscure
+        :param int expiration_secs: How long texts should be valid for - default 300 secs (5 mins)
+        :return: One {key, expiration_secs, obscured text, errors} dict per text, in order
+        :rtype: list(dict)
+        """
+        expiration_secs = expiration_secs if expiration_secs else self.default_expiration_seconds
+
+        keys = []
+        obscured_texts = []
+        items = []
+        chunk_items = []
+        for text in texts:
+            obscured_text, interpolation_counts = self.obscure_text(text)
+            key, idx_items = self.build_index_items(interpolation_counts, expiration_secs,
+                                                    obscured_text=obscured_text)
+            keys.append(key)
+            obscured_texts.append(obscured_text)
+            items.append(idx_items[0])
+            chunk_items.extend(idx_items[1:])
+
+        result = self.store_chunks(chunk_items, expiration_secs)
+        if result['success']:
+            result = self.store.store_many_with_expiration(items=items, exp_seconds=expiration_secs)
+
+        all_results = []
+        for key, obscured_text in zip(keys, obscured_texts):
+            results = {}
+            if result['success']:
+                results['success'] = True
+                results['key'] = key
+                results['expiration_seconds'] = result['expiration_secs']
+                results['obscured_text'] = obscured_text
             else:
-                # Get a random string of len(interpolation_count) with characters in the correct range
-                interpolation_chars = rs.random_utf8_string(len=interpolation_count, lower=min_ord, upper=max_ord)
+                results['success'] = False
+                results['errors'] = result['errors']
+            all_results.append(results)
 
-            # Save the current character, then the interpolated characters
-            obscured_text_dq.append(current_char)
-            obscured_text_dq.append(interpolation_chars)
+        return all_results
 
-            # # Get a random string of len(interpolation_count) with characters in the correct range
-            # interpolation_chars = self.obscure_chars(num=1)[0]
-            # interpolation_count = len(interpolation_chars)
-            # interpolation_counts.append(interpolation_count)
-            # # Save the current character, then the interpolated characters
-            # obscured_text_dq.append(current_char)
-            # obscured_text_dq.append(interpolation_chars)
+    def obscure_chunks(self, reader, interpolation_counts, chunk_size=None, byte_checkpoints=None, first_text=None):
+        """
+        Generator that obscures text read from a file-like object a chunk at a time
 
-        obscured_text = "".join(list(obscured_text_dq))
+        :param reader: File-like object opened in text mode
+        :param array.array interpolation_counts: Interpolation counts for each chunk are appended to this
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :param list(int) byte_checkpoints: (optional) UTF8 byte offset in the obscured text of every
+            checkpoint_interval'th character is appended to this - see IndexEntry.add_byte_checkpoints
+        :param str first_text: (optional) Text already read from reader, obscured before the rest
+        :return: Obscured text fragments, in order
+        :rtype: generator(str)
+        """
+        chunk_size = chunk_size if chunk_size else Steno.DEFAULT_CHUNK_SIZE
+        interval = self.checkpoint_interval
+        byte_pos = 0
+        text = first_text if first_text else reader.read(chunk_size)
+        while text:
+            obscured_text, chunk_interpolation_counts = self.obscure_text(text)
+            if byte_checkpoints is not None and interval:
+                # Checkpoints in this chunk, from the first character that is a multiple of interval
+                prev_pos = 0
+                prev_obscured_pos = 0
+                for pos in range(-len(interpolation_counts) % interval, len(chunk_interpolation_counts), interval):
+                    # Each character is followed by its padding
+                    obscured_pos = prev_obscured_pos + (pos - prev_pos) + sum(chunk_interpolation_counts[prev_pos:pos])
+                    byte_pos += len(obscured_text[prev_obscured_pos:obscured_pos].encode('UTF8', 'surrogatepass'))
+                    byte_checkpoints.append(byte_pos)
+                    prev_pos = pos
+                    prev_obscured_pos = obscured_pos
+                byte_pos += len(obscured_text[prev_obscured_pos:].encode('UTF8', 'surrogatepass'))
+            interpolation_counts.extend(chunk_interpolation_counts)
+            yield obscured_text
+            text = reader.read(chunk_size)
 
-        # Generate storage key and save Index instance
-        random_values = rand.RandValues(logger=self.logger)
-        key = random_values.random_password()
-        idx.storage_key = key
-        idx.steno_seq = interpolation_counts
-        idx.ttl_seconds = expiration_secs
-        idx_json_str = idx.to_json_str()
+    def obscure_stream(self, reader=None, writer=None, expiration_secs=None, chunk_size=None):
+        """
+        Obscure text read from a file-like object, writing the obscured text to another
 
-        result = self.redis_store.store_with_expiration(
-            key=key,
-            item=idx_json_str,
-            exp_seconds=expiration_secs)
+        Only one chunk of text and its padding is held in memory at a time.
+
+        :param reader: File-like object opened in text mode to read clear text from
+        :param writer: File-like object opened in text mode to write obscured text to
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {key, expiration_secs, errors}
+        :rtype: dict
+        """
+        expiration_secs = expiration_secs if expiration_secs else self.default_expiration_seconds
+
+        # One byte per character - counts are at most 64
+        interpolation_counts = array.array('B')
+        byte_checkpoints = []
+        ascii_only = True
+        for obscured_text in self.obscure_chunks(reader, interpolation_counts, chunk_size=chunk_size,
+                                                 byte_checkpoints=byte_checkpoints):
+            ascii_only = ascii_only and ord(max(obscured_text)) < 128
+            writer.write(obscured_text)
+
+        result = self.store_index(interpolation_counts, expiration_secs,
+                                  byte_checkpoints=byte_checkpoints if self.checkpoint_interval else None,
+                                  ascii_only=ascii_only)
 
         results = {}
         if result['success']:
             results['success'] = True
-            results['key'] = key
+            results['key'] = result['key']
+            results['expiration_seconds'] = result['expiration_secs']
+        else:
+            results['success'] = False
+            results['errors'] = result['errors']
+
+        return results
+
+    def obscure_iter(self, reader=None, expiration_secs=None, chunk_size=None):
+        """
+        Obscure text read from a file-like object as the obscured text is consumed.
+        The key is known before the generator starts, e.g. to send it ahead of a streamed response.
+        The first chunk is read up front, so empty or undecodable text is reported before any output.
+
+        The index is stored when the generator is exhausted. If that fails the generator raises
+        RuntimeError, so the text must not be treated as obscured until the generator completes.
+
+        :param reader: File-like object opened in text mode to read clear text from
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {success, key, expiration_seconds, obscured_chunks, errors}. obscured_chunks is a generator of obscured text fragments
+        :rtype: dict
+        """
+        expiration_secs = expiration_secs if expiration_secs else self.default_expiration_seconds
+        chunk_size = chunk_size if chunk_size else Steno.DEFAULT_CHUNK_SIZE
+
+        try:
+            first_text = reader.read(chunk_size)
+        except ValueError as e:
+            error_text = "Steno.obscure_iter error reading text {0}".format(e)
+            self.logger.error(error_text)
+            return {'success': False, 'errors': [error_text]}
+        if not first_text:
+            error_text = "Steno.obscure_iter no text to obscure"
+            self.logger.error(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        key = self.new_key()
+
+        def obscured_chunks():
+            # One byte per character - counts are at most 64
+            interpolation_counts = array.array('B')
+            byte_checkpoints = []
+            ascii_only = True
+            for obscured_text in self.obscure_chunks(reader, interpolation_counts, chunk_size=chunk_size,
+                                                     byte_checkpoints=byte_checkpoints, first_text=first_text):
+                ascii_only = ascii_only and ord(max(obscured_text)) < 128
+                yield obscured_text
+
+            result = self.store_index(interpolation_counts, expiration_secs,
+                                      byte_checkpoints=byte_checkpoints if self.checkpoint_interval else None,
+                                      ascii_only=ascii_only, key=key)
+            if not result['success']:
+                raise RuntimeError("Steno.obscure_iter error storing index {0}".format(result['errors']))
+
+        return {
+            'success': True,
+            'key': key,
+            'expiration_seconds': expiration_secs,
+            'obscured_chunks': obscured_chunks(),
+        }
+
+    def obscure_file(self, in_path=None, out_path=None, expiration_secs=None):
+        """
+        Obscure a UTF8 text file, writing the obscured text to another UTF8 file
+
+        The input is memory mapped and decoded a chunk at a time. Chunks are one checkpoint interval long,
+        so the byte offset of each checkpoint is known as the output is written.
+
+        :param in_path: Path of the file to read clear text from
+        :param out_path: Path of the file to write obscured text to
+        :param int expiration_secs: How long text should be valid for - default 300 secs (5 mins)
+        :return: {key, expiration_secs, errors}
+        :rtype: dict
+        """
+        expiration_secs = expiration_secs if expiration_secs else self.default_expiration_seconds
+        chunk_size = self.checkpoint_interval if self.checkpoint_interval else Steno.DEFAULT_CHUNK_SIZE
+
+        results = {}
+        interpolation_counts = array.array('B')
+        byte_checkpoints = []
+        byte_pos = 0
+        ascii_only = True
+        try:
+            with map_file(in_path) as buf, open(out_path, 'wb') as writer:
+                for text in iter_utf8_chunks(buf, chunk_size):
+                    obscured_text, chunk_interpolation_counts = self.obscure_text(text)
+                    obscured_bytes = obscured_text.encode('UTF8', 'surrogatepass')
+                    byte_checkpoints.append(byte_pos)
+                    byte_pos += len(obscured_bytes)
+                    ascii_only = ascii_only and len(obscured_bytes) == len(obscured_text)
+                    writer.write(obscured_bytes)
+                    interpolation_counts.extend(chunk_interpolation_counts)
+        except (OSError, ValueError) as e:
+            error_text = "Steno.obscure_file error obscuring {0} {1}".format(in_path, e)
+            self.logger.error(error_text)
+            results['success'] = False
+            results['errors'] = [error_text]
+            return results
+
+        result = self.store_index(interpolation_counts, expiration_secs,
+                                  byte_checkpoints=byte_checkpoints if self.checkpoint_interval else None,
+                                  ascii_only=ascii_only)
+
+        if result['success']:
+            results['success'] = True
+            results['key'] = result['key']
             results['expiration_seconds'] = result['expiration_secs']
-            results['obscured_text'] = obscured_text
         else:
             results['success'] = False
             results['errors'] = result['errors']
 
         return results
 
+    def new_key(self):
+        """
+        Generate a storage key for an Index instance
+
+        :return: Storage key
+        :rtype: str
+        """
+        random_values = rand.RandValues(logger=self.logger)
+        return random_values.random_password()
+
+    def create_index(self, interpolation_counts, expiration_secs, obscured_text=None,
+                     byte_checkpoints=None, ascii_only=False, key=None):
+        """
+        Generate a storage key and create an Index instance for the interpolation counts
+
+        :param list(int) interpolation_counts: Interpolation counts produced by obscure_text
+        :param int expiration_secs: How long the index should be kept
+        :param str obscured_text: (optional) Obscured text - used to save the byte offset of each checkpoint
+            and whether the text is all ASCII
+        :param list(int) byte_checkpoints: (optional) UTF8 byte offset of each checkpoint, if already known
+        :param bool ascii_only: (optional) True if the obscured text is all ASCII, if already known
+        :param str key: (optional) Storage key from new_key - default a new key
+        :return: Index instance
+        :rtype: index.IndexEntry
+        """
+        idx = index.IndexEntry(logger=self.logger)
+
+        # Generate storage key and save Index instance
+        idx.storage_key = key if key else self.new_key()
+        idx.steno_seq = interpolation_counts
+        idx.ttl_seconds = expiration_secs
+        idx.ascii_only = ascii_only
+        if obscured_text is not None:
+            idx.ascii_only = not obscured_text or ord(max(obscured_text)) < 128
+        # Checkpoints let clarify start part way through the text
+        if self.checkpoint_interval and len(interpolation_counts) > self.checkpoint_interval:
+            idx.add_checkpoints(self.checkpoint_interval)
+            if byte_checkpoints is not None:
+                idx.byte_checkpoints = byte_checkpoints
+            elif obscured_text is not None:
+                idx.add_byte_checkpoints(obscured_text)
+
+        return idx
+
+    def build_index(self, interpolation_counts, expiration_secs, obscured_text=None,
+                    byte_checkpoints=None, ascii_only=False, key=None):
+        """
+        Generate a storage key and serialize an Index instance for the interpolation counts as one value
+
+        :param list(int) interpolation_counts: Interpolation counts produced by obscure_text
+        :param int expiration_secs: How long the index should be kept
+        :param str obscured_text: (optional) Obscured text - see create_index
+        :param list(int) byte_checkpoints: (optional) UTF8 byte offset of each checkpoint - see create_index
+        :param bool ascii_only: (optional) True if the obscured text is all ASCII - see create_index
+        :param str key: (optional) Storage key from new_key - default a new key
+        :return: (key, serialized index)
+        :rtype: tuple(str, bytes)
+        """
+        idx = self.create_index(interpolation_counts, expiration_secs, obscured_text=obscured_text,
+                                byte_checkpoints=byte_checkpoints, ascii_only=ascii_only, key=key)
+        with metrics.METRICS.timer('index.serialize'):
+            if self.index_format == 'V1':
+                idx_data = idx.to_json_str()
+            else:
+                idx_data = idx.to_bytes(compress=self.index_compression)
+
+        return idx.storage_key, idx_data
+
+    def build_index_items(self, interpolation_counts, expiration_secs, obscured_text=None,
+                          byte_checkpoints=None, ascii_only=False, key=None):
+        """
+        Generate a storage key and serialize an Index instance for the interpolation counts.
+        V2 indexes of more than index_chunk_size characters are split into a manifest stored
+        under the key and steno_seq chunks stored under derived keys - see IndexEntry.to_items
+
+        :param list(int) interpolation_counts: Interpolation counts produced by obscure_text
+        :param int expiration_secs: How long the index should be kept
+        :param str obscured_text: (optional) Obscured text - see create_index
+        :param list(int) byte_checkpoints: (optional) UTF8 byte offset of each checkpoint - see create_index
+        :param bool ascii_only: (optional) True if the obscured text is all ASCII - see create_index
+        :param str key: (optional) Storage key from new_key - default a new key
+        :return: (key, [(store key, serialized data), ...])
+        :rtype: tuple(str, list(tuple(str, bytes)))
+        """
+        if self.index_format == 'V1' or not self.index_chunk_size \
+                or len(interpolation_counts) <= self.index_chunk_size:
+            key, idx_data = self.build_index(interpolation_counts, expiration_secs, obscured_text=obscured_text,
+                                             byte_checkpoints=byte_checkpoints, ascii_only=ascii_only, key=key)
+            return key, [(key, idx_data)]
+
+        idx = self.create_index(interpolation_counts, expiration_secs, obscured_text=obscured_text,
+                                byte_checkpoints=byte_checkpoints, ascii_only=ascii_only, key=key)
+        with metrics.METRICS.timer('index.serialize'):
+            items = idx.to_items(self.index_chunk_size, compress=self.index_compression)
+
+        return idx.storage_key, items
+
+    def store_index(self, interpolation_counts, expiration_secs, obscured_text=None,
+                    byte_checkpoints=None, ascii_only=False, key=None):
+        """
+        Generate a storage key and save an Index instance for the interpolation counts.
+        The manifest of a chunked index is only written once all of its chunks have been - see store_chunks
+
+        :param list(int) interpolation_counts: Interpolation counts produced by obscure_text
+        :param int expiration_secs: How long the index should be kept
+        :param str obscured_text: (optional) Obscured text - see create_index
+        :param list(int) byte_checkpoints: (optional) UTF8 byte offset of each checkpoint - see create_index
+        :param bool ascii_only: (optional) True if the obscured text is all ASCII - see create_index
+        :param str key: (optional) Storage key - see create_index
+        :return: {success, key, expiration_secs, errors}
+        :rtype: dict
+        """
+        key, items = self.build_index_items(interpolation_counts, expiration_secs, obscured_text=obscured_text,
+                                            byte_checkpoints=byte_checkpoints, ascii_only=ascii_only, key=key)
+
+        result = self.store_chunks(items[1:], expiration_secs)
+        if result['success']:
+            result = self.store.store_with_expiration(
+                key=key,
+                item=items[0][1],
+                exp_seconds=expiration_secs)
+
+        if result['success']:
+            result['key'] = key
+
+        return result
+
+    def store_chunks(self, chunk_items, expiration_secs):
+        """
+        Save the steno_seq chunks of chunked indexes, index_chunk_batch chunks per pipelined store operation.
+        The pipelines are not transactions, so large indexes do not hold up other clients of the store.
+        If a batch fails, chunks already written are left to expire
+
+        :param list(tuple(str, bytes)) chunk_items: (chunk key, data) pairs - see IndexEntry.to_items
+        :param int expiration_secs: How long the chunks should be kept
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        result = {'success': True, 'expiration_secs': expiration_secs}
+        for pos in range(0, len(chunk_items), self.index_chunk_batch):
+            with metrics.METRICS.timer('index.store_chunks'):
+                result = self.store.store_many_with_expiration(items=chunk_items[pos:pos + self.index_chunk_batch],
+                                                               exp_seconds=expiration_secs, transaction=False)
+            if not result['success']:
+                break
+
+        return result
+
+    def fetch_chunks(self, idx, start=0, end=None):
+        """
+        Generator that fetches the steno_seq chunks of a chunked Index instance that cover part of the
+        clear text, index_chunk_batch chunks per store operation. Each batch is added to idx.steno_seq
+        before the generator yields, so chunks are only fetched as they are needed
+
+        :param index.IndexEntry idx: Index instance
+        :param int start: Position of the first clear text character needed
+        :param int end: (optional) Position after the last clear text character needed - default end of text
+        :return: Position after the last clear text character whose count has been fetched so far
+        :rtype: generator(int)
+        :raises ValueError: if a chunk is missing, e.g. has expired
+        """
+        if not idx.chunk_size:
+            yield idx.text_length()
+            return
+
+        stats = metrics.METRICS
+        for first_chunk, chunk_keys in self.chunk_batches(idx, start, end):
+            with stats.timer('index.fetch_chunks'):
+                store_results = self.store.get_many(keys=chunk_keys, decode=False)
+            for chunk_key, result in zip(chunk_keys, store_results):
+                if not result['success']:
+                    raise ValueError("Steno.fetch_chunks chunk {0} {1}".format(chunk_key, result['errors']))
+            idx.add_chunks(first_chunk, [result['item'] for result in store_results])
+            yield min((first_chunk + len(chunk_keys)) * idx.chunk_size, idx.steno_seq_length)
+
+    def chunk_batches(self, idx, start=0, end=None):
+        """
+        Split the steno_seq chunks of a chunked Index instance that cover part of the clear text
+        into batches of index_chunk_batch, one per store operation
+
+        :param index.IndexEntry idx: Index instance. There are no batches if it is not chunked
+        :param int start: Position of the first clear text character needed
+        :param int end: (optional) Position after the last clear text character needed - default end of text
+        :return: (first chunk number, chunk keys) per batch, in order
+        :rtype: generator(tuple(int, list(str)))
+        """
+        if not idx.chunk_size:
+            return
+
+        chunks = idx.chunk_range(start, end)
+        for first_chunk in range(chunks.start, chunks.stop, self.index_chunk_batch):
+            batch = range(first_chunk, min(first_chunk + self.index_chunk_batch, chunks.stop))
+            yield first_chunk, [index.IndexEntry.chunk_key(idx.storage_key, chunk) for chunk in batch]
+
+    def load_index(self, idx_data, start=0, end=None):
+        """
+        Deserialize an Index instance, fetching the steno_seq chunks that cover part of the clear text
+        if it is chunked
+
+        :param bytes idx_data: Serialized Index instance, or its manifest, as stored by obscure
+        :param int start: Position of the first clear text character needed
+        :param int end: (optional) Position after the last clear text character needed - default end of text
+        :return: {success, index, errors}
+        :rtype: dict
+        """
+        with metrics.METRICS.timer('index.deserialize'):
+            idx = index.IndexEntry.from_bytes(idx_data, logger=self.logger)
+
+        try:
+            for fetched_end in self.fetch_chunks(idx, start, end):
+                pass
+        except ValueError as e:
+            error_text = "Steno.load_index error loading index {0}".format(e)
+            self.logger.error(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        return {'success': True, 'index': idx}
+
     def clarify_special_characters(self, interpolation_count):
         if interpolation_count == 1:
             current_char = ' '
@@ -170,52 +779,430 @@ class Steno:
 
         return current_char
 
-    def clarify(self, key=None, text=None):
+    def clarify(self, key=None, text=None, delete_key=False, parallel=False):
         """
         Clarify text previously obscured
 
         :param str key: Key returned from obscure process
         :param str text: Text returned from  obscure process
+        :param bool delete_key: If True, delete the key in the same store operation so the text cannot be clarified again
+        :param bool parallel: (optional) Clarify large texts across a process pool - see clarify_index
         :return: {clarified text, error}
         :rtype: dict
         """
         results = {}
 
-        result = self.redis_store.get(key=key)
+        if delete_key:
+            result = self.store.get_and_delete(key=key, decode=False)
+        else:
+            result = self.store.get(key=key, decode=False)
         if result['success']:
-            obscured_text = text
-            clarified_text = deque()
+            result = self.load_index(result['item'])
+        if result['success']:
+            idx = result['index']
+            if delete_key and idx.chunk_size:
+                self.store.delete_many(keys=[index.IndexEntry.chunk_key(key, chunk) for chunk in idx.chunk_range()])
+            results['success'] = True
+            results['clarified_text'] = self.clarify_entry(idx, text, parallel=parallel)
+        else:
+            results['success'] = False
+            results['errors'] = result['errors']
 
-            idx_json = result['item']
-            idx = index.IndexEntry.from_json_str(idx_json, logger=self.logger)
-            interpolation_counts = idx.steno_seq
+        return results
 
-            obscured_text_pos = 0
-            for ic_pos in range(0, len(interpolation_counts)):
-                interpolation_count = interpolation_counts[ic_pos]
+    def clarify_many(self, pairs=None):
+        """
+        Clarify several texts, fetching all of their index entries in one store operation
 
-                replacement_char = self.clarify_special_characters(
-                    interpolation_count)
+        :param list(tuple(str, str)) pairs: (key, obscured text) pairs
+        :return: One {clarified text, error} dict per pair, in order
+        :rtype: list(dict)
+        """
+        store_results = self.store.get_many(keys=[key for key, text in pairs], decode=False)
 
-                if replacement_char:
-                    current_char = replacement_char
+        all_results = []
+        for (key, text), result in zip(pairs, store_results):
+            results = {}
+            if result['success']:
+                result = self.load_index(result['item'])
+            if result['success']:
+                results['success'] = True
+                results['clarified_text'] = self.clarify_entry(result['index'], text)
+            else:
+                results['success'] = False
+                results['errors'] = result['errors']
+            all_results.append(results)
+
+        return all_results
+
+    def clarify_range(self, key=None, text=None, start=0, end=None):
+        """
+        Clarify only part of a text previously obscured
+
+        :param str key: Key returned from obscure process
+        :param text: Obscured text as a str, a path (os.PathLike) to a UTF8 file of it,
+            or a bytes-like object such as mmap.mmap holding it UTF8 encoded
+        :param int start: Position of the first clear text character to return
+        :param int end: (optional) Position after the last clear text character to return - default end of text
+        :return: {clarified text, error}
+        :rtype: dict
+        """
+        results = {}
+
+        result = self.store.get(key=key, decode=False)
+        if result['success']:
+            try:
+                if isinstance(text, os.PathLike):
+                    with map_file(text) as buf:
+                        clarified_text = self.clarify_index_range(result['item'], buf, start, end)
                 else:
-                    # First character is real
-                    current_char = obscured_text[obscured_text_pos]
+                    clarified_text = self.clarify_index_range(result['item'], text, start, end)
+                results['success'] = True
+                results['clarified_text'] = clarified_text
+            except ValueError as e:
+                error_text = "Steno.clarify_range error clarifying text {0}".format(e)
+                self.logger.error(error_text)
+                results['success'] = False
+                results['errors'] = [error_text]
+        else:
+            results['success'] = False
+            results['errors'] = result['errors']
+
+        return results
+
+    def clarify_index(self, idx_data, text, parallel=False):
+        """
+        Recover the original text from obscured text and its serialized Index instance
+
+        With parallel set, texts of at least parallel_min_chars characters whose index has checkpoints
+        are split on checkpoints and clarified in a pool of parallel_workers processes - see prolix.parallel.
+
+        :param bytes idx_data: Serialized Index instance as stored by obscure
+        :param str text: Obscured text
+        :param bool parallel: (optional) Clarify large texts across a process pool
+        :return: Clarified text
+        :rtype: str
+        :raises ValueError: if the index is chunked and a chunk is missing
+        """
+        result = self.load_index(idx_data)
+        if not result['success']:
+            raise ValueError(result['errors'][0])
+        return self.clarify_entry(result['index'], text, parallel=parallel)
+
+    def clarify_entry(self, idx, text, parallel=False):
+        """
+        Recover the original text from obscured text and its Index instance - see clarify_index
+
+        :param index.IndexEntry idx: Index instance with all of steno_seq
+        :param str text: Obscured text
+        :param bool parallel: (optional) Clarify large texts across a process pool
+        :return: Clarified text
+        :rtype: str
+        """
+        stats = metrics.METRICS
+        stats.incr('steno.clarify.chars', len(idx.steno_seq))
+
+        with stats.timer('steno.clarify.decode'):
+            if parallel and idx.checkpoints and len(idx.steno_seq) >= self.parallel_min_chars:
+                from prolix import parallel as parallel_clarify
+                return parallel_clarify.clarify_text(self, idx, text, max_workers=self.parallel_workers)
+            return self.clarify_text(idx.steno_seq, text)
+
+    def clarify_index_range(self, idx_data, text, start=0, end=None):
+        """
+        Recover part of the original text from obscured text and its serialized Index instance
+
+        Only the obscured text, and the chunks of a chunked index, from the nearest checkpoint
+        before start are read.
+
+        :param bytes idx_data: Serialized Index instance as stored by obscure
+        :param text: Obscured text as a str, or a bytes-like object holding it UTF8 encoded
+        :param int start: Position of the first clear text character to return
+        :param int end: (optional) Position after the last clear text character to return - default end of text
+        :return: Clarified text
+        :rtype: str
+        :raises ValueError: if the index is chunked and a chunk is missing
+        """
+        idx = index.IndexEntry.from_bytes(idx_data, logger=self.logger)
+        end = idx.text_length() if end is None else min(end, idx.text_length())
+        start = min(start, end)
+
+        if isinstance(text, str):
+            checkpoint_pos, obscured_pos = idx.checkpoint_for(start)
+        else:
+            checkpoint_pos, obscured_pos, byte_pos = idx.byte_checkpoint_for(start)
+        for fetched_end in self.fetch_chunks(idx, checkpoint_pos, end):
+            pass
+        steno_seq = idx.steno_seq
+        # Each character is followed by its padding
+        skip_chars = (start - checkpoint_pos) + sum(steno_seq[checkpoint_pos:start])
+        num_chars = (end - start) + sum(steno_seq[start:end])
+
+        if isinstance(text, str):
+            obscured_start = obscured_pos + skip_chars
+            obscured_text = text[obscured_start:obscured_start + num_chars]
+        else:
+            obscured_text = read_utf8_chars(text, byte_pos, skip_chars, num_chars)
+
+        return self.clarify_text(steno_seq[start:end], obscured_text)
+
+    def clarify_text(self, interpolation_counts, text):
+        """
+        Recover the original text from obscured text and its interpolation counts
+
+        :param list(int) interpolation_counts: Interpolation counts saved when the text was obscured
+        :param str text: Obscured text
+        :return: Clarified text
+        :rtype: str
+        """
+        obscured_text = text
+        clarified_text = deque()
+
+        obscured_text_pos = 0
+        for ic_pos in range(0, len(interpolation_counts)):
+            interpolation_count = interpolation_counts[ic_pos]
 
-                # Save off current char
-                clarified_text.append(current_char)
-                # Skip the current character and padding
+            replacement_char = self.clarify_special_characters(
+                interpolation_count)
+
+            if replacement_char:
+                current_char = replacement_char
+            else:
+                # First character is real
+                current_char = obscured_text[obscured_text_pos]
+
+            # Save off current char
+            clarified_text.append(current_char)
+            # Skip the current character and padding
+            obscured_text_pos = 1 + obscured_text_pos + interpolation_count
+
+        return "".join(list(clarified_text))
+
+    def clarify_chunks(self, interpolation_counts, reader, chunk_size=None):
+        """
+        Generator that clarifies obscured text read from a file-like object a chunk at a time
+
+        :param list(int) interpolation_counts: Interpolation counts saved when the text was obscured
+        :param reader: File-like object opened in text mode
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: Clarified text fragments, in order
+        :rtype: generator(str)
+        :raises ValueError: if the obscured text is shorter than the interpolation counts require
+        """
+        chunk_size = chunk_size if chunk_size else Steno.DEFAULT_CHUNK_SIZE
+        num_counts = len(interpolation_counts)
+        ic_pos = 0
+        # Offsets in the whole obscured text
+        obscured_text_pos = 0
+        chunk_start = 0
+
+        while ic_pos < num_counts:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                break
+            chunk_end = chunk_start + len(chunk)
+
+            clarified_text = deque()
+            while ic_pos < num_counts and obscured_text_pos < chunk_end:
+                interpolation_count = interpolation_counts[ic_pos]
+                replacement_char = self.clarify_special_characters(interpolation_count)
+                if replacement_char:
+                    clarified_text.append(replacement_char)
+                else:
+                    clarified_text.append(chunk[obscured_text_pos - chunk_start])
                 obscured_text_pos = 1 + obscured_text_pos + interpolation_count
+                ic_pos += 1
+
+            chunk_start = chunk_end
+            yield "".join(clarified_text)
+
+        if ic_pos < num_counts:
+            raise ValueError("Steno.clarify_chunks obscured text ended after {0} of {1} characters".format(
+                ic_pos, num_counts))
+
+    def clarify_fetched_chunks(self, idx, reader, chunk_size=None):
+        """
+        Generator that clarifies obscured text read from a file-like object, fetching the steno_seq
+        chunks of a chunked Index instance only as clarifying reaches them - see fetch_chunks
 
+        :param index.IndexEntry idx: Chunked Index instance
+        :param reader: File-like object opened in text mode
+        :param int chunk_size: (optional) Number of clear text characters per fragment
+        :return: Clarified text fragments, in order
+        :rtype: generator(str)
+        :raises ValueError: if the obscured text is shorter than the index requires, or a chunk is missing
+        """
+        chunk_size = chunk_size if chunk_size else Steno.DEFAULT_CHUNK_SIZE
+        ic_pos = 0
+        for fetched_end in self.fetch_chunks(idx):
+            while ic_pos < fetched_end:
+                interpolation_counts = idx.steno_seq[ic_pos:min(ic_pos + chunk_size, fetched_end)]
+                # Each character is followed by its padding
+                num_chars = len(interpolation_counts) + sum(interpolation_counts)
+                text = read_text_chars(reader, num_chars)
+                # The padding after the last character may be missing
+                if len(text) <= num_chars - interpolation_counts[-1] - 1:
+                    raise ValueError("Steno.clarify_fetched_chunks obscured text ended before character {0} of {1}".format(
+                        ic_pos, idx.steno_seq_length))
+                yield self.clarify_text(interpolation_counts, text)
+                ic_pos += len(interpolation_counts)
+
+    def clarify_iter(self, key=None, reader=None, chunk_size=None):
+        """
+        Clarify obscured text read from a file-like object as the clarified text is consumed.
+        The index is fetched up front, so a missing key is reported before any text is read.
+        The chunks of a chunked index are fetched as clarifying reaches them - see clarify_fetched_chunks.
+
+        The generator raises ValueError if the obscured text is shorter than the index requires,
+        or a chunk is missing.
+
+        :param str key: Key returned from obscure process
+        :param reader: File-like object opened in text mode to read obscured text from
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {success, clarified_chunks, errors}. clarified_chunks is a generator of clarified text fragments
+        :rtype: dict
+        """
+        results = {}
+
+        result = self.store.get(key=key, decode=False)
+        if result['success']:
+            idx = index.IndexEntry.from_bytes(result['item'], logger=self.logger)
             results['success'] = True
-            results['clarified_text'] = "".join(list(clarified_text))
+            if idx.chunk_size:
+                results['clarified_chunks'] = self.clarify_fetched_chunks(idx, reader, chunk_size=chunk_size)
+            else:
+                results['clarified_chunks'] = self.clarify_chunks(idx.steno_seq, reader, chunk_size=chunk_size)
+        else:
+            results['success'] = False
+            results['errors'] = result['errors']
+
+        return results
+
+    def clarify_stream(self, key=None, reader=None, writer=None, chunk_size=None):
+        """
+        Clarify obscured text read from a file-like object, writing the clarified text to another
+
+        :param str key: Key returned from obscure process
+        :param reader: File-like object opened in text mode to read obscured text from
+        :param writer: File-like object opened in text mode to write clarified text to
+        :param int chunk_size: (optional) Number of characters to read at a time
+        :return: {success, errors}
+        :rtype: dict
+        """
+        results = {}
+
+        result = self.clarify_iter(key=key, reader=reader, chunk_size=chunk_size)
+        if result['success']:
+            try:
+                for clarified_text in result['clarified_chunks']:
+                    writer.write(clarified_text)
+                results['success'] = True
+            except ValueError as e:
+                error_text = "Steno.clarify_stream error clarifying text {0}".format(e)
+                self.logger.error(error_text)
+                results['success'] = False
+                results['errors'] = [error_text]
         else:
             results['success'] = False
             results['errors'] = result['errors']
 
         return results
 
+    def clarify_bytes(self, interpolation_counts, data):
+        """
+        Recover the original text from ASCII obscured text, reading only the bytes of real characters
+
+        :param list(int) interpolation_counts: Interpolation counts saved when the text was obscured
+        :param bytes data: ASCII obscured text
+        :return: Clarified text, ASCII encoded
+        :rtype: bytes
+        """
+        clarified_bytes = bytearray()
+        data_pos = 0
+        for interpolation_count in interpolation_counts:
+            replacement_char = self.clarify_special_characters(interpolation_count)
+            if replacement_char:
+                clarified_bytes.append(ord(replacement_char))
+            else:
+                clarified_bytes.append(data[data_pos])
+            # Skip the current character and padding
+            data_pos = 1 + data_pos + interpolation_count
+
+        return bytes(clarified_bytes)
+
+    def clarify_ascii_chunks(self, interpolation_counts, buf, chunk_size=None):
+        """
+        Generator that clarifies ASCII obscured text held in a buffer a chunk at a time
+
+        :param list(int) interpolation_counts: Interpolation counts saved when the text was obscured
+        :param buf: Bytes-like object, e.g. mmap.mmap, holding the obscured text
+        :param int chunk_size: (optional) Number of clear text characters per chunk
+        :return: Clarified text fragments, in order
+        :rtype: generator(str)
+        :raises ValueError: if the obscured text is shorter than the interpolation counts require
+        """
+        chunk_size = chunk_size if chunk_size else Steno.DEFAULT_CHUNK_SIZE
+        num_counts = len(interpolation_counts)
+        obscured_pos = 0
+        for ic_pos in range(0, num_counts, chunk_size):
+            chunk_interpolation_counts = interpolation_counts[ic_pos:ic_pos + chunk_size]
+            # The last real character of the chunk is 1 + its padding from the end
+            obscured_end = obscured_pos + len(chunk_interpolation_counts) + sum(chunk_interpolation_counts) \
+                - chunk_interpolation_counts[-1]
+            if obscured_end > len(buf):
+                raise ValueError("Steno.clarify_ascii_chunks obscured text ended before character {0} of {1}".format(
+                    ic_pos, num_counts))
+            clarified_bytes = self.clarify_bytes(chunk_interpolation_counts, buf[obscured_pos:obscured_end])
+            obscured_pos = obscured_end + chunk_interpolation_counts[-1]
+            yield clarified_bytes.decode('ascii')
+
+    def clarify_file(self, key=None, in_path=None, out_path=None):
+        """
+        Clarify a UTF8 file of obscured text, writing the clarified text to another UTF8 file
+
+        If the obscured text is all ASCII, the input is memory mapped and only the bytes of real characters
+        are read. Otherwise it is decoded a chunk at a time.
+
+        :param str key: Key returned from obscure process
+        :param in_path: Path of the file to read obscured text from
+        :param out_path: Path of the file to write clarified text to
+        :return: {success, errors}
+        :rtype: dict
+        """
+        results = {}
+
+        result = self.store.get(key=key, decode=False)
+        if not result['success']:
+            results['success'] = False
+            results['errors'] = result['errors']
+            return results
+
+        result = self.load_index(result['item'])
+        if not result['success']:
+            results['success'] = False
+            results['errors'] = result['errors']
+            return results
+
+        idx = result['index']
+        try:
+            with open(out_path, 'w', encoding='UTF8', errors='surrogatepass', newline='') as writer:
+                if idx.ascii_only:
+                    with map_file(in_path) as buf:
+                        for clarified_text in self.clarify_ascii_chunks(idx.steno_seq, buf):
+                            writer.write(clarified_text)
+                else:
+                    with open(in_path, 'r', encoding='UTF8', errors='surrogatepass', newline='') as reader:
+                        for clarified_text in self.clarify_chunks(idx.steno_seq, reader):
+                            writer.write(clarified_text)
+            results['success'] = True
+        except (OSError, ValueError) as e:
+            error_text = "Steno.clarify_file error clarifying {0} {1}".format(in_path, e)
+            self.logger.error(error_text)
+            results['success'] = False
+            results['errors'] = [error_text]
+
+        return results
+
     def get_ord_range(self, text):
         """
         Get the minimum and maximum ordinal values in a string
@@ -224,14 +1211,8 @@ class Steno:
         :return: (min ord, max ord)
         :rtype: tuple(int, int)
         """
-        min_ord = 32
-        max_ord = 0
-
-        for ch in text:
-            ord_val = ord(ch)
-            if ord_val < min_ord:
-                min_ord = ord_val
-            if ord_val > max_ord:
-                max_ord = ord_val
+        if not text:
+            return (32, 0)
 
-        return (min_ord, max_ord)
+        # min and max of a str compare code points without a Python level loop
+        return (min(32, ord(min(text))), ord(max(text)))
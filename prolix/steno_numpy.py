@@ -0,0 +1,192 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from prolix import rand
+from prolix import steno
+
+
+def random_below(bound, count):
+    """
+    Get an array of secure random ints in the range [0, bound)
+
+    Rejection sampling over a buffer from rand.SECURE_SOURCE, done as whole array operations
+
+    :param int bound: Exclusive upper bound - at most 2**32
+    :param int count: Number of ints
+    :return: Array of random ints
+    :rtype: numpy.ndarray
+    """
+    span = 2 ** 32
+    limit = (span // bound) * bound
+    results = numpy.empty(count, dtype=numpy.int64)
+    filled = 0
+    while filled < count:
+        needed = count - filled
+        num_samples = needed + (needed * (span - limit)) // limit + 8
+        samples = numpy.frombuffer(rand.SECURE_SOURCE.random_bytes(num_samples * 4), dtype=numpy.uint32)
+        accepted = samples[samples < limit][0:needed] % bound
+        results[filled:filled + len(accepted)] = accepted
+        filled += len(accepted)
+
+    return results
+
+
+def text_to_code_points(text):
+    """
+    Convert a string to an array of code points
+
+    :param str text: Text to convert
+    :return: Array of code points
+    :rtype: numpy.ndarray
+    """
+    return numpy.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+
+def code_points_to_text(code_points):
+    """
+    Convert an array of code points to a string
+
+    :param numpy.ndarray code_points: Code points to convert
+    :return: Text
+    :rtype: str
+    """
+    return numpy.ascontiguousarray(code_points, dtype='<u4').tobytes().decode('utf-32-le', 'surrogatepass')
+
+
+class NumpySteno(steno.Steno):
+    """Steno engine that computes padding and offsets as whole NumPy arrays rather than per character"""
+
+    ENGINE = 'numpy'
+
+    # Interpolation counts used to mark special characters - see Steno.obscure_special_characters
+    SPECIAL_CHARACTERS = [(' ', 1), ("\n", 2), ('.', 3), (',', 4)]
+
+    def __init__(self, store_backend=None, logger=None):
+        if numpy is None:
+            raise ImportError("NumpySteno requires numpy")
+        super(NumpySteno, self).__init__(store_backend=store_backend, logger=logger)
+        # Alias table of rasbf.letter_sampler as arrays
+        letter_sampler = self.rasbf.letter_sampler
+        self.letter_codes = text_to_code_points("".join(letter_sampler.items))
+        self.letter_prob = numpy.array(letter_sampler.prob, dtype=numpy.int64)
+        self.letter_alias = numpy.array(letter_sampler.alias, dtype=numpy.int64)
+        self.letter_column_size = letter_sampler.column_size
+        self.letter_num_outcomes = letter_sampler.num_outcomes
+
+    def random_letters_by_freq(self, count):
+        """
+        Get an array of frequency weighted letter code points
+
+        :param int count: Number of code points
+        :return: Array of code points
+        :rtype: numpy.ndarray
+        """
+        columns, coins = numpy.divmod(random_below(self.letter_num_outcomes, count), self.letter_column_size)
+        letters = numpy.where(coins < self.letter_prob[columns], columns, self.letter_alias[columns])
+        return self.letter_codes.take(letters)
+
+    def random_code_points(self, count, lower, upper):
+        """
+        Get an array of random legal code points. Same limits as rand.RandomString.random_utf8_char
+
+        :param int count: Number of code points
+        :param int lower: lower limit for code points
+        :param int upper: upper limit for code points
+        :return: Array of code points
+        :rtype: numpy.ndarray
+        """
+        lower = max(lower, rand.RandomString.MIN_UTF8_CHAR_VALUE) if lower else rand.RandomString.MIN_UTF8_CHAR_VALUE
+        upper = min(upper, rand.RandomString.MAX_UTF8_CHAR_VALUE) if upper else rand.RandomString.MAX_UTF8_CHAR_VALUE
+        table = rand.RandomString.code_point_table(lower=lower, upper=max(upper, lower))
+
+        rand_ints = random_below(table.size, count)
+        range_pos = numpy.searchsorted(numpy.array(table.prefix_counts), rand_ints, side='right') - 1
+        range_offsets = numpy.array(table.range_starts, dtype=numpy.int64) - numpy.array(table.prefix_counts)
+        return (rand_ints + range_offsets[range_pos]).astype(numpy.uint32)
+
+    def obscure_text(self, text, ord_range=None):
+        """
+        Interpolate random padding into text
+
+        :param str text: Text to obscure
+        :param tuple(int, int) ord_range: (optional) (min ord, max ord) for padding - default from text
+        :return: (obscured text, interpolation counts)
+        :rtype: tuple(str, list(int))
+        """
+        code_points = text_to_code_points(text)
+        text_len = len(code_points)
+        min_ord, max_ord = ord_range if ord_range else self.get_ord_range(text)
+
+        interpolation_counts = random_below(64 - 8 + 1, text_len) + 8
+        output_chars = code_points.copy()
+
+        special = numpy.zeros(text_len, dtype=bool)
+        for special_char, padding_size in NumpySteno.SPECIAL_CHARACTERS:
+            is_special = code_points == ord(special_char)
+            interpolation_counts[is_special] = padding_size
+            special |= is_special
+        output_chars[special] = self.random_letters_by_freq(int(special.sum()))
+
+        alpha = ((code_points >= ord('A')) & (code_points <= ord('Z'))) \
+            | ((code_points >= ord('a')) & (code_points <= ord('z')))
+        by_freq = alpha | special
+
+        # Offset of each real character in the obscured text
+        char_offsets = numpy.arange(text_len) + numpy.cumsum(interpolation_counts) - interpolation_counts
+        obscured_len = text_len + int(interpolation_counts.sum())
+
+        # Padding belongs to the character before it, in order
+        padding_owners = numpy.repeat(numpy.arange(text_len), interpolation_counts)
+        padding_by_freq = by_freq[padding_owners]
+        padding = numpy.empty(len(padding_owners), dtype=numpy.uint32)
+        num_by_freq = int(padding_by_freq.sum())
+        padding[padding_by_freq] = self.random_letters_by_freq(num_by_freq)
+        padding[~padding_by_freq] = self.random_code_points(len(padding_owners) - num_by_freq, min_ord, max_ord)
+
+        obscured_chars = numpy.empty(obscured_len, dtype=numpy.uint32)
+        is_padding = numpy.ones(obscured_len, dtype=bool)
+        is_padding[char_offsets] = False
+        obscured_chars[char_offsets] = output_chars
+        obscured_chars[is_padding] = padding
+
+        return code_points_to_text(obscured_chars), interpolation_counts.tolist()
+
+    def clarify_text(self, interpolation_counts, text):
+        """
+        Recover the original text from obscured text and its interpolation counts
+
+        :param list(int) interpolation_counts: Interpolation counts saved when the text was obscured
+        :param str text: Obscured text
+        :return: Clarified text
+        :rtype: str
+        """
+        interpolation_counts = numpy.asarray(interpolation_counts, dtype=numpy.int64)
+        char_offsets = numpy.arange(len(interpolation_counts)) \
+            + numpy.cumsum(interpolation_counts) - interpolation_counts
+
+        clarified_chars = text_to_code_points(text)[char_offsets]
+        for special_char, padding_size in NumpySteno.SPECIAL_CHARACTERS:
+            clarified_chars[interpolation_counts == padding_size] = ord(special_char)
+
+        return code_points_to_text(clarified_chars)
+
+    def clarify_bytes(self, interpolation_counts, data):
+        """
+        Recover the original text from ASCII obscured text, reading only the bytes of real characters
+
+        :param list(int) interpolation_counts: Interpolation counts saved when the text was obscured
+        :param bytes data: ASCII obscured text
+        :return: Clarified text, ASCII encoded
+        :rtype: bytes
+        """
+        interpolation_counts = numpy.asarray(interpolation_counts, dtype=numpy.int64)
+        char_offsets = numpy.arange(len(interpolation_counts)) \
+            + numpy.cumsum(interpolation_counts) - interpolation_counts
+
+        clarified_bytes = numpy.frombuffer(data, dtype=numpy.uint8)[char_offsets]
+        for special_char, padding_size in NumpySteno.SPECIAL_CHARACTERS:
+            clarified_bytes[interpolation_counts == padding_size] = ord(special_char)
+
+        return clarified_bytes.tobytes()
@@ -1,9 +1,152 @@
+import collections
+import hashlib
+import heapq
 import sys
+import threading
+import time
 
 import redis
 
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
 import standard_logger
-from json_config import JsonConfig
+
+from prolix import datasets
+from prolix import metrics
+
+
+# Process-wide Redis connection pools keyed by (host, port, password)
+CONNECTION_POOLS = {}
+CONNECTION_POOLS_LOCK = threading.Lock()
+
+
+def get_connection_pool(host=None, port=None, password=None, max_connections=None,
+                        socket_timeout=None, socket_connect_timeout=None, pool_timeout=None):
+    """
+    Get the shared connection pool for a Redis instance, creating it on first use.
+    Settings other than host, port and password only apply when the pool is created.
+
+    :param str host: Redis host
+    :param int port: Redis port
+    :param str password: Redis password
+    :param int max_connections: (optional) Maximum connections held by the pool
+    :param float socket_timeout: (optional) Seconds to wait for a command response
+    :param float socket_connect_timeout: (optional) Seconds to wait for a connection
+    :param float pool_timeout: (optional) Seconds to wait for a free connection when the pool is exhausted
+    :return: Connection pool
+    :rtype: redis.BlockingConnectionPool
+    """
+    pool_key = (host, port, password)
+    with CONNECTION_POOLS_LOCK:
+        pool = CONNECTION_POOLS.get(pool_key)
+        if pool is None:
+            pool_kwargs = {}
+            if max_connections:
+                pool_kwargs['max_connections'] = max_connections
+            if pool_timeout:
+                pool_kwargs['timeout'] = pool_timeout
+            pool = redis.BlockingConnectionPool(
+                host=host,
+                port=port,
+                password=password,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_connect_timeout,
+                **pool_kwargs
+            )
+            CONNECTION_POOLS[pool_key] = pool
+
+    return pool
+
+
+def key_hash(key):
+    """
+    Stable 64 bit hash of a store key - the same in every process, unlike hash()
+
+    :param key: Store key
+    :type key: str or bytes
+    :return: Hash of the key
+    :rtype: int
+    """
+    if isinstance(key, str):
+        key = key.encode('UTF8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+
+def jump_hash(key, num_buckets):
+    """
+    Jump consistent hash (Lamping and Veach). Growing from n to n + 1 buckets moves
+    only 1 / (n + 1) of the keys, all of them to the new bucket
+
+    :param int key: 64 bit key hash - see key_hash
+    :param int num_buckets: Number of buckets
+    :return: Bucket, from 0 to num_buckets - 1
+    :rtype: int
+    """
+    bucket = -1
+    next_bucket = 0
+    while next_bucket < num_buckets:
+        bucket = next_bucket
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        next_bucket = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return bucket
+
+
+STORE_BACKENDS = ['redis', 'memory', 'sharded']
+
+# MemoryStore shared by every Steno instance in the process
+SHARED_MEMORY_STORE = None
+SHARED_MEMORY_STORE_LOCK = threading.Lock()
+
+
+def create_store(backend=None, logger=None):
+    """
+    Create the store for the configured backend
+
+    :param str backend: (optional) 'redis', 'memory' or 'sharded'. Defaults to store_backend in prolix_conf.json
+    :param logger: Logger instance
+    :return: Store instance. All 'memory' stores in a process are the same instance
+    :rtype: BaseStore
+    """
+    global SHARED_MEMORY_STORE
+
+    backend = backend if backend else datasets.get_conf_data(logger=logger).get('store_backend', 'redis')
+    if backend == 'redis':
+        return RedisStore(logger=logger)
+    elif backend == 'sharded':
+        return ShardedRedisStore(logger=logger)
+    elif backend == 'memory':
+        with SHARED_MEMORY_STORE_LOCK:
+            if SHARED_MEMORY_STORE is None:
+                SHARED_MEMORY_STORE = MemoryStore(logger=logger)
+        return SHARED_MEMORY_STORE
+    else:
+        raise ValueError("Unknown store backend {0}. Must be one of {1}".format(backend, STORE_BACKENDS))
+
+
+# Backends with an asyncio store - see create_async_store
+ASYNC_STORE_BACKENDS = ['redis', 'memory']
+
+
+def create_async_store(backend=None, logger=None):
+    """
+    Create the asyncio store for the configured backend
+
+    :param str backend: (optional) 'redis' or 'memory'. Defaults to store_backend in prolix_conf.json
+    :param logger: Logger instance
+    :return: Store instance. 'memory' stores share the MemoryStore used by create_store
+    :rtype: BaseStore
+    """
+    backend = backend if backend else datasets.get_conf_data(logger=logger).get('store_backend', 'redis')
+    if backend == 'redis':
+        return AsyncRedisStore(logger=logger)
+    elif backend == 'memory':
+        return AsyncMemoryStore(memory_store=create_store(backend='memory', logger=logger), logger=logger)
+    else:
+        raise ValueError("Store backend {0} is not supported from asyncio. Must be one of {1}".format(
+            backend, ASYNC_STORE_BACKENDS))
 
 
 class BaseStore:
@@ -11,9 +154,7 @@ class BaseStore:
 
     def __init__(self, logger=None):
         self.logger = logger if logger else standard_logger.get_logger("Store")
-        self.conf = JsonConfig.conf(logger=self.logger, package_name='prolix')
-        self.conf.config_name = 'prolix_conf.json'
-        self.conf_data = self.conf.get_data()
+        self.conf_data = datasets.get_conf_data(logger=self.logger)
         self.default_expiration_seconds = self.conf_data['default_store_expiration_secs']
         self.expiration_seconds = self.default_expiration_seconds
 
@@ -32,17 +173,18 @@ class BaseStore:
         Store an item with the specified expiration
 
         :param str key: Key under which to store the item
-        :param obj item: Item to store. If not a string, must respond to str(obj)
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
         :param int exp_seconds: Expiration in seconds
         :return: No value returned
         """
         raise Exception("Not implemented")
 
-    def get(self, key=None):
+    def get(self, key=None, decode=True):
         """
         Get an item using the specified key. Item will be returned in its string representation - str(obj)
 
         :param str key: Key under which to store the item
+        :param bool decode: Return the item as a string if True, raw bytes if False
         :return: item in string form or None if any error
         :rtype: str
         """
@@ -57,6 +199,73 @@ class BaseStore:
         """
         raise Exception("Not implemented")
 
+    def get_and_delete(self, key=None, decode=True):
+        """
+        Get an item and delete it. Stores that can do this atomically override this
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        result = self.get(key=key, decode=decode)
+        if result['success']:
+            self.delete(key=key)
+        return result
+
+    def store_many_with_expiration(self, items=None, exp_seconds=None, transaction=True):
+        """
+        Store several items with the specified expiration. Stores that can batch writes override this
+
+        :param list(tuple(str, obj)) items: (key, item) pairs
+        :param int exp_seconds: Expiration in seconds
+        :param bool transaction: (optional) Write all items or none, where the store supports it
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        errors = []
+        result = {}
+        for key, item in items if items else []:
+            result = self.store_with_expiration(key=key, item=item, exp_seconds=exp_seconds)
+            if not result['success']:
+                errors.extend(result['errors'])
+
+        if errors:
+            return {'success': False, 'errors': errors}
+        else:
+            return {'success': True,
+                    'expiration_secs': result.get('expiration_secs', self.expiration_seconds)}
+
+    def get_many(self, keys=None, decode=True):
+        """
+        Get several items. Stores that can batch reads override this
+
+        :param list(str) keys: Keys under which the items were stored
+        :param bool decode: Return items as strings if True, raw bytes if False
+        :return: One {success, item, errors} dict per key, in order
+        :rtype: list(dict)
+        """
+        return [self.get(key=key, decode=decode) for key in (keys if keys else [])]
+
+    def delete_many(self, keys=None):
+        """
+        Delete several entries. Stores that can batch deletes override this
+
+        :param list(str) keys: Keys to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        errors = []
+        for key in keys if keys else []:
+            result = self.delete(key=key)
+            if not result['success']:
+                errors.extend(result['errors'])
+
+        if errors:
+            return {'success': False, 'errors': errors}
+        else:
+            return {'success': True}
+
     def get_expiration_seconds(self):
         """
         Get the actual expiration seconds setting
@@ -70,6 +279,12 @@ class BaseStore:
 class RedisStore(BaseStore):
     """Store implementation to access a Redis instance"""
 
+    # Whether the server understands GETDEL (Redis 6.2+). None until first tried
+    GETDEL_SUPPORTED = None
+    # Atomic GETDEL for older servers
+    GET_AND_DELETE_SCRIPT = \
+        "local item = redis.call('GET', KEYS[1]) if item then redis.call('DEL', KEYS[1]) end return item"
+
     def __init__(self, host=None, port=None, password=None,logger=None):
         super(RedisStore, self).__init__(logger=logger)
         self.host = host if host else self.conf_data['redis_host']
@@ -79,9 +294,15 @@ class RedisStore(BaseStore):
 
         try:
             self.redis = redis.StrictRedis(
-                host=self.host,
-                port=self.port,
-                password=self.password
+                connection_pool=get_connection_pool(
+                    host=self.host,
+                    port=self.port,
+                    password=self.password,
+                    max_connections=self.conf_data.get('redis_max_connections'),
+                    socket_timeout=self.conf_data.get('redis_socket_timeout'),
+                    socket_connect_timeout=self.conf_data.get('redis_socket_connect_timeout'),
+                    pool_timeout=self.conf_data.get('redis_pool_timeout')
+                )
             )
         except Exception as e:
             self.logger.error("Error initializing Redis {0}".format(e))
@@ -103,7 +324,7 @@ class RedisStore(BaseStore):
         Store an item with the specified expiration
 
         :param str key: Key under which to store the item
-        :param obj item: Item to store. If not a string, must respond to str(obj)
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
         :param int exp_seconds: Expiration in seconds
         :return: {success, errors, expiration secs}
         :rtype: dict
@@ -119,7 +340,7 @@ class RedisStore(BaseStore):
             error_text = "RedisStore:store_with_expiration no item specified"
             self.logger.error(error_text)
             errors.append(error_text)
-        if not isinstance(item, str):
+        if not isinstance(item, (str, bytes)):
             try:
                 item = str(item)
             except Exception as e:
@@ -131,8 +352,11 @@ class RedisStore(BaseStore):
         self.expiration_seconds = exp_seconds if exp_seconds else self.default_expiration_seconds
 
         if not errors:
+            stats = metrics.METRICS
             try:
-                self.redis.setex(key, self.expiration_seconds, item)
+                with stats.timer('store.redis.set'):
+                    self.redis.setex(key, self.expiration_seconds, item)
+                stats.incr('store.redis.bytes_stored', len(item))
             except Exception as e:
                 error_text = "RedisStore:store_with_expiration error storing object {0} {1}".format(key, e)
                 self.logger.error(error_text)
@@ -148,11 +372,12 @@ class RedisStore(BaseStore):
 
         return result
 
-    def get(self, key=None):
+    def get(self, key=None, decode=True):
         """
         Get an item using the specified key. Item will be returned in its string representation - str(obj)
 
         :param str key: Key under which to store the item
+        :param bool decode: Return the item as a string if True, raw bytes if False
         :return: {success, item, errors}
         :rtype: dict
         """
@@ -163,13 +388,19 @@ class RedisStore(BaseStore):
             errors.append(error_text)
 
         if not errors:
+            stats = metrics.METRICS
             try:
-                if self.redis.exists(key):
-                    item = self.redis.get(key).decode("UTF8")
-                else:
+                with stats.timer('store.redis.get'):
+                    item = self.redis.get(key)
+                if item is None:
+                    stats.incr('store.redis.misses')
                     error_text = "RedisStore:get key {0} does not exist".format(key)
                     self.logger.warning(error_text)
                     errors.append(error_text)
+                else:
+                    stats.incr('store.redis.hits')
+                    if decode:
+                        item = item.decode("UTF8")
             except Exception as e:
                 error_text = "RedisStore:get error getting object {0} {1}".format(key, e)
                 self.logger.error(error_text)
@@ -201,9 +432,7 @@ class RedisStore(BaseStore):
 
         if not errors:
             try:
-                if self.redis.exists(key):
-                    self.redis.delete(key)
-                else:
+                if not self.redis.delete(key):
                     error_text = "RedisStore:delete key {0} does not exist".format(key)
                     self.logger.warning(error_text)
                     errors.append(error_text)
@@ -220,3 +449,1023 @@ class RedisStore(BaseStore):
             result['success'] = True
 
         return result
+
+    def get_and_delete(self, key=None, decode=True):
+        """
+        Get an item and delete it in one atomic round trip.
+        Uses GETDEL on Redis 6.2+ and a Lua script on older servers.
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        errors = []
+        if not key:
+            error_text = "RedisStore:get_and_delete no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+
+        if not errors:
+            stats = metrics.METRICS
+            try:
+                with stats.timer('store.redis.get_and_delete'):
+                    if RedisStore.GETDEL_SUPPORTED is False:
+                        item = self.redis.eval(RedisStore.GET_AND_DELETE_SCRIPT, 1, key)
+                    else:
+                        try:
+                            item = self.redis.execute_command('GETDEL', key)
+                            RedisStore.GETDEL_SUPPORTED = True
+                        except redis.exceptions.ResponseError as e:
+                            if RedisStore.GETDEL_SUPPORTED or 'unknown command' not in str(e).lower():
+                                raise
+                            RedisStore.GETDEL_SUPPORTED = False
+                            item = self.redis.eval(RedisStore.GET_AND_DELETE_SCRIPT, 1, key)
+
+                if item is None:
+                    stats.incr('store.redis.misses')
+                    error_text = "RedisStore:get_and_delete key {0} does not exist".format(key)
+                    self.logger.warning(error_text)
+                    errors.append(error_text)
+                else:
+                    stats.incr('store.redis.hits')
+                    if decode:
+                        item = item.decode("UTF8")
+            except Exception as e:
+                error_text = "RedisStore:get_and_delete error getting object {0} {1}".format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['item'] = item
+
+        return result
+
+    def store_many_with_expiration(self, items=None, exp_seconds=None, transaction=True):
+        """
+        Store several items with the specified expiration in a single round trip
+
+        :param list(tuple(str, obj)) items: (key, item) pairs
+        :param int exp_seconds: Expiration in seconds
+        :param bool transaction: (optional) Wrap the writes in MULTI/EXEC, so all or none are applied.
+            Without it the pipeline is not atomic, and does not hold up other clients while it runs
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        errors = []
+        items = items if items else []
+
+        checked_items = []
+        for key, item in items:
+            if not key:
+                error_text = "RedisStore:store_many_with_expiration no key specified"
+                self.logger.error(error_text)
+                errors.append(error_text)
+            if not item:
+                error_text = "RedisStore:store_many_with_expiration no item specified for key {0}".format(key)
+                self.logger.error(error_text)
+                errors.append(error_text)
+            if not isinstance(item, (str, bytes)):
+                item = str(item)
+            checked_items.append((key, item))
+
+        self.expiration_seconds = exp_seconds if exp_seconds else self.default_expiration_seconds
+
+        if not errors and checked_items:
+            stats = metrics.METRICS
+            try:
+                with stats.timer('store.redis.set_many'):
+                    pipeline = self.redis.pipeline(transaction=transaction)
+                    for key, item in checked_items:
+                        pipeline.set(key, item, ex=self.expiration_seconds)
+                    pipeline.execute()
+                stats.incr('store.redis.bytes_stored', sum([len(item) for key, item in checked_items]))
+            except Exception as e:
+                error_text = "RedisStore:store_many_with_expiration error storing {0} objects {1}".format(
+                    len(checked_items), e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['expiration_secs'] = self.expiration_seconds
+
+        return result
+
+    def get_many(self, keys=None, decode=True):
+        """
+        Get several items with a single MGET
+
+        :param list(str) keys: Keys under which the items were stored
+        :param bool decode: Return items as strings if True, raw bytes if False
+        :return: One {success, item, errors} dict per key, in order
+        :rtype: list(dict)
+        """
+        keys = keys if keys else []
+        if not keys:
+            return []
+
+        stats = metrics.METRICS
+        try:
+            with stats.timer('store.redis.get_many'):
+                items = self.redis.mget(keys)
+        except Exception as e:
+            error_text = "RedisStore:get_many error getting {0} objects {1}".format(len(keys), e)
+            self.logger.error(error_text)
+            return [{'success': False, 'errors': [error_text]} for key in keys]
+
+        results = []
+        num_misses = items.count(None)
+        stats.incr('store.redis.hits', len(keys) - num_misses)
+        stats.incr('store.redis.misses', num_misses)
+        for key, item in zip(keys, items):
+            if item is None:
+                error_text = "RedisStore:get_many key {0} does not exist".format(key)
+                self.logger.warning(error_text)
+                results.append({'success': False, 'errors': [error_text]})
+            else:
+                results.append({'success': True, 'item': item.decode("UTF8") if decode else item})
+
+        return results
+
+    def delete_many(self, keys=None):
+        """
+        Delete several entries with a single DEL
+
+        :param list(str) keys: Keys to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        keys = keys if keys else []
+        if not keys:
+            return {'success': True}
+
+        try:
+            num_deleted = self.redis.delete(*keys)
+        except Exception as e:
+            error_text = "RedisStore:delete_many error deleting {0} objects {1}".format(len(keys), e)
+            self.logger.error(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        if num_deleted < len(keys):
+            error_text = "RedisStore:delete_many {0} of {1} keys do not exist".format(
+                len(keys) - num_deleted, len(keys))
+            self.logger.warning(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        return {'success': True}
+
+
+class ShardedRedisStore(BaseStore):
+    """
+    Store implementation that spreads keys over several Redis instances with jump consistent hashing.
+    Each instance is a RedisStore with its own connection pool.
+
+    Nodes are identified by their position in the list, so add nodes at the end of the list and
+    remove them from the end. Then only about 1/N of the keys move - the rest are found where they
+    were stored.
+    """
+
+    def __init__(self, nodes=None, logger=None):
+        """
+        :param list(dict) nodes: (optional) {host, port, password} of each Redis instance.
+            Defaults to redis_shards, then redis_host and redis_port in prolix_conf.json
+        :param logger: Logger instance
+        """
+        super(ShardedRedisStore, self).__init__(logger=logger)
+        nodes = nodes if nodes else self.conf_data.get('redis_shards')
+        nodes = nodes if nodes else [{}]
+        self.nodes = [RedisStore(host=node.get('host'), port=node.get('port'), password=node.get('password'),
+                                 logger=self.logger) for node in nodes]
+
+    def node_index(self, key):
+        """
+        Get the position of the node that holds a key
+
+        :param str key: Key under which the item is stored
+        :return: Node position in nodes
+        :rtype: int
+        """
+        return jump_hash(key_hash(key), len(self.nodes))
+
+    def node_for(self, key):
+        # Without a key any node will do - it reports the error
+        return self.nodes[self.node_index(key)] if key else self.nodes[0]
+
+    def group_by_node(self, keys):
+        """
+        Group keys by the node that holds them
+
+        :param list(str) keys: Keys
+        :return: {node position: [position in keys, ...]}
+        :rtype: dict
+        """
+        groups = collections.defaultdict(list)
+        for pos, key in enumerate(keys):
+            groups[self.node_index(key) if key else 0].append(pos)
+        return groups
+
+    def store_with_expiration(self, key=None, item=None, exp_seconds=None):
+        """
+        Store an item with the specified expiration on the node for its key
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :param int exp_seconds: Expiration in seconds
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        node = self.node_for(key)
+        result = node.store_with_expiration(key=key, item=item, exp_seconds=exp_seconds)
+        self.expiration_seconds = node.expiration_seconds
+        return result
+
+    def get(self, key=None, decode=True):
+        """
+        Get an item from the node for its key
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        return self.node_for(key).get(key=key, decode=decode)
+
+    def delete(self, key=None):
+        """
+        Delete an entry from the node for its key
+
+        :param str key: Key to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        return self.node_for(key).delete(key=key)
+
+    def get_and_delete(self, key=None, decode=True):
+        """
+        Get an item and delete it in one atomic round trip to the node for its key
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        return self.node_for(key).get_and_delete(key=key, decode=decode)
+
+    def store_many_with_expiration(self, items=None, exp_seconds=None, transaction=True):
+        """
+        Store several items with the specified expiration, in one round trip per node.
+        Transactions are per node, not across nodes.
+
+        :param list(tuple(str, obj)) items: (key, item) pairs
+        :param int exp_seconds: Expiration in seconds
+        :param bool transaction: (optional) Wrap the writes to each node in MULTI/EXEC
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        items = items if items else []
+        errors = []
+
+        groups = self.group_by_node([key for key, item in items])
+        for node_pos, item_positions in groups.items():
+            node = self.nodes[node_pos]
+            result = node.store_many_with_expiration(items=[items[pos] for pos in item_positions],
+                                                     exp_seconds=exp_seconds, transaction=transaction)
+            if not result['success']:
+                errors.extend(result['errors'])
+
+        self.expiration_seconds = exp_seconds if exp_seconds else self.default_expiration_seconds
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['expiration_secs'] = self.expiration_seconds
+
+        return result
+
+    def get_many(self, keys=None, decode=True):
+        """
+        Get several items, with one MGET per node
+
+        :param list(str) keys: Keys under which the items were stored
+        :param bool decode: Return items as strings if True, raw bytes if False
+        :return: One {success, item, errors} dict per key, in order
+        :rtype: list(dict)
+        """
+        keys = keys if keys else []
+        results = [None] * len(keys)
+
+        groups = self.group_by_node(keys)
+        for node_pos, key_positions in groups.items():
+            node_results = self.nodes[node_pos].get_many(keys=[keys[pos] for pos in key_positions], decode=decode)
+            for pos, result in zip(key_positions, node_results):
+                results[pos] = result
+
+        return results
+
+    def delete_many(self, keys=None):
+        """
+        Delete several entries, with one DEL per node
+
+        :param list(str) keys: Keys to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        keys = keys if keys else []
+        errors = []
+
+        groups = self.group_by_node(keys)
+        for node_pos, key_positions in groups.items():
+            result = self.nodes[node_pos].delete_many(keys=[keys[pos] for pos in key_positions])
+            if not result['success']:
+                errors.extend(result['errors'])
+
+        if errors:
+            return {'success': False, 'errors': errors}
+        else:
+            return {'success': True}
+
+
+class MemoryStore(BaseStore):
+    """
+    In-process store with TTL expiry and LRU eviction once max_entries is reached. Thread safe.
+    Items are held as bytes, as Redis would return them.
+    """
+
+    def __init__(self, max_entries=None, logger=None):
+        super(MemoryStore, self).__init__(logger=logger)
+        self.max_entries = max_entries if max_entries else self.conf_data.get('memory_store_max_entries', 10000)
+        self.lock = threading.Lock()
+        # key -> (item, expires at) in least to most recently used order
+        self.entries = collections.OrderedDict()
+        # Heap of (expires at, key). Entries for overwritten or deleted keys are skipped when popped
+        self.expirations = []
+
+    def remove_expired(self, now):
+        """
+        Remove expired entries. Caller must hold the lock
+
+        :param float now: Current time.monotonic() value
+        :return: No value returned
+        """
+        while self.expirations and self.expirations[0][0] <= now:
+            expires_at, key = heapq.heappop(self.expirations)
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self.entries[key]
+
+        # Keep stale heap entries from piling up when keys are overwritten
+        if len(self.expirations) > 2 * len(self.entries) + 64:
+            self.expirations = [(entry[1], key) for key, entry in self.entries.items()]
+            heapq.heapify(self.expirations)
+
+    def add_entry(self, key, item, expiration_seconds, now):
+        """
+        Add or replace an entry, evicting the least recently used entries if full. Caller must hold the lock
+
+        :param str key: Key under which to store the item
+        :param bytes item: Item to store
+        :param int expiration_seconds: Expiration in seconds
+        :param float now: Current time.monotonic() value
+        :return: No value returned
+        """
+        expires_at = now + expiration_seconds
+        self.entries[key] = (item, expires_at)
+        self.entries.move_to_end(key)
+        heapq.heappush(self.expirations, (expires_at, key))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def store(self, key=None, item=None):
+        """
+        Store an item
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        return self.store_with_expiration(key=key, item=item, exp_seconds=self.expiration_seconds)
+
+    def check_item(self, key, item, errors):
+        """
+        Validate a key and item, converting the item to bytes
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :param list(str) errors: Error text is appended to this
+        :return: Item as bytes
+        :rtype: bytes
+        """
+        if not key:
+            error_text = "MemoryStore:store_with_expiration no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+        if not item:
+            error_text = "MemoryStore:store_with_expiration no item specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+        if not isinstance(item, (str, bytes)):
+            try:
+                item = str(item)
+            except Exception as e:
+                error_text = ("MemoryStore:store_with_expiration error converting object {0}"
+                              + " to string {1}").format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+        if isinstance(item, str):
+            item = item.encode("UTF8")
+        return item
+
+    def store_with_expiration(self, key=None, item=None, exp_seconds=None):
+        """
+        Store an item with the specified expiration
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :param int exp_seconds: Expiration in seconds
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        return self.store_many_with_expiration(items=[(key, item)], exp_seconds=exp_seconds)
+
+    def store_many_with_expiration(self, items=None, exp_seconds=None, transaction=True):
+        """
+        Store several items with the specified expiration, all or none
+
+        :param list(tuple(str, obj)) items: (key, item) pairs
+        :param int exp_seconds: Expiration in seconds
+        :param bool transaction: (optional) Ignored - writes are always all or none
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        errors = []
+        checked_items = [(key, self.check_item(key, item, errors)) for key, item in (items if items else [])]
+        expiration_seconds = exp_seconds if exp_seconds else self.default_expiration_seconds
+
+        if not errors:
+            with self.lock:
+                now = time.monotonic()
+                self.remove_expired(now)
+                for key, item in checked_items:
+                    self.add_entry(key, item, expiration_seconds, now)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['expiration_secs'] = expiration_seconds
+
+        return result
+
+    def get_entry(self, key, delete):
+        """
+        Get an item, optionally removing it, in a single locked step
+
+        :param str key: Key under which the item was stored
+        :param bool delete: Whether to remove the item
+        :return: Item or None if it does not exist
+        :rtype: bytes
+        """
+        with self.lock:
+            self.remove_expired(time.monotonic())
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if delete:
+                del self.entries[key]
+            else:
+                self.entries.move_to_end(key)
+            return entry[0]
+
+    def get(self, key=None, decode=True):
+        """
+        Get an item using the specified key
+
+        :param str key: Key under which to store the item
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        return self.get_item(key=key, decode=decode, delete=False)
+
+    def get_and_delete(self, key=None, decode=True):
+        """
+        Get an item and delete it atomically
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        return self.get_item(key=key, decode=decode, delete=True)
+
+    def get_item(self, key=None, decode=True, delete=False):
+        """
+        Shared implementation of get and get_and_delete
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :param bool delete: Whether to remove the item
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        errors = []
+        if not key:
+            error_text = "MemoryStore:get no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+
+        if not errors:
+            item = self.get_entry(key, delete)
+            if item is None:
+                error_text = "MemoryStore:get key {0} does not exist".format(key)
+                self.logger.warning(error_text)
+                errors.append(error_text)
+            elif decode:
+                item = item.decode("UTF8")
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['item'] = item
+
+        return result
+
+    def delete(self, key=None):
+        """
+        Delete an entry from the store
+
+        :param str key: Key to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        errors = []
+        if not key:
+            error_text = "MemoryStore:delete no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+
+        if not errors:
+            if self.get_entry(key, True) is None:
+                error_text = "MemoryStore:delete key {0} does not exist".format(key)
+                self.logger.warning(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+
+        return result
+
+
+class AsyncRedisStore(BaseStore):
+    """Store implementation to access a Redis instance from asyncio code without blocking the event loop"""
+
+    # Set on first use of get_and_delete - see RedisStore.GETDEL_SUPPORTED
+    GETDEL_SUPPORTED = None
+
+    def __init__(self, host=None, port=None, password=None, client=None, logger=None):
+        """
+        :param str host: (optional) Redis host
+        :param int port: (optional) Redis port
+        :param str password: (optional) Redis password
+        :param client: (optional) redis.asyncio client to use instead of connecting to host and port
+        :param logger: Logger instance
+        """
+        super(AsyncRedisStore, self).__init__(logger=logger)
+        self.host = host if host else self.conf_data['redis_host']
+        self.port = port if port else self.conf_data['redis_port']
+        self.password = password if password \
+            else self.conf_data['redis_password']
+
+        if client is not None:
+            self.redis = client
+        elif redis_asyncio is None:
+            raise ImportError("AsyncRedisStore requires redis>=4.2 for redis.asyncio")
+        else:
+            # Connections are opened lazily on the event loop that first uses them
+            self.redis = redis_asyncio.Redis(
+                host=self.host,
+                port=self.port,
+                password=self.password,
+                max_connections=self.conf_data.get('redis_max_connections'),
+                socket_timeout=self.conf_data.get('redis_socket_timeout'),
+                socket_connect_timeout=self.conf_data.get('redis_socket_connect_timeout')
+            )
+
+    async def store(self, key=None, item=None):
+        """
+        Store an item
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        return await self.store_with_expiration(key=key, item=item, exp_seconds=self.expiration_seconds)
+
+    async def store_with_expiration(self, key=None, item=None, exp_seconds=None):
+        """
+        Store an item with the specified expiration
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :param int exp_seconds: Expiration in seconds
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        errors = []
+
+        if not key:
+            error_text = "AsyncRedisStore:store_with_expiration no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+        if not item:
+            error_text = "AsyncRedisStore:store_with_expiration no item specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+        if not isinstance(item, (str, bytes)):
+            try:
+                item = str(item)
+            except Exception as e:
+                error_text = ("AsyncRedisStore:store_with_expiration error converting object {0}"
+                              + " to string {1}").format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        expiration_seconds = exp_seconds if exp_seconds else self.default_expiration_seconds
+
+        if not errors:
+            try:
+                await self.redis.set(key, item, ex=expiration_seconds)
+            except Exception as e:
+                error_text = "AsyncRedisStore:store_with_expiration error storing object {0} {1}".format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['expiration_secs'] = expiration_seconds
+
+        return result
+
+    async def get(self, key=None, decode=True):
+        """
+        Get an item using the specified key
+
+        :param str key: Key under which to store the item
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        errors = []
+        if not key:
+            error_text = "AsyncRedisStore:get no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+
+        if not errors:
+            try:
+                item = await self.redis.get(key)
+                if item is None:
+                    error_text = "AsyncRedisStore:get key {0} does not exist".format(key)
+                    self.logger.warning(error_text)
+                    errors.append(error_text)
+                elif decode:
+                    item = item.decode("UTF8")
+            except Exception as e:
+                error_text = "AsyncRedisStore:get error getting object {0} {1}".format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['item'] = item
+
+        return result
+
+    async def get_many(self, keys=None, decode=True):
+        """
+        Get several items with a single MGET
+
+        :param list(str) keys: Keys under which the items were stored
+        :param bool decode: Return items as strings if True, raw bytes if False
+        :return: One {success, item, errors} dict per key, in order
+        :rtype: list(dict)
+        """
+        keys = keys if keys else []
+        if not keys:
+            return []
+
+        try:
+            items = await self.redis.mget(keys)
+        except Exception as e:
+            error_text = "AsyncRedisStore:get_many error getting {0} objects {1}".format(len(keys), e)
+            self.logger.error(error_text)
+            return [{'success': False, 'errors': [error_text]} for key in keys]
+
+        results = []
+        for key, item in zip(keys, items):
+            if item is None:
+                error_text = "AsyncRedisStore:get_many key {0} does not exist".format(key)
+                self.logger.warning(error_text)
+                results.append({'success': False, 'errors': [error_text]})
+            else:
+                results.append({'success': True, 'item': item.decode("UTF8") if decode else item})
+
+        return results
+
+    async def get_and_delete(self, key=None, decode=True):
+        """
+        Get an item and delete it in one atomic round trip.
+        Uses GETDEL on Redis 6.2+ and a Lua script on older servers.
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        errors = []
+        if not key:
+            error_text = "AsyncRedisStore:get_and_delete no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+
+        if not errors:
+            try:
+                if AsyncRedisStore.GETDEL_SUPPORTED is False:
+                    item = await self.redis.eval(RedisStore.GET_AND_DELETE_SCRIPT, 1, key)
+                else:
+                    try:
+                        item = await self.redis.execute_command('GETDEL', key)
+                        AsyncRedisStore.GETDEL_SUPPORTED = True
+                    except redis.exceptions.ResponseError as e:
+                        if AsyncRedisStore.GETDEL_SUPPORTED or 'unknown command' not in str(e).lower():
+                            raise
+                        AsyncRedisStore.GETDEL_SUPPORTED = False
+                        item = await self.redis.eval(RedisStore.GET_AND_DELETE_SCRIPT, 1, key)
+
+                if item is None:
+                    error_text = "AsyncRedisStore:get_and_delete key {0} does not exist".format(key)
+                    self.logger.warning(error_text)
+                    errors.append(error_text)
+                elif decode:
+                    item = item.decode("UTF8")
+            except Exception as e:
+                error_text = "AsyncRedisStore:get_and_delete error getting object {0} {1}".format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['item'] = item
+
+        return result
+
+    async def store_many_with_expiration(self, items=None, exp_seconds=None, transaction=True):
+        """
+        Store several items with the specified expiration in a single round trip
+
+        :param list(tuple(str, obj)) items: (key, item) pairs
+        :param int exp_seconds: Expiration in seconds
+        :param bool transaction: (optional) Wrap the writes in MULTI/EXEC, so all or none are applied.
+            Without it the pipeline is not atomic, and does not hold up other clients while it runs
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        errors = []
+
+        checked_items = []
+        for key, item in items if items else []:
+            if not key:
+                error_text = "AsyncRedisStore:store_many_with_expiration no key specified"
+                self.logger.error(error_text)
+                errors.append(error_text)
+            if not item:
+                error_text = "AsyncRedisStore:store_many_with_expiration no item specified for key {0}".format(key)
+                self.logger.error(error_text)
+                errors.append(error_text)
+            if not isinstance(item, (str, bytes)):
+                item = str(item)
+            checked_items.append((key, item))
+
+        expiration_seconds = exp_seconds if exp_seconds else self.default_expiration_seconds
+
+        if not errors and checked_items:
+            try:
+                async with self.redis.pipeline(transaction=transaction) as pipeline:
+                    for key, item in checked_items:
+                        pipeline.set(key, item, ex=expiration_seconds)
+                    await pipeline.execute()
+            except Exception as e:
+                error_text = "AsyncRedisStore:store_many_with_expiration error storing {0} objects {1}".format(
+                    len(checked_items), e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+            result['expiration_secs'] = expiration_seconds
+
+        return result
+
+    async def delete(self, key=None):
+        """
+        Delete an entry from the store
+
+        :param str key: Key to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        errors = []
+        if not key:
+            error_text = "AsyncRedisStore:delete no key specified"
+            self.logger.error(error_text)
+            errors.append(error_text)
+
+        if not errors:
+            try:
+                if not await self.redis.delete(key):
+                    error_text = "AsyncRedisStore:delete key {0} does not exist".format(key)
+                    self.logger.warning(error_text)
+                    errors.append(error_text)
+            except Exception as e:
+                error_text = "AsyncRedisStore:delete error deleting object {0} {1}".format(key, e)
+                self.logger.error(error_text)
+                errors.append(error_text)
+
+        result = {}
+        if errors:
+            result['success'] = False
+            result['errors'] = errors
+        else:
+            result['success'] = True
+
+        return result
+
+    async def delete_many(self, keys=None):
+        """
+        Delete several entries with a single DEL
+
+        :param list(str) keys: Keys to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        keys = keys if keys else []
+        if not keys:
+            return {'success': True}
+
+        try:
+            num_deleted = await self.redis.delete(*keys)
+        except Exception as e:
+            error_text = "AsyncRedisStore:delete_many error deleting {0} objects {1}".format(len(keys), e)
+            self.logger.error(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        if num_deleted < len(keys):
+            error_text = "AsyncRedisStore:delete_many {0} of {1} keys do not exist".format(
+                len(keys) - num_deleted, len(keys))
+            self.logger.warning(error_text)
+            return {'success': False, 'errors': [error_text]}
+
+        return {'success': True}
+
+
+class AsyncMemoryStore(BaseStore):
+    """
+    asyncio interface to a MemoryStore. MemoryStore operations do no I/O, so they are called directly
+    """
+
+    def __init__(self, memory_store=None, logger=None):
+        """
+        :param MemoryStore memory_store: (optional) Store to use - default a new MemoryStore
+        :param logger: Logger instance
+        """
+        super(AsyncMemoryStore, self).__init__(logger=logger)
+        self.memory_store = memory_store if memory_store else MemoryStore(logger=self.logger)
+
+    async def store(self, key=None, item=None):
+        """
+        Store an item
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        return self.memory_store.store(key=key, item=item)
+
+    async def store_with_expiration(self, key=None, item=None, exp_seconds=None):
+        """
+        Store an item with the specified expiration
+
+        :param str key: Key under which to store the item
+        :param obj item: Item to store. If not a string or bytes, must respond to str(obj)
+        :param int exp_seconds: Expiration in seconds
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        return self.memory_store.store_with_expiration(key=key, item=item, exp_seconds=exp_seconds)
+
+    async def store_many_with_expiration(self, items=None, exp_seconds=None, transaction=True):
+        """
+        Store several items with the specified expiration, all or none
+
+        :param list(tuple(str, obj)) items: (key, item) pairs
+        :param int exp_seconds: Expiration in seconds
+        :param bool transaction: (optional) Ignored - writes are always all or none
+        :return: {success, errors, expiration secs}
+        :rtype: dict
+        """
+        return self.memory_store.store_many_with_expiration(
+            items=items, exp_seconds=exp_seconds, transaction=transaction)
+
+    async def get(self, key=None, decode=True):
+        """
+        Get an item using the specified key
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        return self.memory_store.get(key=key, decode=decode)
+
+    async def get_many(self, keys=None, decode=True):
+        """
+        Get several items
+
+        :param list(str) keys: Keys under which the items were stored
+        :param bool decode: Return items as strings if True, raw bytes if False
+        :return: One {success, item, errors} dict per key, in order
+        :rtype: list(dict)
+        """
+        return self.memory_store.get_many(keys=keys, decode=decode)
+
+    async def get_and_delete(self, key=None, decode=True):
+        """
+        Get an item and delete it
+
+        :param str key: Key under which the item was stored
+        :param bool decode: Return the item as a string if True, raw bytes if False
+        :return: {success, item, errors}
+        :rtype: dict
+        """
+        return self.memory_store.get_and_delete(key=key, decode=decode)
+
+    async def delete(self, key=None):
+        """
+        Delete an entry from the store
+
+        :param str key: Key to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        return self.memory_store.delete(key=key)
+
+    async def delete_many(self, keys=None):
+        """
+        Delete several entries
+
+        :param list(str) keys: Keys to delete
+        :return: {success, errors}
+        :rtype: dict
+        """
+        return self.memory_store.delete_many(keys=keys)
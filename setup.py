@@ -20,6 +20,10 @@ setup(
         "pyxutils>=0.1",
         "json_config>=0.1",
         "Flask>=1.0.2"],
+    extras_require={
+        'numpy': ['numpy>=1.13'],
+        'server': ['gunicorn>=19.9'],
+    },
     test_suite='nose.collector',
     tests_require=['nose'],
     zip_safe=False,
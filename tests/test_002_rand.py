@@ -1,6 +1,7 @@
 import unittest
 
 from tests.base_test_class import BaseTestClass
+from prolix import datasets
 from prolix import rand
 
 
@@ -56,3 +57,64 @@ class TestRand(unittest.TestCase):
         self.assertTrue(len(val) <= max_val)
         vals = random_values.random_vals(num=5)
         self.assertEqual(len(vals),5)
+
+    def test_008_secure_source_bounds(self):
+        self.logger.debug("TestRand: test_008_secure_source_bounds")
+        source = rand.SecureRandomSource(block_size=256)
+        ints1 = source.randints(5000, 8, 64)
+        self.assertEqual(len(ints1), 5000)
+        self.assertEqual(min(ints1), 8)
+        self.assertEqual(max(ints1), 64)
+        ints2 = source.randbelow_many(70000, 1000)
+        self.assertTrue(all(0 <= i < 70000 for i in ints2))
+        self.assertRaises(ValueError, source.randint, 2, 1)
+
+    def test_009_random_ascii_string_by_freq_len(self):
+        self.logger.debug("TestRand: test_009_random_ascii_string_by_freq_len")
+        rasbf = rand.RandomAsciiStringByFrequency(logger=self.logger).dispatch()
+        str1 = rasbf.random_ascii_string_by_freq(len=64)
+        self.assertEqual(len(str1), 64)
+        self.assertTrue(set(str1) <= set(rasbf.letter_sampler.items))
+
+    def test_010_datasets_loaded_once(self):
+        self.logger.debug("TestRand: test_010_datasets_loaded_once")
+        loads = []
+        self.assertEqual(1, datasets.get_dataset('test_010', lambda: loads.append(1) or 1))
+        self.assertEqual(1, datasets.get_dataset('test_010', lambda: loads.append(1) or 2))
+        self.assertEqual(1, len(loads))
+        # Word list and frequency tables are shared by every instance
+        self.assertIs(rand.RandValues(logger=self.logger).word_dict,
+                      rand.RandValues(logger=self.logger).word_dict)
+        self.assertIs(rand.RandomAsciiStringByFrequency(logger=self.logger).dispatch().letter_sampler,
+                      rand.RandomAsciiStringByFrequency(logger=self.logger).dispatch().letter_sampler)
+
+    def test_011_alias_sampler_exact_weights(self):
+        self.logger.debug("TestRand: test_011_alias_sampler_exact_weights")
+        rasbf = rand.RandomAsciiStringByFrequency(logger=self.logger).dispatch()
+        sampler = rasbf.letter_sampler
+        # Count the outcomes that map to each letter - must be exactly proportional to its weight
+        outcomes = [0] * len(sampler.items)
+        for column in range(0, len(sampler.items)):
+            outcomes[column] += sampler.prob[column]
+            outcomes[sampler.alias[column]] += sampler.column_size - sampler.prob[column]
+        for pos, weight in enumerate(sampler.weights):
+            self.assertEqual(weight * len(sampler.items), outcomes[pos])
+        self.assertEqual(['e', 't', 'a'], sampler.items[0:3])
+        # Rare letters keep their real weight rather than a rounded-up minimum
+        self.assertEqual(740, sampler.weights[sampler.items.index('z')])
+        self.assertEqual(sum(outcomes), sampler.num_outcomes)
+
+    def test_012_code_point_table(self):
+        self.logger.debug("TestRand: test_012_code_point_table")
+        # Range spanning the BMP gap and the SMP holes
+        table = rand.code_point_table(0xC000, 0x1FFFF)
+        self.assertEqual(0xC000, table.code_point_for(0))
+        self.assertEqual(0xE000, table.code_point_for(0xD000 - 0xC000))
+        self.assertEqual(0x1FFFF, table.code_point_for(table.size - 1))
+        self.assertIs(table, rand.code_point_table(0xC000, 0x1FFFF))
+        code_points = table.random_code_points(5000)
+        self.assertTrue(all(rand.CodePointRanges.legal_code_point(cp) for cp in code_points))
+        self.assertEqual(20, len(table.random_string(20)))
+        rs = rand.RandomString(logger=self.logger)
+        self.assertTrue(0xC000 <= ord(rs.random_utf8_char(lower=0xC000, upper=0x1FFFF)) <= 0x1FFFF)
+        self.assertIsNone(rs.random_utf8_char(lower=0xD100, upper=0xD200))
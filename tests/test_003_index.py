@@ -34,3 +34,84 @@ class TestIndex(unittest.TestCase):
 
         # Check the __eq__ implementation
         self.assertEqual(ide, new_ide)
+
+    def test_002_test_index_entry_v2_serialization(self):
+        self.logger.debug("TestIndex: test_002_test_index_entry_v2_serialization")
+        rv = rand.RandValues(logger=self.logger)
+        ris = rand.RandomInts(logger=self.logger)
+        ide = index.IndexEntry(logger=self.logger)
+        ide.storage_key = rv.random_password()
+        ide.steno_seq = ris.random_ints(len=1000, lower=1, upper=64)
+        json_str = ide.to_json_str()
+
+        for compress in [True, False]:
+            data = ide.to_bytes(compress=compress)
+            self.assertTrue(len(data) < len(json_str))
+            new_ide = index.IndexEntry.from_bytes(data, logger=self.logger)
+            self.assertEqual("V2", new_ide.object_type_version)
+            self.assertEqual(ide.storage_key, new_ide.storage_key)
+            self.assertEqual(ide.ttl_seconds, new_ide.ttl_seconds)
+            self.assertEqual(ide.steno_seq, list(new_ide.steno_seq))
+            # from_json_str accepts V2 bytes too
+            self.assertEqual(new_ide, index.IndexEntry.from_json_str(data, logger=self.logger))
+
+        # V1 entries stored as UTF8 JSON load through from_bytes
+        v1_ide = index.IndexEntry.from_bytes(json_str.encode("UTF8"), logger=self.logger)
+        self.assertEqual(ide, v1_ide)
+
+    def test_003_test_index_entry_checkpoints(self):
+        self.logger.debug("TestIndex: test_003_test_index_entry_checkpoints")
+        ris = rand.RandomInts(logger=self.logger)
+        ide = index.IndexEntry(logger=self.logger)
+        ide.steno_seq = ris.random_ints(len=1000, lower=1, upper=64)
+        ide.add_checkpoints(interval=64)
+        self.assertEqual(16, len(ide.checkpoints))
+        for checkpoint, obscured_pos in enumerate(ide.checkpoints):
+            char_pos = checkpoint * 64
+            self.assertEqual(char_pos + sum(ide.steno_seq[0:char_pos]), obscured_pos)
+        self.assertEqual((128, ide.checkpoints[2]), ide.checkpoint_for(150))
+        self.assertEqual((960, ide.checkpoints[15]), ide.checkpoint_for(5000))
+
+        ranges = ide.checkpoint_ranges(3)
+        self.assertEqual(3, len(ranges))
+        self.assertEqual(((0, 384), (0, ide.checkpoints[6])), ranges[0])
+        self.assertEqual(((768, None), (ide.checkpoints[12], None)), ranges[2])
+
+        obscured_text = "".join(["é" + "字" * count for count in ide.steno_seq])
+        ide.add_byte_checkpoints(obscured_text)
+        self.assertEqual(len(ide.checkpoints), len(ide.byte_checkpoints))
+        for obscured_pos, byte_pos in zip(ide.checkpoints, ide.byte_checkpoints):
+            self.assertEqual(len(obscured_text[0:obscured_pos].encode("UTF8")), byte_pos)
+        self.assertEqual((128, ide.checkpoints[2], ide.byte_checkpoints[2]), ide.byte_checkpoint_for(150))
+
+        # Checkpoints are saved in both formats
+        new_ide = index.IndexEntry.from_bytes(ide.to_bytes(), logger=self.logger)
+        self.assertEqual(ide.checkpoints, new_ide.checkpoints)
+        self.assertEqual(64, new_ide.checkpoint_interval)
+        self.assertEqual(ide.byte_checkpoints, new_ide.byte_checkpoints)
+        self.assertEqual(ide, index.IndexEntry.from_json_str(ide.to_json_str(), logger=self.logger))
+
+    def test_004_test_index_entry_chunks(self):
+        self.logger.debug("TestIndex: test_004_test_index_entry_chunks")
+        ris = rand.RandomInts(logger=self.logger)
+        ide = index.IndexEntry(logger=self.logger)
+        ide.storage_key = "key"
+        ide.steno_seq = ris.random_ints(len=1000, lower=1, upper=64)
+        ide.add_checkpoints(interval=64)
+
+        for compress in [True, False]:
+            items = ide.to_items(300, compress=compress)
+            self.assertEqual(["key", "key:0", "key:1", "key:2", "key:3"], [key for key, data in items])
+            manifest = index.IndexEntry.from_bytes(items[0][1], logger=self.logger)
+            self.assertEqual(0, len(manifest.steno_seq))
+            self.assertEqual(1000, manifest.text_length())
+            self.assertEqual(ide.checkpoints, manifest.checkpoints)
+            self.assertEqual(range(1, 3), manifest.chunk_range(450, 700))
+            self.assertEqual(range(3, 4), manifest.chunk_range(900))
+
+            manifest.add_chunks(1, [data for key, data in items[2:4]])
+            self.assertEqual(ide.steno_seq[300:900], manifest.steno_seq[300:900].tolist())
+            self.assertEqual([0] * 300, manifest.steno_seq[0:300].tolist())
+            manifest.add_chunks(0, [items[1][1]])
+            manifest.add_chunks(3, [items[4][1]])
+            self.assertEqual(ide.steno_seq, manifest.steno_seq.tolist())
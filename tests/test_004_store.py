@@ -79,3 +79,41 @@ class TestStore(unittest.TestCase):
         # Cleanup
         result = self.redis_store.delete(key=key)
         self.assertTrue(result['success'])
+
+    def test_005_test_redis_stores_share_connection_pool(self):
+        self.logger.debug("TestStore: test_005_test_redis_stores_share_connection_pool")
+        other_store = store.RedisStore(logger=self.logger)
+        self.assertIs(self.redis_store.redis.connection_pool, other_store.redis.connection_pool)
+        pool = store.get_connection_pool(host=other_store.host, port=other_store.port,
+                                         password=other_store.password)
+        self.assertIs(pool, other_store.redis.connection_pool)
+
+    def test_006_test_redis_store_many_and_get_many(self):
+        self.logger.debug("TestStore: test_006_test_redis_store_many_and_get_many")
+        rv = rand.RandValues(logger=self.logger)
+        rs = rand.RandomString(logger=self.logger)
+        items = [(rv.random_password(), rs.random_utf8_string(len=20)) for i in range(0, 10)]
+        result = self.redis_store.store_many_with_expiration(items=items, exp_seconds=30)
+        self.assertTrue(result['success'])
+        self.assertEqual(30, result['expiration_secs'])
+        results = self.redis_store.get_many(keys=[key for key, value in items] + ["no-such-key"])
+        self.assertEqual([value for key, value in items], [result['item'] for result in results[0:-1]])
+        self.assertFalse(results[-1]['success'])
+        # Cleanup
+        for key, value in items:
+            self.assertTrue(self.redis_store.delete(key=key)['success'])
+
+    def test_007_test_redis_get_and_delete(self):
+        self.logger.debug("TestStore: test_007_test_redis_get_and_delete")
+        rv = rand.RandValues(logger=self.logger)
+        key = rv.random_password()
+        value = b"\x00\x01binary"
+        result = self.redis_store.store_with_expiration(key=key, item=value, exp_seconds=30)
+        self.assertTrue(result['success'])
+        result = self.redis_store.get_and_delete(key=key, decode=False)
+        self.assertTrue(result['success'])
+        self.assertEqual(value, result['item'])
+        result = self.redis_store.get_and_delete(key=key)
+        self.assertFalse(result['success'])
+        result = self.redis_store.delete(key=key)
+        self.assertFalse(result['success'])
@@ -44,3 +44,111 @@ class TestSteno(unittest.TestCase):
             self.logger.error("TestSteno.test_001_test_obfuscate_and_clarify obscure failed")
             self.logger.error("TestSteno.test_001_test_obfuscate_and_clarify obscure errors {0)".format(results['errors']))
             self.assertEqual(results['success'], False)
+
+    def test_002_test_obfuscate_and_clarify_non_latin(self):
+        self.logger.debug("TestSteno: test_002_test_obfuscate_and_clarify_non_latin")
+        clear_text = "Съешь же ещё этих мягких французских булок, да выпей чаю.\n敏捷的棕色狐狸跳过了懒狗。 123 😀"
+        obscured_text, interpolation_counts = self.steno.obscure_text(clear_text)
+        self.assertEqual(len(clear_text), len(interpolation_counts))
+        self.assertEqual(len(clear_text) + sum(interpolation_counts), len(obscured_text))
+        self.assertTrue(max(obscured_text) <= max(clear_text))
+        self.assertEqual(clear_text, self.steno.clarify_text(interpolation_counts, obscured_text))
+
+    def test_003_test_obfuscate_and_clarify_parallel(self):
+        self.logger.debug("TestSteno: test_003_test_obfuscate_and_clarify_parallel")
+        from prolix import parallel
+        stn = steno.Steno(logger=self.logger)
+        stn.parallel_workers = 2
+        stn.parallel_min_chars = 0
+        stn.checkpoint_interval = 100
+        clear_text = self.test_data + "敏捷的棕色狐狸跳过了懒狗。"
+        try:
+            results = stn.obscure(text=clear_text, expiration_secs=30, parallel=True)
+            self.assertTrue(results['success'])
+            obscured_text = results['obscured_text']
+            self.assertTrue(max(obscured_text) <= max(clear_text))
+            results = stn.clarify(key=results['key'], text=obscured_text, parallel=True)
+            self.assertTrue(results['success'])
+            self.assertEqual(clear_text, results['clarified_text'])
+        finally:
+            parallel.shutdown()
+
+    def test_004_test_obfuscate_and_clarify_chunked_index(self):
+        self.logger.debug("TestSteno: test_004_test_obfuscate_and_clarify_chunked_index")
+        import io
+        from prolix import index
+        stn = steno.Steno(logger=self.logger)
+        stn.checkpoint_interval = 100
+        stn.index_chunk_size = 300
+        stn.index_chunk_batch = 2
+        clear_text = self.test_data + "敏捷的棕色狐狸跳过了懒狗。"
+        num_chunks = -(-len(clear_text) // 300)
+
+        results = stn.obscure(text=clear_text, expiration_secs=30)
+        self.assertTrue(results['success'])
+        key = results['key']
+        obscured_text = results['obscured_text']
+        manifest = index.IndexEntry.from_bytes(stn.store.get(key=key, decode=False)['item'], logger=self.logger)
+        self.assertEqual(300, manifest.chunk_size)
+        self.assertEqual(0, len(manifest.steno_seq))
+
+        self.assertEqual(clear_text, stn.clarify(key=key, text=obscured_text)['clarified_text'])
+        self.assertEqual(clear_text[650:720], stn.clarify_range(key=key, text=obscured_text,
+                                                                start=650, end=720)['clarified_text'])
+        results = stn.clarify_iter(key=key, reader=io.StringIO(obscured_text), chunk_size=70)
+        self.assertEqual(clear_text, "".join(results['clarified_chunks']))
+        results = stn.clarify_iter(key=key, reader=io.StringIO(obscured_text[0:-1000]))
+        self.assertRaises(ValueError, "".join, results['clarified_chunks'])
+        self.assertEqual([clear_text], [results['clarified_text'] for results in
+                                        stn.clarify_many(pairs=[(key, obscured_text)])])
+
+        # Only the key is needed to delete all of the chunks
+        results = stn.clarify(key=key, text=obscured_text, delete_key=True)
+        self.assertEqual(clear_text, results['clarified_text'])
+        chunk_keys = [index.IndexEntry.chunk_key(key, chunk) for chunk in range(0, num_chunks)]
+        self.assertFalse(any(result['success'] for result in stn.store.get_many(keys=chunk_keys)))
+
+        # A missing chunk is an error, not wrong text
+        results = stn.obscure(text=clear_text, expiration_secs=30)
+        key = results['key']
+        stn.store.delete(key=index.IndexEntry.chunk_key(key, 1))
+        self.assertFalse(stn.clarify(key=key, text=results['obscured_text'])['success'])
+        self.assertFalse(stn.clarify_range(key=key, text=results['obscured_text'], start=400)['success'])
+        self.assertTrue(stn.clarify_range(key=key, text=results['obscured_text'], start=700)['success'])
+
+    def test_005_test_chunked_index_write_order(self):
+        self.logger.debug("TestSteno: test_005_test_chunked_index_write_order")
+        stn = steno.Steno(logger=self.logger)
+        stn.index_chunk_size = 300
+        stn.index_chunk_batch = 2
+        writes = []
+        store_many = stn.store.store_many_with_expiration
+        store_one = stn.store.store_with_expiration
+
+        def record_store_many(items=None, exp_seconds=None, transaction=True):
+            writes.append(([key for key, item in items], transaction))
+            return store_many(items=items, exp_seconds=exp_seconds, transaction=transaction)
+
+        def record_store_one(key=None, item=None, exp_seconds=None):
+            writes.append(([key], True))
+            return store_one(key=key, item=item, exp_seconds=exp_seconds)
+
+        stn.store.store_many_with_expiration = record_store_many
+        stn.store.store_with_expiration = record_store_one
+
+        # Chunks in non-transactional batches, then the manifest
+        results = stn.obscure(text=self.test_data, expiration_secs=30)
+        key = results['key']
+        self.assertEqual([(["{0}:0".format(key), "{0}:1".format(key)], False),
+                          (["{0}:2".format(key), "{0}:3".format(key)], False),
+                          (["{0}:4".format(key)], False),
+                          ([key], True)], writes)
+        self.assertEqual(self.test_data, stn.clarify(key=key, text=results['obscured_text'])['clarified_text'])
+
+        # No manifest if a chunk batch fails
+        del writes[:]
+        stn.store.store_many_with_expiration = lambda items=None, exp_seconds=None, transaction=True: \
+            {'success': False, 'errors': ["failed"]}
+        results = stn.obscure(text=self.test_data, expiration_secs=30)
+        self.assertFalse(results['success'])
+        self.assertEqual([], writes)
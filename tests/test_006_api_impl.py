@@ -1,9 +1,15 @@
+import io
+import mmap
+import os
+import pathlib
+import tempfile
 import unittest
 
 from pyxutils import paths
 
 from tests.base_test_class import BaseTestClass
 from prolix import api_impl
+from prolix import index
 
 class TestApiImpl(unittest.TestCase):
 
@@ -43,3 +49,143 @@ class TestApiImpl(unittest.TestCase):
             self.logger.error("TestApiImpl.test_001_test_obfuscate_and_clarify obscure failed")
             self.logger.error("TestApiImpl.test_001_test_obfuscate_and_clarify obscure errors {0)".format(results['errors']))
             self.assertEqual(results['success'], False)
+
+    def test_002_test_obscure_and_clarify_stream(self):
+        self.logger.debug("TestApiImpl: test_002_test_obscure_and_clarify_stream")
+        clear_text = self.test_data * 3
+
+        obscured_writer = io.StringIO()
+        results = self.api.obscure_stream(reader=io.StringIO(clear_text), writer=obscured_writer,
+                                          expiration_secs=30, chunk_size=100)
+        self.assertTrue(results['success'])
+        obscured_text = obscured_writer.getvalue()
+
+        # Chunk boundaries on the clarify side need not match the obscure side
+        clarified_writer = io.StringIO()
+        results = self.api.clarify_stream(key=results['key'], reader=io.StringIO(obscured_text),
+                                          writer=clarified_writer, chunk_size=777)
+        self.assertTrue(results['success'])
+        self.assertEqual(clear_text, clarified_writer.getvalue())
+
+        # Truncated obscured text is reported as an error
+        results = self.api.obscure_stream(reader=io.StringIO(clear_text), writer=io.StringIO())
+        results = self.api.clarify_stream(key=results['key'], reader=io.StringIO(obscured_text[0:100]),
+                                          writer=io.StringIO())
+        self.assertFalse(results['success'])
+
+    def test_003_test_obscure_and_clarify_many(self):
+        self.logger.debug("TestApiImpl: test_003_test_obscure_and_clarify_many")
+        clear_texts = [line for line in self.test_data.split("\n") if line][0:10] + [""]
+
+        all_results = self.api.obscure_many(texts=clear_texts, expiration_secs=30)
+        self.assertEqual(len(clear_texts), len(all_results))
+        self.assertTrue(all(results['success'] for results in all_results[0:-1]))
+        self.assertTrue(all_results[-1]['errors'])
+
+        pairs = [(results['key'], results['obscured_text']) for results in all_results[0:-1]]
+        pairs.append(("no-such-key", "text"))
+        all_results = self.api.clarify_many(pairs=pairs)
+        self.assertEqual(clear_texts[0:-1], [results['clarified_text'] for results in all_results[0:-1]])
+        self.assertFalse(all_results[-1]['success'])
+
+    def test_004_test_clarify_and_delete_key(self):
+        self.logger.debug("TestApiImpl: test_004_test_clarify_and_delete_key")
+        clear_text = self.test_data
+        results = self.api.obscure(text=clear_text, expiration_secs=30)
+        key = results['key']
+        obscured_text = results['obscured_text']
+        results = self.api.clarify(key=key, text=obscured_text, delete_key=True)
+        self.assertEqual(clear_text, results['clarified_text'])
+        results = self.api.clarify(key=key, text=obscured_text)
+        self.assertFalse(results['success'])
+
+    def test_005_test_clarify_range(self):
+        self.logger.debug("TestApiImpl: test_005_test_clarify_range")
+        api = api_impl.ApiImpl(logger=self.logger)
+        api.steno.checkpoint_interval = 100
+        clear_text = self.test_data + "敏捷的棕色狐狸跳过了懒狗。😀"
+        results = api.obscure(text=clear_text, expiration_secs=30)
+        key = results['key']
+        obscured_text = results['obscured_text']
+        ranges = [(0, 10), (250, 480), (len(clear_text) - 20, len(clear_text)), (1000, None), (5, 5)]
+
+        for start, end in ranges:
+            results = api.clarify_range(key=key, text=obscured_text, start=start, end=end)
+            self.assertEqual(clear_text[start:end], results['clarified_text'])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            obscured_path = pathlib.Path(os.path.join(tmp_dir, 'obscured.txt'))
+            obscured_path.write_bytes(obscured_text.encode('UTF8'))
+            with open(str(obscured_path), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                for start, end in ranges:
+                    self.assertEqual(clear_text[start:end],
+                                     api.clarify_range(key=key, text=obscured_path, start=start, end=end)['clarified_text'])
+                    self.assertEqual(clear_text[start:end],
+                                     api.clarify_range(key=key, text=buf, start=start, end=end)['clarified_text'])
+
+        results = api.clarify_range(key=key, text=obscured_text, start=10, end=5)
+        self.assertTrue(results['errors'])
+
+    def test_006_test_obscure_and_clarify_file(self):
+        self.logger.debug("TestApiImpl: test_006_test_obscure_and_clarify_file")
+        api = api_impl.ApiImpl(logger=self.logger)
+        api.steno.checkpoint_interval = 100
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clear_path = os.path.join(tmp_dir, 'clear.txt')
+            obscured_path = os.path.join(tmp_dir, 'obscured.txt')
+            clarified_path = os.path.join(tmp_dir, 'clarified.txt')
+            # ASCII text is clarified from the bytes of real characters only
+            for clear_text in [self.test_data.replace("—", "-").replace("\n", "\r\n"), self.test_data + "敏捷的棕色狐狸。😀", ""]:
+                with open(clear_path, 'wb') as f:
+                    f.write(clear_text.encode('UTF8'))
+
+                results = api.obscure_file(in_path=clear_path, out_path=obscured_path, expiration_secs=30)
+                self.assertTrue(results['success'])
+                key = results['key']
+                with open(obscured_path, 'rb') as f:
+                    obscured_text = f.read().decode('UTF8')
+                if clear_text:
+                    self.assertEqual(clear_text, api.clarify(key=key, text=obscured_text)['clarified_text'])
+                self.assertEqual(clear_text[90:210], api.clarify_range(
+                    key=key, text=pathlib.Path(obscured_path), start=90, end=210)['clarified_text'])
+
+                results = api.clarify_file(key=key, in_path=obscured_path, out_path=clarified_path)
+                self.assertTrue(results['success'])
+                with open(clarified_path, 'rb') as f:
+                    self.assertEqual(clear_text, f.read().decode('UTF8'))
+
+            results = api.obscure_file(in_path=os.path.join(tmp_dir, 'missing.txt'), out_path=obscured_path)
+            self.assertTrue(results['errors'])
+
+    def test_007_test_obscure_stream_byte_checkpoints(self):
+        self.logger.debug("TestApiImpl: test_007_test_obscure_stream_byte_checkpoints")
+        api = api_impl.ApiImpl(logger=self.logger)
+        api.steno.checkpoint_interval = 100
+        clear_text = self.test_data + "敏捷的棕色狐狸。😀"
+
+        # Chunks do not line up with checkpoints
+        writer = io.StringIO()
+        results = api.obscure_stream(reader=io.StringIO(clear_text), writer=writer, chunk_size=70)
+        key = results['key']
+        obscured_text = writer.getvalue()
+        idx = index.IndexEntry.from_bytes(api.steno.store.get(key=key, decode=False)['item'], logger=self.logger)
+        self.assertFalse(idx.ascii_only)
+        expected_idx = index.IndexEntry(logger=self.logger)
+        expected_idx.steno_seq = idx.steno_seq
+        expected_idx.add_checkpoints(100)
+        expected_idx.add_byte_checkpoints(obscured_text)
+        self.assertEqual(expected_idx.byte_checkpoints, idx.byte_checkpoints)
+
+        obscured_bytes = obscured_text.encode('UTF8')
+        self.assertEqual(clear_text[1450:1520], api.clarify_range(
+            key=key, text=obscured_bytes, start=1450, end=1520)['clarified_text'])
+
+        results = api.obscure_iter(reader=io.StringIO(clear_text), chunk_size=70)
+        obscured_text = "".join(results['obscured_chunks'])
+        idx = index.IndexEntry.from_bytes(api.steno.store.get(key=results['key'], decode=False)['item'],
+                                          logger=self.logger)
+        expected_idx.steno_seq = idx.steno_seq
+        expected_idx.add_checkpoints(100)
+        expected_idx.add_byte_checkpoints(obscured_text)
+        self.assertEqual(expected_idx.byte_checkpoints, idx.byte_checkpoints)
@@ -0,0 +1,46 @@
+import unittest
+
+from tests.base_test_class import BaseTestClass
+
+from prolix import steno
+from prolix import steno_numpy
+from pyxutils import paths
+
+
+@unittest.skipUnless(steno_numpy.numpy, "numpy not installed")
+class TestStenoNumpy(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+        cls.steno = steno.create_steno(engine='python', logger=cls.logger)
+        cls.numpy_steno = steno.create_steno(engine='numpy', logger=cls.logger)
+
+        with open(paths.get_data_path(file_name='gettysburg.txt', package_name='prolix')) as f:
+            cls.test_data = f.read()
+
+    def test_001_numpy_obscure_python_clarify(self):
+        self.logger.debug("TestStenoNumpy: test_001_numpy_obscure_python_clarify")
+        clear_text = self.test_data + " Ünïcödé 中文 ✓ 😀"
+        obscured_text, interpolation_counts = self.numpy_steno.obscure_text(clear_text)
+        self.assertEqual(len(obscured_text), len(clear_text) + sum(interpolation_counts))
+        self.assertEqual(clear_text, self.steno.clarify_text(interpolation_counts, obscured_text))
+
+    def test_002_python_obscure_numpy_clarify(self):
+        self.logger.debug("TestStenoNumpy: test_002_python_obscure_numpy_clarify")
+        clear_text = self.test_data
+        obscured_text, interpolation_counts = self.steno.obscure_text(clear_text)
+        self.assertEqual(clear_text, self.numpy_steno.clarify_text(interpolation_counts, obscured_text))
+
+    def test_003_obscure_and_clarify(self):
+        self.logger.debug("TestStenoNumpy: test_003_obscure_and_clarify")
+        clear_text = self.test_data
+        results = self.numpy_steno.obscure(text=clear_text, expiration_secs=30)
+        self.assertTrue(results['success'])
+        results = self.numpy_steno.clarify(key=results['key'], text=results['obscured_text'])
+        self.assertTrue(results['success'])
+        self.assertEqual(clear_text, results['clarified_text'])
+
+    def test_004_unknown_engine(self):
+        self.logger.debug("TestStenoNumpy: test_004_unknown_engine")
+        self.assertRaises(ValueError, steno.create_steno, engine='fortran', logger=self.logger)
@@ -0,0 +1,151 @@
+import asyncio
+import unittest
+
+from pyxutils import paths
+
+from tests.base_test_class import BaseTestClass
+from prolix import async_api_impl
+from prolix import store
+
+try:
+    from fakeredis import aioredis as fake_aioredis
+except ImportError:
+    fake_aioredis = None
+
+
+class TestAsyncApiImpl(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+        # Redis connections belong to the loop that opened them, so share one loop across tests
+        cls.loop = asyncio.new_event_loop()
+        # Use an in-process fake server when available, otherwise the configured local Redis
+        client = fake_aioredis.FakeRedis() if fake_aioredis else None
+        cls.api = async_api_impl.AsyncApiImpl(
+            logger=cls.logger, store=store.AsyncRedisStore(client=client, logger=cls.logger))
+
+        with open(paths.get_data_path(file_name='gettysburg.txt', package_name='prolix')) as f:
+            cls.test_data = f.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_001_test_obfuscate_and_clarify(self):
+        self.logger.debug("TestAsyncApiImpl: test_001_test_obfuscate_and_clarify")
+        clear_text = self.test_data
+
+        async def obscure_and_clarify():
+            results = await self.api.obscure(text=clear_text, expiration_secs=30)
+            self.assertTrue(results['success'])
+            return await self.api.clarify(key=results['key'], text=results['obscured_text'])
+
+        results = self.run_async(obscure_and_clarify())
+        self.assertTrue(results['success'])
+        self.assertEqual(clear_text, results['clarified_text'])
+
+    def test_002_test_concurrent_obfuscate_and_clarify(self):
+        self.logger.debug("TestAsyncApiImpl: test_002_test_concurrent_obfuscate_and_clarify")
+        clear_texts = ["{0} {1}".format(i, self.test_data[0:200]) for i in range(0, 20)]
+
+        async def obscure_and_clarify(clear_text):
+            results = await self.api.obscure(text=clear_text, expiration_secs=30)
+            results = await self.api.clarify(key=results['key'], text=results['obscured_text'])
+            return results['clarified_text']
+
+        async def run_all():
+            return await asyncio.gather(*[obscure_and_clarify(clear_text) for clear_text in clear_texts])
+
+        self.assertEqual(clear_texts, self.run_async(run_all()))
+
+    def test_003_test_clarify_missing_key(self):
+        self.logger.debug("TestAsyncApiImpl: test_003_test_clarify_missing_key")
+        results = self.run_async(self.api.clarify(key="no-such-key", text="text"))
+        self.assertFalse(results['success'])
+        self.assertTrue(results['errors'])
+
+    def test_004_test_memory_backend(self):
+        self.logger.debug("TestAsyncApiImpl: test_004_test_memory_backend")
+        api = async_api_impl.AsyncApiImpl(logger=self.logger, store_backend='memory')
+        self.assertIsInstance(api.store, store.AsyncMemoryStore)
+        # Keys are visible to the Steno engine and to the synchronous API
+        self.assertIs(store.create_store(backend='memory', logger=self.logger), api.store.memory_store)
+        clear_text = self.test_data[0:200]
+
+        async def obscure_and_clarify():
+            results = await api.obscure(text=clear_text, expiration_secs=30)
+            self.assertTrue(results['success'])
+            return await api.clarify(key=results['key'], text=results['obscured_text'])
+
+        self.assertEqual(clear_text, self.run_async(obscure_and_clarify())['clarified_text'])
+        self.assertRaises(ValueError, async_api_impl.AsyncApiImpl, logger=self.logger, store_backend='sharded')
+
+    def test_005_test_clarify_chunked_index(self):
+        self.logger.debug("TestAsyncApiImpl: test_005_test_clarify_chunked_index")
+        from prolix import index
+        api = async_api_impl.AsyncApiImpl(logger=self.logger, store_backend='memory')
+        api.steno.index_chunk_size = 300
+        api.steno.index_chunk_batch = 2
+        # Chunked indexes are written by the synchronous API
+        results = api.steno.obscure(text=self.test_data, expiration_secs=30)
+        key = results['key']
+        obscured_text = results['obscured_text']
+
+        results = self.run_async(api.clarify(key=key, text=obscured_text))
+        self.assertTrue(results['success'])
+        self.assertEqual(self.test_data, results['clarified_text'])
+
+        self.assertTrue(api.store.memory_store.delete(key=index.IndexEntry.chunk_key(key, 1))['success'])
+        results = self.run_async(api.clarify(key=key, text=obscured_text))
+        self.assertFalse(results['success'])
+        self.assertTrue(results['errors'])
+
+    def test_007_test_obscure_chunked_index(self):
+        self.logger.debug("TestAsyncApiImpl: test_007_test_obscure_chunked_index")
+        from prolix import index
+        api = async_api_impl.AsyncApiImpl(logger=self.logger, store=self.api.store)
+        api.steno.index_chunk_size = 10
+        api.steno.index_chunk_batch = 4
+        clear_text = self.test_data[0:100]
+
+        results = self.run_async(api.obscure(text=clear_text, expiration_secs=30))
+        self.assertTrue(results['success'])
+        key = results['key']
+
+        manifest = self.run_async(api.store.get(key=key, decode=False))
+        idx = index.IndexEntry.from_bytes(manifest['item'], logger=self.logger)
+        self.assertEqual(10, idx.chunk_size)
+        chunk_keys = [index.IndexEntry.chunk_key(key, chunk) for chunk in idx.chunk_range()]
+        self.assertEqual(10, len(chunk_keys))
+        chunk_results = self.run_async(api.store.get_many(keys=chunk_keys, decode=False))
+        self.assertTrue(all([result['success'] for result in chunk_results]))
+
+        results = self.run_async(api.clarify(key=key, text=results['obscured_text']))
+        self.assertTrue(results['success'])
+        self.assertEqual(clear_text, results['clarified_text'])
+
+    def test_006_test_async_store_batch_operations(self):
+        self.logger.debug("TestAsyncApiImpl: test_006_test_async_store_batch_operations")
+        for async_store in [self.api.store, store.create_async_store(backend='memory', logger=self.logger)]:
+            items = [("async-store-test-{0}".format(i), "item {0}".format(i)) for i in range(0, 3)]
+            keys = [key for key, item in items]
+
+            results = self.run_async(async_store.store_many_with_expiration(
+                items=items, exp_seconds=30, transaction=False))
+            self.assertTrue(results['success'])
+            self.assertEqual(30, results['expiration_secs'])
+            self.assertEqual([item for key, item in items],
+                             [result['item'] for result in self.run_async(async_store.get_many(keys=keys))])
+
+            results = self.run_async(async_store.get_and_delete(key=keys[0]))
+            self.assertTrue(results['success'])
+            self.assertEqual("item 0", results['item'])
+            self.assertFalse(self.run_async(async_store.get_and_delete(key=keys[0]))['success'])
+
+            self.assertTrue(self.run_async(async_store.delete_many(keys=keys[1:]))['success'])
+            self.assertFalse(self.run_async(async_store.delete_many(keys=keys[1:]))['success'])
+            self.assertFalse(self.run_async(async_store.get(key=keys[1]))['success'])
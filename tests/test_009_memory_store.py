@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+
+from tests.base_test_class import BaseTestClass
+
+from prolix import api_impl
+from prolix import store
+from pyxutils import paths
+
+
+class TestMemoryStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+
+    def test_001_test_memory_set_get_and_delete(self):
+        self.logger.debug("TestMemoryStore: test_001_test_memory_set_get_and_delete")
+        memory_store = store.MemoryStore(logger=self.logger)
+        result = memory_store.store(key="key", item="value")
+        self.assertTrue(result['success'])
+        self.assertEqual("value", memory_store.get(key="key")['item'])
+        self.assertEqual(b"value", memory_store.get(key="key", decode=False)['item'])
+        self.assertTrue(memory_store.delete(key="key")['success'])
+        self.assertFalse(memory_store.get(key="key")['success'])
+        self.assertFalse(memory_store.delete(key="key")['success'])
+
+    def test_002_test_memory_expiration(self):
+        self.logger.debug("TestMemoryStore: test_002_test_memory_expiration")
+        memory_store = store.MemoryStore(logger=self.logger)
+        result = memory_store.store_with_expiration(key="key", item="value", exp_seconds=1)
+        self.assertTrue(result['success'])
+        self.assertEqual(1, result['expiration_secs'])
+        self.assertTrue(memory_store.get(key="key")['success'])
+        time.sleep(1.1)
+        self.assertFalse(memory_store.get(key="key")['success'])
+        self.assertEqual(0, len(memory_store.entries))
+
+    def test_003_test_memory_lru_eviction(self):
+        self.logger.debug("TestMemoryStore: test_003_test_memory_lru_eviction")
+        memory_store = store.MemoryStore(max_entries=3, logger=self.logger)
+        result = memory_store.store_many_with_expiration(items=[("a", "1"), ("b", "2"), ("c", "3")])
+        self.assertTrue(result['success'])
+        # Touch 'a' so that 'b' is least recently used
+        memory_store.get(key="a")
+        memory_store.store(key="d", item="4")
+        results = memory_store.get_many(keys=["a", "b", "c", "d"])
+        self.assertEqual([True, False, True, True], [result['success'] for result in results])
+
+    def test_004_test_memory_get_and_delete_threads(self):
+        self.logger.debug("TestMemoryStore: test_004_test_memory_get_and_delete_threads")
+        memory_store = store.MemoryStore(logger=self.logger)
+        memory_store.store(key="key", item="value")
+        results = []
+
+        def get_and_delete():
+            results.append(memory_store.get_and_delete(key="key")['success'])
+
+        threads = [threading.Thread(target=get_and_delete) for i in range(0, 8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Exactly one thread gets the item
+        self.assertEqual(1, results.count(True))
+
+    def test_005_test_api_with_memory_backend(self):
+        self.logger.debug("TestMemoryStore: test_005_test_api_with_memory_backend")
+        self.assertIs(store.create_store(backend='memory', logger=self.logger),
+                      store.create_store(backend='memory', logger=self.logger))
+        with open(paths.get_data_path(file_name='gettysburg.txt', package_name='prolix')) as f:
+            clear_text = f.read()
+
+        results = api_impl.ApiImpl(logger=self.logger, store_backend='memory').obscure(text=clear_text)
+        self.assertTrue(results['success'])
+        # A new ApiImpl sees the same in-process store
+        results = api_impl.ApiImpl(logger=self.logger, store_backend='memory').clarify(
+            key=results['key'], text=results['obscured_text'])
+        self.assertEqual(clear_text, results['clarified_text'])
@@ -0,0 +1,91 @@
+import socket
+import unittest
+
+from tests.base_test_class import BaseTestClass
+
+from prolix import api_impl
+from prolix import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+
+    def tearDown(self):
+        metrics.configure(None)
+
+    def test_001_test_disabled_metrics(self):
+        self.logger.debug("TestMetrics: test_001_test_disabled_metrics")
+        stats = metrics.configure(None)
+        self.assertFalse(stats.enabled)
+        self.assertIs(metrics.NULL_TIMER, stats.timer('name'))
+        with stats.timer('name'):
+            stats.incr('name')
+            stats.observe('name', 1)
+
+    def test_002_test_memory_sink(self):
+        self.logger.debug("TestMetrics: test_002_test_memory_sink")
+        sink = metrics.MemorySink()
+        stats = metrics.configure(sink)
+        stats.incr('counter')
+        stats.incr('counter', 2)
+        stats.observe('size', 500)
+        stats.observe('size', 5000)
+        with stats.timer('phase'):
+            pass
+
+        snapshot = sink.snapshot()
+        self.assertEqual(3, snapshot['counters']['counter'])
+        self.assertEqual({'count': 2, 'sum': 5500}, snapshot['histograms']['size'])
+        self.assertEqual(1, snapshot['timings']['phase']['count'])
+        self.assertEqual([0, 0, 1, 1, 0, 0, 0, 0], sink.histograms['size'].counts)
+
+    def test_003_test_prometheus_sink(self):
+        self.logger.debug("TestMetrics: test_003_test_prometheus_sink")
+        sink = metrics.create_sink('prometheus', {'metrics_prefix': 'test'})
+        stats = metrics.configure(sink)
+        stats.incr('steno.obscure.chars', 10)
+        stats.observe('steno.obscure.text_chars', 10)
+
+        lines = sink.render().splitlines()
+        self.assertIn("# TYPE test_steno_obscure_chars_total counter", lines)
+        self.assertIn("test_steno_obscure_chars_total 10", lines)
+        self.assertIn('test_steno_obscure_text_chars_bucket{le="10"} 1', lines)
+        self.assertIn('test_steno_obscure_text_chars_bucket{le="+Inf"} 1', lines)
+        self.assertIn("test_steno_obscure_text_chars_count 1", lines)
+
+    def test_004_test_statsd_sink(self):
+        self.logger.debug("TestMetrics: test_004_test_statsd_sink")
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(5)
+        try:
+            sink = metrics.StatsdSink(port=server.getsockname()[1], prefix='test')
+            stats = metrics.configure(sink)
+            stats.incr('calls')
+            self.assertEqual(b"test.calls:1|c", server.recv(1024))
+            stats.observe('size', 42)
+            self.assertEqual(b"test.size:42|h", server.recv(1024))
+        finally:
+            server.close()
+
+    def test_005_test_instrumented_api(self):
+        self.logger.debug("TestMetrics: test_005_test_instrumented_api")
+        sink = metrics.MemorySink()
+        metrics.configure(sink)
+        api = api_impl.ApiImpl(logger=self.logger)
+        clear_text = "Four score and seven years ago"
+        results = api.obscure(text=clear_text, expiration_secs=30)
+        results = api.clarify(key=results['key'], text=results['obscured_text'])
+        self.assertEqual(clear_text, results['clarified_text'])
+        api.clarify(key="no-such-key", text="text")
+
+        snapshot = sink.snapshot()
+        self.assertEqual(len(clear_text), snapshot['counters']['steno.obscure.chars'])
+        self.assertEqual(2, snapshot['counters']['api.clarify.calls'])
+        self.assertEqual(1, snapshot['counters']['api.clarify.errors'])
+        for name in ['api.obscure', 'steno.obscure.rng_padding', 'steno.obscure.assembly', 'index.serialize',
+                     'index.deserialize', 'steno.clarify.decode']:
+            self.assertEqual(1, snapshot['timings'][name]['count'])
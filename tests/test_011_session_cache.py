@@ -0,0 +1,60 @@
+import re
+import time
+import unittest
+
+from tests.base_test_class import BaseTestClass
+
+from prolix.server import session_cache
+
+
+class TestSessionCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+
+    def test_001_test_create_get_and_delete(self):
+        self.logger.debug("TestSessionCache: test_001_test_create_get_and_delete")
+        for backend in ['memory', 'redis']:
+            sessions = session_cache.SessionCache(backend=backend, logger=self.logger)
+            data = {'clear_text': "Four score", 'obscured_text': "F..o..u..r", 'key': "key"}
+            result = sessions.create(data)
+            self.assertTrue(result['success'])
+            token = result['token']
+            self.assertEqual(data, sessions.get(token)['data'])
+            self.assertNotEqual(token, sessions.create(data)['token'])
+            self.assertTrue(sessions.delete(token)['success'])
+            self.assertFalse(sessions.get(token)['success'])
+            self.assertFalse(sessions.get(None)['success'])
+
+    def test_002_test_limits(self):
+        self.logger.debug("TestSessionCache: test_002_test_limits")
+        sessions = session_cache.SessionCache(backend='memory', max_entries=2, max_bytes=100,
+                                              expiration_secs=1, logger=self.logger)
+        self.assertFalse(sessions.create({'clear_text': "x" * 100})['success'])
+
+        tokens = [sessions.create({'n': n})['token'] for n in range(0, 3)]
+        self.assertFalse(sessions.get(tokens[0])['success'])
+        self.assertEqual({'n': 2}, sessions.get(tokens[2])['data'])
+
+        time.sleep(1.1)
+        self.assertFalse(sessions.get(tokens[2])['success'])
+
+    def test_003_test_server_obscure_and_clarify(self):
+        self.logger.debug("TestSessionCache: test_003_test_server_obscure_and_clarify")
+        from prolix.server import prolix_server
+        client = prolix_server.app.test_client()
+        clear_text = "Four score and seven years ago"
+
+        response = client.post("/obscure", data={'clearText': clear_text})
+        self.assertEqual(200, response.status_code)
+        page = response.get_data(as_text=True)
+        self.assertNotIn("FileName", page)
+        token = re.search(r'name="hiddenSessionToken" value="([^"]+)"', page).group(1)
+
+        response = client.post("/clarify", data={'hiddenSessionToken': token})
+        page = response.get_data(as_text=True)
+        self.assertIn('<textarea rows="8" cols="100">{0}</textarea>'.format(clear_text), page)
+
+        response = client.post("/clarify", data={'hiddenSessionToken': "no-such-token"})
+        self.assertIn("Session error", response.get_data(as_text=True))
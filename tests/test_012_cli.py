@@ -0,0 +1,34 @@
+import unittest
+
+from tests.base_test_class import BaseTestClass
+
+from prolix import cli
+
+
+class TestCli(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+
+    def test_001_test_default_command(self):
+        self.logger.debug("TestCli: test_001_test_default_command")
+        self.assertIsNone(cli.parse_args([]).command)
+        self.assertEqual('run', cli.parse_args(['run']).command)
+
+    def test_002_test_serve_options(self):
+        self.logger.debug("TestCli: test_002_test_serve_options")
+        conf_data = {'server_bind': "0.0.0.0:9000", 'server_workers': 3, 'server_threads': 2}
+        options = cli.gunicorn_options(cli.parse_args(['serve', '--workers', '5', '--graceful-timeout', '10']),
+                                       conf_data)
+        self.assertEqual("0.0.0.0:9000", options['bind'])
+        self.assertEqual(5, options['workers'])
+        self.assertEqual(2, options['threads'])
+        self.assertEqual(10, options['graceful_timeout'])
+        self.assertTrue(options['preload_app'])
+
+        options = cli.gunicorn_options(cli.parse_args(['serve']), {})
+        self.assertEqual("127.0.0.1:8000", options['bind'])
+        self.assertEqual('gthread', options['worker_class'])
+        self.assertEqual(1, options['threads'])
+        self.assertTrue(options['workers'] >= 3)
@@ -0,0 +1,111 @@
+import gzip
+import json
+import unittest
+
+from pyxutils import paths
+
+from tests.base_test_class import BaseTestClass
+
+
+class TestServerApi(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+        from prolix.server import prolix_server
+        cls.client = prolix_server.app.test_client()
+
+        with open(paths.get_data_path(file_name='gettysburg.txt', package_name='prolix')) as f:
+            cls.test_data = f.read()
+
+    def post_json(self, url, body, headers=None):
+        response = self.client.post(url, data=json.dumps(body), content_type='application/json', headers=headers)
+        data = response.get_data()
+        if response.headers.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return response, json.loads(data.decode('UTF8'))
+
+    def test_001_test_obscure_and_clarify(self):
+        self.logger.debug("TestServerApi: test_001_test_obscure_and_clarify")
+        response, results = self.post_json("/api/v1/obscure", {'text': self.test_data, 'expiration_secs': 30},
+                                           headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertTrue(results['success'])
+
+        response, results = self.post_json("/api/v1/clarify", {'key': results['key'],
+                                                                'text': results['obscured_text']})
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(self.test_data, results['clarified_text'])
+
+        response, results = self.post_json("/api/v1/clarify", {'key': "no-such-key", 'text': "text"})
+        self.assertEqual(400, response.status_code)
+        self.assertFalse(results['success'])
+
+        response, results = self.post_json("/api/v1/obscure", ["not", "an", "object"])
+        self.assertEqual(400, response.status_code)
+        self.assertTrue(results['errors'])
+
+        for expiration_secs in ["abc", True, 0, -5, 1.5]:
+            response, results = self.post_json("/api/v1/obscure", {'text': "text", 'expiration_secs': expiration_secs})
+            self.assertEqual(400, response.status_code)
+            self.assertEqual(["expiration_secs must be a positive integer"], results['errors'])
+
+    def test_002_test_obscure_and_clarify_batch(self):
+        self.logger.debug("TestServerApi: test_002_test_obscure_and_clarify_batch")
+        clear_texts = [line for line in self.test_data.split("\n") if line][0:5] + [""]
+        response, all_results = self.post_json("/api/v1/obscure/batch", clear_texts)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(len(clear_texts), len(all_results))
+        self.assertFalse(all_results[-1]['success'])
+
+        items = [{'key': results['key'], 'text': results['obscured_text']} for results in all_results[0:-1]]
+        items.append({'key': "no-such-key", 'text': "text"})
+        response, all_results = self.post_json("/api/v1/clarify/batch", items)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(clear_texts[0:-1], [results['clarified_text'] for results in all_results[0:-1]])
+        self.assertFalse(all_results[-1]['success'])
+
+        for item in [{'key': items[0]['key'], 'text': 12345}, {'key': ["a"], 'text': "text"}, {'text': "text"}]:
+            response, results = self.post_json("/api/v1/clarify/batch", [items[0], item])
+            self.assertEqual(400, response.status_code)
+            self.assertTrue(results['errors'])
+
+        response, all_results = self.post_json("/api/v1/obscure/batch", {'texts': clear_texts[0:2],
+                                                                          'expiration_secs': 30})
+        self.assertEqual([30, 30], [results['expiration_seconds'] for results in all_results])
+
+        response, results = self.post_json("/api/v1/obscure/batch", {'texts': clear_texts[0:2],
+                                                                      'expiration_secs': "abc"})
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(["expiration_secs must be a positive integer"], results['errors'])
+
+    def test_003_test_obscure_and_clarify_stream(self):
+        self.logger.debug("TestServerApi: test_003_test_obscure_and_clarify_stream")
+        response = self.client.post("/api/v1/obscure/stream?expiration_secs=30", data=self.test_data.encode('UTF8'),
+                                    headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.is_streamed)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual('30', response.headers['X-Prolix-Expiration-Seconds'])
+        key = response.headers['X-Prolix-Key']
+        obscured_text = response.get_data()
+
+        response = self.client.post("/api/v1/clarify/stream", data=obscured_text, headers={'X-Prolix-Key': key})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.test_data, response.get_data(as_text=True))
+
+        response = self.client.post("/api/v1/clarify/stream?key=no-such-key", data=obscured_text)
+        self.assertEqual(400, response.status_code)
+        self.assertFalse(json.loads(response.get_data(as_text=True))['success'])
+
+        response = self.client.post("/api/v1/clarify/stream", data=obscured_text)
+        self.assertEqual(400, response.status_code)
+
+        # Errors in the first chunk are reported before the response starts
+        for body in [b"", b"\xff\xfe not UTF8"]:
+            response = self.client.post("/api/v1/obscure/stream", data=body)
+            self.assertEqual(400, response.status_code)
+            self.assertNotIn('X-Prolix-Key', response.headers)
+            self.assertFalse(json.loads(response.get_data(as_text=True))['success'])
@@ -0,0 +1,68 @@
+import unittest
+
+from tests.base_test_class import BaseTestClass
+
+from prolix import api_impl
+from prolix import datasets
+from prolix import rand
+from prolix import store
+
+
+class TestShardedStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = BaseTestClass.get_logger()
+        conf_data = datasets.get_conf_data(logger=cls.logger)
+        # Three nodes on the one test Redis - routing is the same as for three instances
+        node = {'host': conf_data['redis_host'], 'port': conf_data['redis_port']}
+        cls.sharded_store = store.ShardedRedisStore(nodes=[node, node, node], logger=cls.logger)
+        rv = rand.RandValues(logger=cls.logger)
+        cls.keys = [rv.random_password() for i in range(0, 1000)]
+
+    def test_001_test_jump_hash(self):
+        self.logger.debug("TestShardedStore: test_001_test_jump_hash")
+        hashes = [store.key_hash(key) for key in self.keys]
+        self.assertEqual(hashes[0], store.key_hash(self.keys[0].encode('UTF8')))
+
+        for num_nodes in range(1, 10):
+            buckets = [store.jump_hash(key, num_nodes) for key in hashes]
+            self.assertEqual(set(range(0, num_nodes)), set(buckets))
+            # Adding a node only moves keys to the new node, about 1/N of them
+            more_buckets = [store.jump_hash(key, num_nodes + 1) for key in hashes]
+            moved = [more for bucket, more in zip(buckets, more_buckets) if bucket != more]
+            self.assertEqual({num_nodes} if moved else set(), set(moved))
+            self.assertLess(len(moved), 2 * len(hashes) / (num_nodes + 1))
+
+    def test_002_test_sharded_set_get_and_delete(self):
+        self.logger.debug("TestShardedStore: test_002_test_sharded_set_get_and_delete")
+        self.assertEqual({0, 1, 2}, set(self.sharded_store.node_index(key) for key in self.keys))
+        key = self.keys[0]
+        result = self.sharded_store.store_with_expiration(key=key, item=b"\x00\x01binary", exp_seconds=30)
+        self.assertTrue(result['success'])
+        self.assertEqual(30, result['expiration_secs'])
+        self.assertEqual(b"\x00\x01binary", self.sharded_store.get(key=key, decode=False)['item'])
+        self.assertTrue(self.sharded_store.get_and_delete(key=key)['success'])
+        self.assertFalse(self.sharded_store.delete(key=key)['success'])
+        self.assertFalse(self.sharded_store.get(key=None)['success'])
+
+    def test_003_test_sharded_store_many_and_get_many(self):
+        self.logger.debug("TestShardedStore: test_003_test_sharded_store_many_and_get_many")
+        items = [(key, "value {0}".format(pos)) for pos, key in enumerate(self.keys[0:20])]
+        result = self.sharded_store.store_many_with_expiration(items=items, exp_seconds=30)
+        self.assertTrue(result['success'])
+        results = self.sharded_store.get_many(keys=["no-such-key"] + [key for key, value in items])
+        self.assertFalse(results[0]['success'])
+        self.assertEqual([value for key, value in items], [result['item'] for result in results[1:]])
+        # Cleanup
+        for key, value in items:
+            self.assertTrue(self.sharded_store.delete(key=key)['success'])
+
+    def test_004_test_api_with_sharded_backend(self):
+        self.logger.debug("TestShardedStore: test_004_test_api_with_sharded_backend")
+        self.assertIsInstance(store.create_store(backend='sharded', logger=self.logger), store.ShardedRedisStore)
+        prolix_api = api_impl.ApiImpl(logger=self.logger, store_backend='sharded')
+        clear_text = "Four score and seven years ago"
+        results = prolix_api.obscure(text=clear_text)
+        results = prolix_api.clarify(key=results['key'], text=results['obscured_text'])
+        self.assertEqual(clear_text, results['clarified_text'])